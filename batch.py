@@ -0,0 +1,354 @@
+"""Batch renaming and vertex group cleanup over a library of .blend files.
+
+Run with a plain Python interpreter to process a directory of files on
+a pool of background Blender processes:
+
+    python batch.py rules.json /path/to/library --output /path/to/out --jobs 8
+
+Each process is started once, as `blender -b --python batch.py --
+--worker rules.json`, and kept for file after file: the driver writes
+the files to it on stdin, and this same script opens each one, applies
+the rules, saves it and prints its result for the driver to collect
+into a JSON report. The script is self-contained so it doesn't need the add-on to
+be installed on render or build machines.
+
+Rules are JSON:
+
+    {
+        "rename": [
+            {"pattern": "^L_(.*)$", "replacement": "\\\\1.L",
+             "targets": ["objects", "bones", "vertex_groups"]}
+        ],
+        "vertex_groups": {
+            "keep": ["^DEF-", "^Z_"],
+            "keep_deform_bones": true,
+            "keep_locked": true
+        }
+    }
+
+Renames are applied in order to the given targets: objects, bones,
+vertex_groups, collections, materials or actions. Renaming bones also
+renames their vertex groups and updates constraints and drivers, as
+renaming in the UI does. When "vertex_groups" is given, groups of
+meshes are removed unless they match a "keep" pattern, are locked
+(keep_locked), or are named after a deforming bone of an armature the
+mesh is deformed by (keep_deform_bones)."""
+
+import argparse
+import collections
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+OUTPUT_TAIL = 40  # lines of Blender output kept to report a crash
+RESULT_MARKER = "ADH_BATCH_RESULT "
+RENAME_TARGETS = ("objects", "bones", "vertex_groups", "collections", "materials", "actions")
+
+
+# Worker side, inside Blender.
+
+def rename_items(bpy, targets):
+    """{target: [items with a writable name]}."""
+    items = {
+        "objects": lambda: list(bpy.data.objects),
+        "bones": lambda: [bone for armature in bpy.data.armatures if armature.library is None
+                          for bone in armature.bones],
+        "vertex_groups": lambda: [vg for obj in bpy.data.objects if obj.library is None
+                                  for vg in obj.vertex_groups],
+        "collections": lambda: list(bpy.data.collections),
+        "materials": lambda: list(bpy.data.materials),
+        "actions": lambda: list(bpy.data.actions),
+    }
+    # Linked datablocks can't be renamed here.
+    return {target: [item for item in items[target]() if getattr(item, "library", None) is None]
+            for target in targets}
+
+
+def apply_renames(bpy, rules):
+    renamed = {}
+    for rule in rules:
+        pattern = re.compile(rule["pattern"])
+        replacement = rule.get("replacement", "")
+        for target, items in rename_items(bpy, rule.get("targets", ["objects"])).items():
+            for item in items:
+                new_name = pattern.sub(replacement, item.name)
+                if new_name != item.name:
+                    item.name = new_name
+                    renamed[target] = renamed.get(target, 0) + 1
+    return renamed
+
+
+def clean_vertex_groups(bpy, rules):
+    keep = [re.compile(pattern) for pattern in rules.get("keep", [])]
+    keep_locked = rules.get("keep_locked", True)
+    keep_deform_bones = rules.get("keep_deform_bones", True)
+    removed = 0
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH' or obj.library is not None:
+            continue
+        bone_names = set()
+        if keep_deform_bones:
+            for mod in obj.modifiers:
+                if mod.type == 'ARMATURE' and mod.object is not None:
+                    bone_names.update(bone.name for bone in mod.object.data.bones if bone.use_deform)
+        for vg in list(obj.vertex_groups):
+            if vg.name in bone_names or (keep_locked and vg.lock_weight) \
+                    or any(pattern.search(vg.name) for pattern in keep):
+                continue
+            obj.vertex_groups.remove(vg)
+            removed += 1
+    return removed
+
+
+def process_job(bpy, rules, job, dry_run):
+    """Opens job["file"], applies the rules and saves it, in place or to
+    job["save_as"] when given: changed files are saved there, unchanged
+    ones copied so the output holds the whole library."""
+    start = time.perf_counter()
+    result = {"file": job["file"]}
+    try:
+        bpy.ops.wm.open_mainfile(filepath=job["file"], load_ui=False)
+        result["renamed"] = apply_renames(bpy, rules.get("rename", []))
+        if "vertex_groups" in rules:
+            result["removed_vertex_groups"] = clean_vertex_groups(bpy, rules["vertex_groups"])
+        changed = bool(result["renamed"] or result.get("removed_vertex_groups"))
+        save_as = job.get("save_as")
+        if not dry_run and (changed or save_as):
+            if save_as:
+                os.makedirs(os.path.dirname(save_as), exist_ok=True)
+            if not changed:
+                shutil.copy2(job["file"], save_as)
+            elif save_as:
+                bpy.ops.wm.save_as_mainfile(filepath=save_as, relative_remap=True)
+            else:
+                bpy.ops.wm.save_mainfile()
+        result["status"] = "changed" if changed else "unchanged"
+    except Exception as error:
+        result["status"] = "error"
+        result["error"] = "%s: %s" % (type(error).__name__, error)
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def run_worker(argv):
+    """Processes the jobs read from stdin, one JSON line per file, in
+    this Blender session, printing a result line for each."""
+    import bpy
+
+    parser = argparse.ArgumentParser(prog="batch.py -- --worker")
+    parser.add_argument("--worker", required=True, metavar="RULES")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(args.worker) as rules_file:
+        rules = json.load(rules_file)
+    for line in sys.stdin:
+        if line.strip():
+            result = process_job(bpy, rules, json.loads(line), args.dry_run)
+            print(RESULT_MARKER + json.dumps(result))
+            sys.stdout.flush()
+
+
+# Driver side, plain Python.
+
+def find_blend_files(directory, exclude=None):
+    """.blend files under directory, leaving out those under exclude."""
+    exclude = os.path.abspath(exclude) if exclude else None
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != exclude)
+        for filename in sorted(files):
+            if filename.endswith(".blend"):
+                yield os.path.join(root, filename)
+
+
+def plan_jobs(args):
+    """One job per .blend file: {"file": path, "save_as": path under
+    --output, if given}. Files already in the output directory are left
+    out when it is inside the searched one."""
+    jobs = []
+    for path in find_blend_files(args.directory, exclude=args.output):
+        job = {"file": os.path.abspath(path)}
+        if args.output:
+            job["save_as"] = os.path.join(os.path.abspath(args.output),
+                                          os.path.relpath(path, args.directory))
+        jobs.append(job)
+    return jobs
+
+
+class Worker:
+    """A background Blender kept running to process file after file. It
+    is started on the first job and again after a crash or a timeout,
+    which kill it."""
+
+    def __init__(self, args):
+        self.command = [args.blender, "-b", "--factory-startup",
+                        "--python", os.path.abspath(__file__), "--",
+                        "--worker", os.path.abspath(args.rules)]
+        if args.dry_run:
+            self.command.append("--dry-run")
+        self.timeout = args.timeout
+        self.process = None
+        self.lines = None
+        self.output = collections.deque(maxlen=OUTPUT_TAIL)
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1)
+        # Read on a thread of its own so waiting for a result can time out.
+        self.lines = queue.Queue()
+        threading.Thread(target=self.read, args=(self.process.stdout, self.lines), daemon=True).start()
+
+    @staticmethod
+    def read(stdout, lines):
+        for line in stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def stop(self, kill=False):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        if kill:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def run(self, job):
+        if self.process is None:
+            self.start()
+        self.output.clear()
+        start = time.perf_counter()
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            pass  # it exited, reported below from its output
+        while True:
+            try:
+                line = self.lines.get(timeout=max(start + self.timeout - time.perf_counter(), 0.0))
+            except queue.Empty:
+                self.stop(kill=True)
+                return {"file": job["file"], "status": "error",
+                        "error": "timed out after %ds" % self.timeout}
+            if line is None:
+                code = self.process.wait()
+                self.process = None
+                return {"file": job["file"], "status": "error",
+                        "error": "Blender exited with code %d: %s" % (code, "".join(self.output))}
+            if line.startswith(RESULT_MARKER):
+                result = json.loads(line[len(RESULT_MARKER):])
+                result["wall_time"] = time.perf_counter() - start
+                return result
+            self.output.append(line)
+
+
+def summarize(results):
+    summary = {"files": len(results), "renamed": {}, "removed_vertex_groups": 0}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+        for target, count in result.get("renamed", {}).items():
+            summary["renamed"][target] = summary["renamed"].get(target, 0) + count
+        summary["removed_vertex_groups"] += result.get("removed_vertex_groups", 0)
+    return summary
+
+
+def driver_parser():
+    parser = argparse.ArgumentParser(description="Apply rename and vertex group rules to .blend files.")
+    parser.add_argument("rules", help="JSON rule file")
+    parser.add_argument("directory", help="directory searched recursively for .blend files")
+    parser.add_argument("--output", help="save the files here, keeping the directory layout,"
+                                         " instead of in place; unchanged ones are copied")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of Blender processes run at once")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER") or shutil.which("blender") or "blender",
+                        help="Blender executable (default: $BLENDER or blender on PATH)")
+    parser.add_argument("--timeout", type=int, default=600, help="seconds allowed per file")
+    parser.add_argument("--report", default="batch_report.json", help="JSON report path")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without saving")
+    return parser
+
+
+def check_rules(parser, path):
+    """Loads the rule file, failing early on a broken one rather than
+    once per file."""
+    with open(path) as rules_file:
+        rules = json.load(rules_file)
+    for rule in rules.get("rename", []):
+        unknown = set(rule.get("targets", ["objects"])) - set(RENAME_TARGETS)
+        if unknown:
+            parser.error("unknown rename targets: %s" % ", ".join(sorted(unknown)))
+        try:
+            re.compile(rule["pattern"])
+        except re.error as error:
+            parser.error("bad rename pattern %r: %s" % (rule["pattern"], error))
+    return rules
+
+
+def run_driver(argv):
+    parser = driver_parser()
+    args = parser.parse_args(argv)
+    check_rules(parser, args.rules)
+    jobs = plan_jobs(args)
+
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+    results = []
+    lock = threading.Lock()
+
+    def work():
+        worker = Worker(args)
+        try:
+            while True:
+                try:
+                    job = pending.get_nowait()
+                except queue.Empty:
+                    return
+                result = worker.run(job)
+                with lock:
+                    results.append(result)
+                    print("[%d/%d] %s: %s%s" % (len(results), len(jobs), result["file"], result["status"],
+                                                " (%s)" % result["error"] if "error" in result else ""))
+        finally:
+            worker.stop()
+
+    threads = [threading.Thread(target=work) for _ in range(max(min(args.jobs, len(jobs)), 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.sort(key=lambda result: result["file"])
+
+    report = {"rules": os.path.abspath(args.rules), "directory": os.path.abspath(args.directory),
+              "output": args.output, "dry_run": args.dry_run,
+              "summary": summarize(results), "results": results}
+    with open(args.report, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(json.dumps(report["summary"], indent=2))
+    return 1 if report["summary"].get("error") else 0
+
+
+def main():
+    if "--" in sys.argv:
+        worker_args = sys.argv[sys.argv.index("--") + 1:]
+        if "--worker" in worker_args:
+            run_worker(worker_args)
+            return 0
+    return run_driver(sys.argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
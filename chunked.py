@@ -0,0 +1,150 @@
+"""Modal execution of long-running operators in short chunks.
+
+An operator deriving from ADH_AbstractChunkedOperator implements
+run(context) as a generator doing its work and yielding its progress,
+from 0 to 1, whenever it's safe to stop for a while. When invoked from
+the UI, the generator is driven by a timer, each tick running it for
+CHUNK_TIME seconds, so the progress indicator and viewport keep
+updating. Esc cancels, putting back the data run() took snapshots of
+before changing it, see snapshot(). execute(), used in background mode,
+for redo and from scripts, runs it to completion.
+
+run() may also yield a concurrent.futures.Future, from the executor
+module: the generator is resumed with the future's result once it's
+done, without blocking the UI in the meantime. When it can't do its
+work, run() reports why and returns {'CANCELLED'}, which the operator
+returns too."""
+
+import time
+from concurrent.futures import Future
+
+import bpy
+
+CHUNK_TIME = 0.05  # seconds of work per timer tick
+TIMER_STEP = 0.01
+
+# Events still handled by Blender while the operator runs; everything
+# else is swallowed so the data isn't edited under the operator.
+PASS_THROUGH_EVENTS = {
+    'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE',
+    'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'NDOF_MOTION', 'TIMER',
+    'TIMER_REPORT', 'TIMERREGION', 'WINDOW_DEACTIVATE',
+}
+
+
+def scaled(steps, start, end):
+    """Maps the progress yielded by a nested generator to [start, end]."""
+    for progress in steps:
+        yield start + (end - start) * progress
+
+
+def run_to_end(steps):
+    """Runs a run() generator synchronously, waiting on the futures it
+    yields. Returns what the generator returned."""
+    value = None
+    try:
+        while True:
+            value = steps.send(value.result() if isinstance(value, Future) else None)
+    except StopIteration as stop:
+        return stop.value
+
+
+class ADH_AbstractChunkedOperator:
+    """Operators deriving from it define run(context), the generator
+    doing their work, yielding its progress or futures to wait on and
+    returning {'CANCELLED'} if it failed."""
+    _steps = None
+    _timer = None
+    _pending = None
+    _progress = 0.0
+    _snapshots = None
+
+    def snapshot(self, take, *args, **kwargs):
+        """Has run() keep take(*args, **kwargs), a snapshot.Snapshot of
+        data it's about to change, when running modally: the snapshots
+        are restored newest first if the operator is cancelled. execute()
+        takes none, Blender's undo covers it as a whole."""
+        if self._snapshots is not None:
+            self._snapshots.append(take(*args, **kwargs))
+
+    def execute(self, context):
+        return run_to_end(self.run(context)) or {'FINISHED'}
+
+    def invoke(self, context, event):
+        if bpy.app.background or context.window is None:
+            return self.execute(context)
+
+        wm = context.window_manager
+        self._snapshots = []
+        self._steps = self.run(context)
+        self._timer = wm.event_timer_add(TIMER_STEP, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.finish(context)
+            self.restore(context)
+            self.report({'INFO'}, "%s cancelled" % self.bl_label)
+            return {'CANCELLED'}
+        if event.type != 'TIMER' or event.timer != self._timer:
+            return {'PASS_THROUGH'} if event.type in PASS_THROUGH_EVENTS else {'RUNNING_MODAL'}
+
+        # At least one step per tick, however long it takes.
+        deadline = time.perf_counter() + CHUNK_TIME
+        try:
+            while True:
+                if self._pending is not None:
+                    if not self._pending.done():
+                        break
+                    value = self._steps.send(self._pending.result())
+                    self._pending = None
+                else:
+                    value = next(self._steps)
+                if isinstance(value, Future):
+                    self._pending = value
+                else:
+                    self._progress = value
+                if time.perf_counter() >= deadline:
+                    break
+        except StopIteration as stop:
+            self.finish(context)
+            result = stop.value or {'FINISHED'}
+            if 'CANCELLED' in result:
+                self.restore(context)
+            else:
+                self.discard()
+            return result
+        except Exception:
+            self.finish(context)
+            self.restore(context)
+            raise
+
+        progress = min(max(self._progress, 0.0), 1.0)
+        context.window_manager.progress_update(int(100 * progress))
+        context.workspace.status_text_set("%s: %d%%, Esc to cancel" % (self.bl_label, 100 * progress))
+        return {'RUNNING_MODAL'}
+
+    def restore(self, context):
+        """Puts back what run() changed, from its snapshots."""
+        snapshots, self._snapshots = self._snapshots, None
+        for snapshot in reversed(snapshots):
+            snapshot.restore(context)
+
+    def discard(self):
+        snapshots, self._snapshots = self._snapshots, None
+        for snapshot in snapshots:
+            snapshot.discard()
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        if self._pending is not None:
+            self._pending.cancel()
+        self._steps.close()
+        self._timer = None
+        self._steps = None
+        self._pending = None
@@ -0,0 +1,8 @@
+PRF_ROOT = "root-"
+PRF_TIP = "tip-"
+PRF_HOOK = "hook-"
+PRF_WIDGET = "WGT-"
+PRF_LATTICE = "LAT-"
+PRF_SHAPE_KEY = "SK-"
+BBONE_BASE_SIZE = 0.01
+WIDGETS_COLLECTION = "Widgets"
@@ -0,0 +1,203 @@
+import bpy
+
+from .common import PRF_SHAPE_KEY
+
+
+class ADH_MapShapeKeysToBones(bpy.types.Operator):
+    """Create driver for shape keys, driven by selected bone of the same name."""
+    bl_idname = 'object.adh_map_shape_keys_to_bones'
+    bl_label = 'Map Shape Keys to Bones'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    slider_axis: bpy.props.EnumProperty(
+        name="Slider Axis",
+        items=[("LOC_X", "X", "X axis"), ("LOC_Y", "Y", "Y axis"),
+               ("LOC_Z", "Z", "X axis")],
+        default="LOC_X",
+    )
+
+    slider_distance: bpy.props.FloatProperty(
+        name="Slider Distance",
+        min=-2.0, max=2.0, default=0.2, step=0.05,
+        subtype="DISTANCE", unit="LENGTH",
+    )
+
+    @classmethod
+    def poll(self, context):
+        return context.active_object != None \
+               and context.active_object.type in ['MESH', 'LATTICE'] \
+               and len(context.selected_objects) == 2
+
+    def execute(self, context):
+        obj1, obj2 = context.selected_objects
+        mesh = obj1.data
+        armature = obj2
+        if obj2.type in ["MESH", "LATTICE"]:
+            mesh = obj2.data
+            armature = obj1
+
+        if armature.type != "ARMATURE":
+            return {"CANCELLED"}
+
+        mesh_keys = mesh.shape_keys
+        if not mesh_keys.animation_data:
+            mesh_keys.animation_data_create()
+
+        slider_formula = "a * %0.1f" % (1.0 / self.slider_distance) \
+            if self.slider_distance != 0.0 else "a"
+        for shape in mesh_keys.key_blocks:
+            # Create driver only if the shape key isn't Basis, the
+            # corresponding bone exists and is selected.
+            bone = armature.data.bones.get(shape.name, None)
+            if shape == mesh_keys.reference_key or not (bone and bone.select):
+                continue
+
+            data_path = 'key_blocks["%s"].value' % shape.name
+            fc = mesh_keys.driver_add(data_path)
+
+            dv = fc.driver.variables[0] if len(fc.driver.variables) > 0 \
+                else fc.driver.variables.new()
+            dv.name = "a"
+            dv.type = "TRANSFORMS"
+
+            target = dv.targets[0]
+            target.id = armature
+            target.bone_target = shape.name
+            target.data_path = dv.targets[0].data_path
+            target.transform_space = "LOCAL_SPACE"
+            target.transform_type = self.slider_axis
+
+            fc.driver.type = "SCRIPTED"
+            fc.driver.expression = slider_formula
+
+        return {"FINISHED"}
+
+
+class ADH_AnalyzeShapeKeys(bpy.types.Operator):
+    """Reports shape keys moving no vertex, duplicate keys, and how many vertices each key moves. Optionally removes the keys moving nothing and limits the others to the vertices they move."""
+    bl_idname = 'object.adh_analyze_shape_keys'
+    bl_label = 'Analyze Shape Keys'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    REPORT_TEXT = "Shape Key Analysis"
+
+    threshold: bpy.props.FloatProperty(
+        name="Threshold",
+        description="Vertices moving less than this are considered unaffected.",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        subtype='DISTANCE',
+        unit='LENGTH',
+    )
+
+    remove_dead: bpy.props.BoolProperty(
+        name="Remove Dead Keys",
+        description="Remove keys moving no vertex, with their drivers.",
+        default=False,
+    )
+
+    limit_sparse: bpy.props.BoolProperty(
+        name="Limit Sparse Keys",
+        description="Limit keys moving few vertices to a vertex group of those vertices,"
+                    " so the others are skipped when evaluating them.",
+        default=False,
+    )
+
+    sparse_ratio: bpy.props.FloatProperty(
+        name="Sparse Ratio",
+        description="Keys moving less than this fraction of the vertices are limited.",
+        default=0.5,
+        min=0.0,
+        max=1.0,
+        subtype='FACTOR',
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type in ['MESH', 'LATTICE'] \
+               and context.mode == 'OBJECT' \
+               and obj.data.shape_keys is not None
+
+    def draw(self, context):
+        layout = self.layout
+
+        layout.prop(self, "threshold")
+        layout.prop(self, "remove_dead")
+        row = layout.row(align=True)
+        row.prop(self, "limit_sparse", toggle=True)
+        sub = row.row(align=True)
+        sub.active = self.limit_sparse
+        sub.prop(self, "sparse_ratio")
+
+    def limit_key(self, obj, key, affected):
+        from . import geometry
+
+        vg_name = PRF_SHAPE_KEY + key.name
+        vg = obj.vertex_groups.get(vg_name) or obj.vertex_groups.new(name=vg_name)
+        geometry.write_weights(vg, affected)
+        key.vertex_group = vg.name
+
+    def remove_key(self, obj, key):
+        shape_keys = obj.data.shape_keys
+        if shape_keys.animation_data is not None:
+            shape_keys.driver_remove('key_blocks["%s"].value' % key.name)
+        obj.shape_key_remove(key)
+
+    def execute(self, context):
+        import numpy as np
+        from . import geometry
+
+        obj = context.active_object
+        shape_keys = obj.data.shape_keys
+        key_blocks = shape_keys.key_blocks
+        names = key_blocks.keys()
+        reference = key_blocks.find(shape_keys.reference_key.name)
+        relative = [key_blocks.find(key.relative_key.name) for key in key_blocks]
+
+        co = geometry.read_shape_keys(key_blocks)
+        offsets, deltas = geometry.shape_key_offsets(co, relative)
+        affected = offsets > self.threshold
+        counts = affected.sum(axis=1)
+        vertex_count = co.shape[1]
+        # Keys others are relative to stay, even if they don't move
+        # anything themselves.
+        base_keys = set(relative) | {reference}
+        dead = [index for index in range(len(names))
+                if counts[index] == 0 and index not in base_keys]
+        live = np.array([index for index in range(len(names))
+                         if counts[index] > 0 and index != reference], dtype=np.int64)
+        duplicates = [[int(live[index]) for index in group]
+                      for group in geometry.duplicate_groups(deltas[live], self.threshold)]
+        sparse = [int(index) for index in live
+                  if counts[index] < self.sparse_ratio * vertex_count]
+
+        lines = ["%s: %d keys, %d vertices, threshold %g" % (obj.name, len(names), vertex_count, self.threshold),
+                 "", "Affected vertices per key:"]
+        lines += ["  %-32s %8d  %5.1f%%%s" % (names[index], counts[index], 100.0 * counts[index] / max(vertex_count, 1),
+                                              "  (reference)" if index == reference else "")
+                  for index in range(len(names))]
+        lines += ["", "Dead keys (%d):" % len(dead)] + ["  " + names[index] for index in dead]
+        lines += ["", "Duplicate keys (%d groups):" % len(duplicates)] \
+            + ["  " + ", ".join(names[index] for index in group) for group in duplicates]
+        lines += ["", "Sparse keys (%d, below %d%% of vertices):" % (len(sparse), 100 * self.sparse_ratio)] \
+            + ["  " + names[index] for index in sparse]
+
+        if self.limit_sparse:
+            for index in sparse:
+                key = key_blocks[names[index]]
+                if not key.vertex_group:
+                    self.limit_key(obj, key, affected[index])
+        if self.remove_dead:
+            for index in dead:
+                self.remove_key(obj, key_blocks[names[index]])
+
+        text = bpy.data.texts.get(self.REPORT_TEXT) or bpy.data.texts.new(self.REPORT_TEXT)
+        text.clear()
+        text.write("\n".join(lines) + "\n")
+
+        self.report({'INFO'}, "%d dead, %d duplicate groups, %d sparse keys; details in text %s"
+                    % (len(dead), len(duplicates), len(sparse), text.name))
+
+        return {'FINISHED'}
@@ -0,0 +1,66 @@
+"""Thread pool for pure computation on buffers copied out of Blender.
+
+Workers must not touch bpy data: copy what's needed with foreach_get on
+the main thread, submit the NumPy work here (NumPy releases the GIL in
+its heavy loops, so this does use several cores) and apply the results
+back on the main thread. Chunked operators do the latter by yielding the
+future from run() and getting its result back from the yield, see the
+chunked module."""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_pool = None
+
+
+def worker_count():
+    return os.cpu_count() or 1
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=worker_count(),
+                                   thread_name_prefix="adh_rigging_tools")
+    return _pool
+
+
+def submit(func, *args, **kwargs):
+    return get_pool().submit(func, *args, **kwargs)
+
+
+def map_chunks(func, array, *args, chunk_size=4096):
+    """Runs func(chunk, *args) over chunks of array's first axis in
+    parallel. Returns a future of the list of results, in order."""
+    futures = [submit(func, array[start:start + chunk_size], *args)
+               for start in range(0, len(array), chunk_size)]
+    combined = Future()
+    if not futures:
+        combined.set_result([])
+        return combined
+    # Callbacks run on whichever worker finished the chunk.
+    lock = threading.Lock()
+    remaining = [len(futures)]
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        # A chunked operator cancelled meanwhile cancels the combined future.
+        if last and combined.set_running_or_notify_cancel():
+            try:
+                combined.set_result([future.result() for future in futures])
+            except Exception as error:
+                combined.set_exception(error)
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
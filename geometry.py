@@ -0,0 +1,481 @@
+"""NumPy helpers shared by the operators. Imported lazily, only when an
+operator actually needs vectorized math."""
+
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from .prefs import MEMORY_ENV, get_preferences
+
+DEFAULT_MEMORY_LIMIT = 256  # megabytes
+PYTHON_INT_SIZE = 40  # bytes per int in a list handed to bpy, pointer included
+VERTEX_ROW_SIZE = 160  # bytes per vertex looped over in Python: its bpy object and a float
+
+_mesh_cache = {}  # (mesh pointer, kind): (key, value)
+_memory_limit = None
+
+
+def set_memory_limit(megabytes):
+    global _memory_limit
+    _memory_limit = megabytes
+
+
+def memory_limit():
+    """Bytes the temporary arrays of one chunked computation may use,
+    from $ADH_RIGGING_TOOLS_MEMORY_MB or the add-on preferences. The
+    preference is read on the first call from the main thread, bpy
+    isn't safe to use from the executor's; later changes are set by its
+    update callback."""
+    global _memory_limit
+    if _memory_limit is None and threading.current_thread() is threading.main_thread():
+        prefs = get_preferences()
+        _memory_limit = prefs.memory_limit if prefs is not None else DEFAULT_MEMORY_LIMIT
+    megabytes = os.environ.get(MEMORY_ENV) or _memory_limit or DEFAULT_MEMORY_LIMIT
+    return int(float(megabytes) * 1024 * 1024)
+
+
+def chunk_rows(bytes_per_row, minimum=1024):
+    """Rows processed at once so that temporaries of bytes_per_row each
+    stay within the memory limit. Arrays holding whole-mesh inputs and
+    results (float32 coordinates, one weight per vertex) aren't counted:
+    they grow with the mesh whatever the chunking."""
+    return max(minimum, memory_limit() // max(int(bytes_per_row), 1))
+
+
+def iter_slices(count, rows):
+    for start in range(0, count, rows):
+        yield slice(start, min(start + rows, count))
+
+
+def mesh_cached(mesh, kind, key, build):
+    """Returns build() cached per mesh datablock and kind of data. The
+    value is rebuilt whenever key, describing what it was built from,
+    changes."""
+    slot = (mesh.as_pointer(), kind)
+    entry = _mesh_cache.get(slot)
+    if entry is None or entry[0] != key:
+        entry = _mesh_cache[slot] = (key, build())
+    return entry[1]
+
+
+def clear_mesh_cache():
+    _mesh_cache.clear()
+
+
+def array_hash(*arrays):
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def read_matrices(collection, attr):
+    """Reads a 4x4 matrix property of every item in a bpy collection
+    into an (N, 4, 4) row-major float64 array."""
+    buf = np.empty(len(collection) * 16, dtype=np.float32)
+    collection.foreach_get(attr, buf)
+    # foreach_get returns Blender's column-major layout.
+    return buf.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+
+
+def read_floats(collection, attr):
+    buf = np.empty(len(collection), dtype=np.float32)
+    collection.foreach_get(attr, buf)
+    return buf
+
+
+def read_coordinates(vertices):
+    """Reads vertex (or lattice point) coordinates into an (N, 3)
+    float32 array."""
+    buf = np.empty(len(vertices) * 3, dtype=np.float32)
+    vertices.foreach_get("co", buf)
+    return buf.reshape(-1, 3)
+
+
+def read_vectors(collection, attr):
+    """Reads a 3D vector property of every item into an (N, 3) float32
+    array."""
+    buf = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get(attr, buf)
+    return buf.reshape(-1, 3)
+
+
+def read_flags(collection, attr):
+    """Reads a boolean property of every item into a bool array."""
+    buf = np.empty(len(collection), dtype=bool)
+    collection.foreach_get(attr, buf)
+    return buf
+
+
+def read_edges(edges):
+    buf = np.empty(len(edges) * 2, dtype=np.int32)
+    edges.foreach_get("vertices", buf)
+    return buf.reshape(-1, 2)
+
+
+def transform_points(co, matrix, out=None):
+    """Applies a 4x4 matrix (mathutils or array-like) to an (N, 3)
+    array of points, keeping its dtype. Works in chunks, writing into
+    out (which may be co itself) so only the result is allocated."""
+    matrix = np.asarray(matrix, dtype=co.dtype)
+    rotation = matrix[:3, :3].T
+    translation = matrix[:3, 3]
+    if out is None:
+        out = np.empty_like(co)
+    for rows in iter_slices(len(co), chunk_rows(co.itemsize * 3 * 2)):
+        chunk = co[rows] @ rotation
+        chunk += translation
+        out[rows] = chunk
+    return out
+
+
+def iter_vertex_chunks(mesh, bytes_per_row=VERTEX_ROW_SIZE):
+    """(slice, vertices) chunks of the mesh's vertices, for what has to
+    loop over them in Python: vertex group weights aren't exposed to
+    foreach_get or as attributes. The chunk's bpy objects and the Python
+    values gathered from them stay within the memory limit."""
+    vertices = mesh.vertices
+    for rows in iter_slices(len(vertices), chunk_rows(bytes_per_row)):
+        yield rows, vertices[rows]
+
+
+def read_group_max(mesh, group_indices):
+    """Largest weight of every vertex among the given vertex groups,
+    without the (N, G) array of read_group_weights."""
+    groups = set(group_indices)
+    weights = np.zeros(len(mesh.vertices), dtype=np.float32)
+    for rows, vertices in iter_vertex_chunks(mesh):
+        # Python floats: comparing NumPy scalars per element costs more
+        best = [0.0] * len(vertices)
+        for offset, vert in enumerate(vertices):
+            for elem in vert.groups:
+                if elem.group in groups:
+                    weight = elem.weight
+                    if weight > best[offset]:
+                        best[offset] = weight
+        weights[rows] = best
+    return weights
+
+
+def read_group_weights(mesh, group_indices):
+    """(N, G) weights of every vertex in the given vertex groups."""
+    columns = {group: column for column, group in enumerate(group_indices)}
+    weights = np.zeros((len(mesh.vertices), len(columns)), dtype=np.float32)
+    for rows, vertices in iter_vertex_chunks(mesh):
+        for index, vert in enumerate(vertices, rows.start):
+            for elem in vert.groups:
+                column = columns.get(elem.group)
+                if column is not None:
+                    weights[index, column] = elem.weight
+    return weights
+
+
+def read_group_members(mesh, group_count):
+    """[(vertex indices, weights)] of the members of each vertex group,
+    by group index, zero weights included."""
+    indices = [[] for _ in range(group_count)]
+    weights = [[] for _ in range(group_count)]
+    for rows, vertices in iter_vertex_chunks(mesh):
+        for index, vert in enumerate(vertices, rows.start):
+            for elem in vert.groups:
+                if elem.group < group_count:
+                    indices[elem.group].append(index)
+                    weights[elem.group].append(elem.weight)
+    return [(np.array(group_indices, dtype=np.int32), np.array(group_weights, dtype=np.float32))
+            for group_indices, group_weights in zip(indices, weights)]
+
+
+def similarity_transform(src, dst):
+    """Least-squares similarity transform (Umeyama) mapping src points
+    onto dst points of the same order: dst ~ scale * rotation @ src +
+    translation. Returns (scale, rotation, translation, rms error), or
+    None if src has no extent."""
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    src_mean = src.mean(axis=0)
+    dst_mean = dst.mean(axis=0)
+    src_centered = src - src_mean
+    dst_centered = dst - dst_mean
+    src_var = (src_centered * src_centered).sum() / len(src)
+    if src_var <= 1e-12:
+        return None
+
+    u, s, vt = np.linalg.svd(dst_centered.T @ src_centered / len(src))
+    d = np.ones(3)
+    if np.linalg.det(u) * np.linalg.det(vt) < 0:
+        d[2] = -1.0  # Best proper rotation, no reflection.
+    rotation = u @ np.diag(d) @ vt
+    scale = (s * d).sum() / src_var
+    translation = dst_mean - scale * rotation @ src_mean
+
+    fitted = scale * src @ rotation.T + translation
+    error = np.sqrt(((fitted - dst) ** 2).sum(axis=1).mean())
+    return scale, rotation, translation, error
+
+
+def widget_matrices(rig_matrix, bone_matrices, bone_lengths):
+    """World matrices placing widgets at bones' rest positions, scaled
+    uniformly by bone length times the armature's average scale.
+
+    rig_matrix is 4x4, bone_matrices (N, 4, 4) in armature space and
+    bone_lengths (N,). Returns an (N, 4, 4) array."""
+    mats = np.asarray(rig_matrix, dtype=np.float64) @ bone_matrices
+    axes = mats[:, :3, :3]
+    scales = np.linalg.norm(axes, axis=1)  # length of each column
+    scales = np.where(scales > 0, scales, 1.0)
+    uniform = bone_lengths * scales.mean(axis=1)
+
+    result = np.zeros_like(mats)
+    result[:, :3, :3] = axes / scales[:, np.newaxis, :] * uniform[:, np.newaxis, np.newaxis]
+    result[:, :3, 3] = mats[:, :3, 3]
+    result[:, 3, 3] = 1.0
+    return result
+
+
+def fit_box(points, oriented=False):
+    """Box enclosing the points, aligned to world axes or, if oriented,
+    to the points' principal axes. Returns (center, axes, size) where
+    axes is a right-handed rotation matrix with one axis per column."""
+    points = np.asarray(points, dtype=np.float64)
+    mean = points.mean(axis=0)
+    axes = np.identity(3)
+    if oriented and len(points) > 3:
+        _, vectors = np.linalg.eigh(np.cov(points - mean, rowvar=False))
+        axes = vectors[:, ::-1]  # Largest spread first.
+        if np.linalg.det(axes) < 0:
+            axes[:, 2] *= -1
+
+    local = (points - mean) @ axes
+    lo = local.min(axis=0)
+    hi = local.max(axis=0)
+    center = mean + axes @ ((lo + hi) / 2)
+    return center, axes, hi - lo
+
+
+def fit_lattice(point_sets, oriented=False, margin=0.0, density=0.0, max_resolution=64):
+    """World matrix and (u, v, w) resolution of a lattice enclosing the
+    given point arrays, padded by margin times its size on each side,
+    with about `density` points per unit length."""
+    center, axes, size = fit_box(np.concatenate(point_sets), oriented)
+    size = size * (1.0 + 2.0 * margin)
+    size = np.maximum(size, max(size.max(), 1.0) * 1e-3)  # Flat selections
+
+    matrix = np.identity(4)
+    matrix[:3, :3] = axes * size
+    matrix[:3, 3] = center
+    resolution = np.clip(np.ceil(size * density).astype(int) + 1, 2, max_resolution)
+    return matrix, tuple(resolution.tolist())
+
+
+def connected_components(vertex_count, edges):
+    """Labels each vertex with the index of its loose part, numbered
+    from 0. Union-find by repeated min-label propagation along the edge
+    array, with pointer jumping to shortcut long chains."""
+    labels = np.arange(vertex_count)
+    if len(edges):
+        a, b = edges[:, 0], edges[:, 1]
+        while True:
+            low = np.minimum(labels[a], labels[b])
+            new_labels = labels.copy()
+            np.minimum.at(new_labels, a, low)
+            np.minimum.at(new_labels, b, low)
+            new_labels = new_labels[new_labels]
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+    return np.unique(labels, return_inverse=True)[1].reshape(-1)
+
+
+def vertex_adjacency(vertex_count, edges):
+    """Vertex adjacency in CSR form: the neighbors of vertex i are
+    indices[indptr[i]:indptr[i + 1]]."""
+    both = np.concatenate([edges, edges[:, ::-1]])
+    order = np.argsort(both[:, 0], kind='stable')
+    indices = both[order, 1]
+    indptr = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(both[:, 0], minlength=vertex_count), out=indptr[1:])
+    return indptr, indices
+
+
+def mesh_adjacency(mesh):
+    """CSR vertex adjacency of a mesh, cached until its topology
+    changes."""
+    edges = read_edges(mesh.edges)
+    key = (len(mesh.vertices), array_hash(edges))
+    return mesh_cached(mesh, "adjacency", key, lambda: vertex_adjacency(len(mesh.vertices), edges))
+
+
+def _reduce_neighbors(values, adjacency, ufunc, empty):
+    indptr, indices = adjacency
+    result = np.full(len(indptr) - 1, empty)
+    rows = np.diff(indptr) > 0
+    if rows.any():
+        result[rows] = ufunc.reduceat(values[indices], indptr[:-1][rows])
+    return result
+
+
+def grow_mask(mask, adjacency, steps=1):
+    """Extends a boolean vertex mask by `steps` rings of neighbors."""
+    for _ in range(steps):
+        mask = mask | _reduce_neighbors(mask, adjacency, np.logical_or, False)
+    return mask
+
+
+def shrink_mask(mask, adjacency, steps=1):
+    """Removes `steps` rings of border vertices from a boolean mask."""
+    for _ in range(steps):
+        mask = mask & _reduce_neighbors(mask, adjacency, np.logical_and, True)
+    return mask
+
+
+def group_centroids(co, labels):
+    """Centroid of the points sharing each label."""
+    counts = np.bincount(labels)
+    return np.stack([np.bincount(labels, weights=co[:, axis]) / counts
+                     for axis in range(3)], axis=1)
+
+
+def segment_distances(points, heads, tails):
+    """(P, S) distances from each point to each line segment."""
+    heads = np.asarray(heads, dtype=points.dtype)
+    tails = np.asarray(tails, dtype=points.dtype)
+    direction = tails - heads
+    length_sq = np.maximum((direction * direction).sum(axis=1), 1e-12)
+    offset = points[:, np.newaxis, :] - heads[np.newaxis, :, :]
+    t = np.clip((offset * direction).sum(axis=2) / length_sq, 0.0, 1.0)
+    nearest = offset - t[:, :, np.newaxis] * direction
+    return np.sqrt((nearest * nearest).sum(axis=2))
+
+
+def segment_rows(points, segment_count):
+    """Points per chunk for segment_distances, whose (P, S, 3)
+    temporaries dominate its memory use."""
+    return chunk_rows(segment_count * 3 * points.itemsize * 3)
+
+
+def nearest_segments(points, heads, tails, chunk_size=None):
+    """Index of the nearest segment to each point."""
+    result = np.empty(len(points), dtype=np.int64)
+    for rows in iter_slices(len(points), chunk_size or segment_rows(points, len(heads))):
+        result[rows] = segment_distances(points[rows], heads, tails).argmin(axis=1)
+    return result
+
+
+def component_nearest_segments(co, edges, heads, tails):
+    """Index of the segment nearest to the centroid of each vertex's
+    connected component, so that every loose part gets a single
+    segment."""
+    labels = connected_components(len(co), edges)
+    centroids = group_centroids(co, labels)
+    return nearest_segments(centroids, heads, tails)[labels]
+
+
+def smoothstep(t):
+    t = np.clip(t, 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+
+def lattice_bounds(points_co):
+    """Bounding box of lattice points in lattice space. Axes with a
+    single point span the lattice's unit size instead."""
+    lo = points_co.min(axis=0)
+    hi = points_co.max(axis=0)
+    flat = (hi - lo) < 1e-6
+    lo = np.where(flat, lo - 0.5, lo)
+    hi = np.where(flat, hi + 0.5, hi)
+    return lo, hi
+
+
+def box_weights(co, lo, hi, falloff=0.0):
+    """Weights of points against an axis-aligned box: 1.0 inside,
+    smoothly falling to 0.0 over a margin of `falloff` times the box
+    size outside it, 0.0 beyond."""
+    size = hi - lo
+    outside = np.maximum(lo - co, co - hi) / size
+    distance = np.maximum(outside, 0.0).max(axis=1)
+    if falloff <= 0.0:
+        return (distance <= 0.0).astype(np.float32)
+    return (1.0 - smoothstep(distance / falloff)).astype(np.float32)
+
+
+def falloff_weights(distance, radius, curve='SMOOTH'):
+    """Weights falling from 1.0 at zero distance to 0.0 at radius,
+    shaped like Blender's proportional editing falloff curves."""
+    t = np.clip(distance / max(radius, 1e-12), 0.0, 1.0)
+    u = 1.0 - t
+    if curve == 'SMOOTH':
+        weights = u * u * (3.0 - 2.0 * u)
+    elif curve == 'SPHERE':
+        weights = np.sqrt(1.0 - t * t)
+    elif curve == 'ROOT':
+        weights = np.sqrt(u)
+    elif curve == 'SHARP':
+        weights = u * u
+    elif curve == 'CONSTANT':
+        weights = (t < 1.0).astype(u.dtype)
+    else:
+        weights = u
+    return weights.astype(np.float32)
+
+
+def read_shape_keys(key_blocks):
+    """(K, N, 3) float32 coordinates of every shape key."""
+    count = len(key_blocks[0].data) if len(key_blocks) else 0
+    co = np.empty((len(key_blocks), count * 3), dtype=np.float32)
+    for index, key in enumerate(key_blocks):
+        key.data.foreach_get("co", co[index])
+    return co.reshape(len(key_blocks), count, 3)
+
+
+def shape_key_offsets(co, relative_indices):
+    """(K, N) length of each key's offset from its relative key."""
+    deltas = co - co[relative_indices]
+    return np.sqrt((deltas * deltas).sum(axis=2)), deltas
+
+
+def duplicate_groups(deltas, tolerance):
+    """Lists of indices of the (K, N, 3) deltas that are the same up
+    to tolerance, for groups of more than one."""
+    quantized = np.round(deltas / max(tolerance, 1e-12)).astype(np.int64)
+    groups = {}
+    for index, key_deltas in enumerate(quantized):
+        groups.setdefault(array_hash(key_deltas), []).append(index)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def write_weights(vertex_group, weights, indices=None, decimals=3, mode='REPLACE', remove_zero=True):
+    """Writes per-vertex weights into a vertex group. Weights are
+    rounded, unless decimals is None, so vertices sharing a weight are
+    added with a single call. Vertices with zero weight are removed from
+    the group, or left untouched if remove_zero is False."""
+    weights = np.asarray(weights, dtype=np.float32)
+    if decimals is not None:
+        weights = np.round(weights, decimals)
+    indices = np.arange(len(weights), dtype=np.int32) if indices is None else np.asarray(indices)
+
+    zero = weights <= 0.0
+    if remove_zero and zero.any():
+        remove_from_group(vertex_group, indices[zero])
+
+    indices = indices[~zero]
+    values, inverse = np.unique(weights[~zero], return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    splits = np.cumsum(np.bincount(inverse, minlength=len(values)))[:-1]
+    for value, group in zip(values, np.split(indices[order], splits)):
+        add_to_group(vertex_group, group, float(value), mode)
+
+
+def add_to_group(vertex_group, indices, weight=1.0, mode='REPLACE'):
+    """vertex_group.add() in chunks, so the index lists bpy needs stay
+    within the memory limit."""
+    indices = np.asarray(indices)
+    for rows in iter_slices(len(indices), chunk_rows(PYTHON_INT_SIZE)):
+        vertex_group.add(indices[rows].tolist(), weight, mode)
+
+
+def remove_from_group(vertex_group, indices):
+    indices = np.asarray(indices)
+    for rows in iter_slices(len(indices), chunk_rows(PYTHON_INT_SIZE)):
+        vertex_group.remove(indices[rows].tolist())
@@ -0,0 +1,408 @@
+import bpy
+from mathutils import Vector
+
+from .chunked import ADH_AbstractChunkedOperator
+from .common import PRF_HOOK, BBONE_BASE_SIZE
+from .snapshot import ArmatureSnapshot, ObjectSnapshot, SelectionSnapshot
+
+
+class ADH_CreateHooks(bpy.types.Operator, ADH_AbstractChunkedOperator):
+    """Creates parentless bone for each selected bones (local copy-transformed) or lattice points."""
+    bl_idname = 'armature.adh_create_hooks'
+    bl_label = 'Create Hooks'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    hook_layers: bpy.props.BoolVectorProperty(
+        name="Hook Layers",
+        description="Armature layers where new hooks will be placed",
+        subtype='LAYER',
+        size=32,
+        default=[x == 30 for x in range(0, 32)]
+    )
+
+    bone_hook_mode: bpy.props.EnumProperty(
+        name="Bone Hooks",
+        items=[('CONSTRAINT', "Copy Transforms", "Bones copy their hook's local transform"
+                                                 " with a constraint"),
+               ('PARENT', "Parent", "Bones are parented to their hook, same result without"
+                                    " evaluating a constraint, as long as the bones themselves"
+                                    " stay in rest pose")],
+        default='CONSTRAINT',
+    )
+
+    symmetric: bpy.props.BoolProperty(
+        name="Symmetric",
+        description="Also hook the X-mirror counterparts of selected lattice points or bones,"
+                    " naming both sides alike",
+        default=False,
+    )
+
+    mirror_tolerance: bpy.props.FloatProperty(
+        name="Mirror Tolerance",
+        description="Maximum distance between a point and the mirror of its counterpart",
+        default=0.001,
+        min=0.0,
+        precision=4,
+        subtype='DISTANCE',
+        unit='LENGTH',
+    )
+
+    mirror_link: bpy.props.EnumProperty(
+        name="Link Sides",
+        items=[('NONE', "None", "Hooks on both sides move independently"),
+               ('CONSTRAINTS', "Constraints", "Right side hooks copy the left side's mirrored local"
+                                              " transform with constraints"),
+               ('DRIVERS', "Drivers", "Right side hooks' transform channels are driven by the"
+                                      " left side's, mirrored")],
+        default='NONE',
+    )
+
+    invoked = False
+
+    def setup_copy_constraint(self, armature, bone_name):
+        bone = armature.pose.bones[bone_name]
+        ct_constraint = bone.constraints.new('COPY_TRANSFORMS')
+        ct_constraint.owner_space = 'LOCAL'
+        ct_constraint.target_space = 'LOCAL'
+        ct_constraint.target = armature
+        ct_constraint.subtarget = PRF_HOOK + bone_name
+
+    def setup_mirror_link(self, armature, source_name, target_name):
+        """Makes the target hook follow the source hook's local transform
+        mirrored across the X axis: X location and Y, Z rotation
+        flipped."""
+        source = armature.pose.bones[source_name]
+        target = armature.pose.bones[target_name]
+        target.rotation_mode = source.rotation_mode
+        if self.mirror_link == 'CONSTRAINTS':
+            for constraint_type, inverted in (('COPY_LOCATION', ("invert_x",)),
+                                              ('COPY_ROTATION', ("invert_y", "invert_z")),
+                                              ('COPY_SCALE', ())):
+                constraint = target.constraints.new(constraint_type)
+                constraint.owner_space = 'LOCAL'
+                constraint.target_space = 'LOCAL'
+                constraint.target = armature
+                constraint.subtarget = source_name
+                for attr in inverted:
+                    setattr(constraint, attr, True)
+            return
+
+        rotation = ("rotation_quaternion", (1, 1, -1, -1)) if source.rotation_mode == 'QUATERNION' \
+            else ("rotation_axis_angle", (1, 1, -1, -1)) if source.rotation_mode == 'AXIS_ANGLE' \
+            else ("rotation_euler", (1, -1, -1))
+        for path, signs in (("location", (-1, 1, 1)), rotation, ("scale", (1, 1, 1))):
+            for index, sign in enumerate(signs):
+                driver = target.driver_add(path, index).driver
+                driver.type = 'SCRIPTED'
+                var = driver.variables[0] if len(driver.variables) > 0 else driver.variables.new()
+                var.name = "v"
+                var.type = 'SINGLE_PROP'
+                var.targets[0].id = armature
+                var.targets[0].data_path = 'pose.bones["%s"].%s[%d]' % (source_name, path, index)
+                driver.expression = "v" if sign > 0 else "-v"
+
+    def mirror_pairs(self, names, positions):
+        """(source, target) hook name pairs, the +X side driving."""
+        from . import symmetry
+
+        by_name = dict(zip(names, positions))
+        pairs = []
+        for name, co in zip(names, positions):
+            mirrored = symmetry.mirror_name(name)
+            if co[0] > self.mirror_tolerance and mirrored != name and mirrored in by_name:
+                pairs.append((name, mirrored))
+        return pairs
+
+    def lattice_hook_names(self, lattice, co, indices, mirror):
+        """Hook names of the lattice points, numbered per point or, when
+        mirrored, per pair of points so both sides share a number."""
+        names = []
+        numbers = {}
+        for order, index in enumerate(indices):
+            x = co[index][0]
+            suffix = ".R" if x < -self.mirror_tolerance else ".L" if x > self.mirror_tolerance else ""
+            if mirror is None:
+                number = order
+            else:
+                pair_key = min(index, mirror[index]) if mirror[index] >= 0 else index
+                number = numbers.setdefault(pair_key, len(numbers))
+            names.append("%s%s.%d%s" % (PRF_HOOK, lattice.name, number, suffix))
+        return names
+
+    def hook_on_lattice(self, context, lattice, armature):
+        objects = context.view_layer.objects
+
+        import numpy as np
+        from . import executor, geometry, symmetry
+
+        prev_lattice_mode = lattice.mode
+        bpy.ops.object.mode_set(mode='OBJECT')  # Needed for matrix calculation
+
+        # Lattice points to armature space, and their mirror counterparts,
+        # on a worker thread
+        points = lattice.data.points
+        co = geometry.read_vectors(points, "co")
+        selected = geometry.read_flags(points, "select")
+        matrix = np.array(armature.matrix_world.inverted() @ lattice.matrix_world)
+        co = yield executor.submit(geometry.transform_points, co, matrix)
+        indices = np.flatnonzero(selected)
+        mirror = None
+        if self.symmetric:
+            mirror = yield executor.submit(symmetry.mirror_points, co, self.mirror_tolerance)
+            counterparts = mirror[indices]
+            indices = np.union1d(indices, counterparts[counterparts >= 0])
+            unpaired = int((counterparts < 0).sum())
+            if unpaired:
+                self.report({'WARNING'}, "%d selected points have no mirror counterpart" % unpaired)
+        indices = indices.tolist()
+        bone_pos = [Vector(co[index]) for index in indices]
+        bone_names = self.lattice_hook_names(lattice, co, indices, mirror)
+
+        objects.active = armature
+        prev_mode = armature.mode
+        bpy.ops.object.mode_set(mode='EDIT')
+        for index, point_co in enumerate(bone_pos):
+            bone_name = bone_names[index]
+            bone = armature.data.edit_bones.new(bone_name)
+            bone.head = point_co
+            bone.tail = point_co + Vector([0, 0, BBONE_BASE_SIZE * 5])
+            bone.bbone_x = BBONE_BASE_SIZE
+            bone.bbone_z = BBONE_BASE_SIZE
+            bone.layers = self.hook_layers
+            bone.use_deform = False
+            bone_names[index] = bone.name  # in case of a name clash
+        armature.data.layers = list(
+            map(any, zip(armature.data.layers, self.hook_layers)))
+        if self.symmetric and self.mirror_link != 'NONE':
+            bpy.ops.object.mode_set(mode='POSE')
+            for source_name, target_name in self.mirror_pairs(bone_names, bone_pos):
+                self.setup_mirror_link(armature, source_name, target_name)
+        bpy.ops.object.mode_set(mode=prev_mode)
+
+        objects.active = lattice
+        bpy.ops.object.mode_set(mode='EDIT')
+        all_points = lattice.data.points  # previous one lost after toggling
+        for point in all_points:
+            point.select = False
+        for order, index in enumerate(indices):
+            point = all_points[index]
+            bone_name = bone_names[order]
+            mod = lattice.modifiers.new(bone_name, 'HOOK')
+            mod.object = armature
+            mod.subtarget = bone_name
+            point.select = True
+            bpy.ops.object.hook_assign(modifier=mod.name)
+            bpy.ops.object.hook_reset(modifier=mod.name)
+            point.select = False
+            yield (order + 1) / len(indices)
+        for index in indices:
+            all_points[index].select = True
+        bpy.ops.object.mode_set(mode=prev_lattice_mode)
+
+    def mirrored_bones(self, armature, bones):
+        """Bones mirroring the given ones across armature X, matched by
+        head and tail positions."""
+        from . import geometry, symmetry
+
+        edit_bones = armature.data.edit_bones
+        heads = geometry.read_vectors(edit_bones, "head")
+        tails = geometry.read_vectors(edit_bones, "tail")
+        mirror = symmetry.mirror_points(heads, self.mirror_tolerance)
+        result = []
+        for bone in bones:
+            index = edit_bones.find(bone.name)
+            counterpart = mirror[index]
+            if counterpart < 0 or counterpart == index:
+                continue
+            mirrored_tail = tails[index].copy()
+            mirrored_tail[0] *= -1
+            if abs(tails[counterpart] - mirrored_tail).max() <= self.mirror_tolerance:
+                result.append(edit_bones[counterpart])
+        return result
+
+    def hook_on_bone(self, context, armature):
+        prev_mode = armature.mode
+        bpy.ops.object.mode_set(mode='EDIT')
+        bones = list(context.selected_bones)
+        if self.symmetric:
+            for bone in self.mirrored_bones(armature, bones):
+                if bone not in bones:
+                    bones.append(bone)
+        bone_names = [bone.name for bone in bones]
+        hook_names = []
+        hook_pos = []
+        for bone in bones:
+            hook_name = PRF_HOOK + bone.name
+            hook = armature.data.edit_bones.new(hook_name)
+            hook.head = bone.head
+            hook.tail = bone.tail
+            hook.bbone_x = bone.bbone_x * 2
+            hook.bbone_z = bone.bbone_z * 2
+            hook.layers = self.hook_layers
+            hook.use_deform = False
+            hook.roll = bone.roll
+            hook.parent = bone.parent
+            hook_names.append(hook.name)
+            hook_pos.append(hook.head.copy())
+            if self.bone_hook_mode == 'PARENT':
+                bone.use_connect = False
+                bone.parent = hook
+        bpy.ops.object.mode_set(mode='POSE')
+        if self.symmetric and self.mirror_link != 'NONE':
+            for source_name, target_name in self.mirror_pairs(hook_names, hook_pos):
+                self.setup_mirror_link(armature, source_name, target_name)
+        if self.bone_hook_mode == 'CONSTRAINT':
+            for index, bone_name in enumerate(bone_names):
+                self.setup_copy_constraint(armature, bone_name)
+                yield (index + 1) / len(bone_names)
+        bpy.ops.object.mode_set(mode=prev_mode)
+        yield 1.0
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and \
+               context.active_object.type in ['ARMATURE', 'LATTICE']
+
+    def draw(self, context):
+        layout = self.layout
+
+        if self.invoked:
+            return
+
+        layout.prop(self, "bone_hook_mode")
+        layout.prop(self, "symmetric")
+        col = layout.column()
+        col.active = self.symmetric
+        col.prop(self, "mirror_tolerance")
+        col.prop(self, "mirror_link")
+        row = layout.row(align=True)
+        row.prop(self, "hook_layers")
+
+    def get_target_armature(self, context):
+        lattice = context.active_object
+        selected = [obj for obj in context.selected_objects if obj != lattice]
+        return selected[0] if selected else None
+
+    def execute(self, context):
+        if context.active_object.type == 'LATTICE' and self.get_target_armature(context) is None:
+            return {'CANCELLED'}
+        return ADH_AbstractChunkedOperator.execute(self, context)
+
+    def invoke(self, context, event):
+        if context.active_object.type == 'LATTICE' and self.get_target_armature(context) is None:
+            return {'CANCELLED'}
+        return ADH_AbstractChunkedOperator.invoke(self, context, event)
+
+    def run(self, context):
+        obj1 = context.active_object
+        self.snapshot(SelectionSnapshot, context)
+        if obj1.type == 'LATTICE':
+            armature = self.get_target_armature(context)
+            self.snapshot(ArmatureSnapshot, armature)
+            self.snapshot(ObjectSnapshot, obj1)
+            return self.hook_on_lattice(context, obj1, armature)
+        else:
+            self.snapshot(ArmatureSnapshot, obj1)
+            return self.hook_on_bone(context, obj1)
+
+    # def invoke(self, context, event):
+    #     retval = context.window_manager.invoke_props_dialog(self)
+    #     self.invoked = True
+    #     return retval
+
+
+class ADH_ParentBonesToHooks(bpy.types.Operator):
+    """Replaces the Copy Transforms constraints made by Create Hooks on bones with parenting to their hooks, which gives the same pose without evaluating a constraint per bone."""
+    bl_idname = 'armature.adh_parent_bones_to_hooks'
+    bl_label = 'Parent Bones to Hooks'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    scope: bpy.props.EnumProperty(
+        name="Scope",
+        items=[('SELECTED', "Selected Bones", "Convert selected bones"),
+               ('ALL', "Whole Armature", "Convert every hooked bone in the armature")],
+        default='ALL',
+    )
+
+    benchmark: bpy.props.BoolProperty(
+        name="Benchmark",
+        description="Measure playback speed before and after converting.",
+        default=False,
+    )
+
+    benchmark_frames: bpy.props.IntProperty(
+        name="Frames",
+        description="Number of frames evaluated for each measurement.",
+        default=100,
+        min=1,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None \
+               and context.active_object.type == 'ARMATURE' \
+               and context.mode in {'POSE', 'OBJECT'}
+
+    def draw(self, context):
+        layout = self.layout
+
+        layout.prop(self, "scope")
+        row = layout.row(align=True)
+        row.prop(self, "benchmark", toggle=True)
+        sub = row.row(align=True)
+        sub.active = self.benchmark
+        sub.prop(self, "benchmark_frames")
+
+    @staticmethod
+    def is_hook_constraint(armature, bone, constraint):
+        """Whether the constraint is equivalent to parenting the bone to
+        its hook: full local copy, hook at the bone's rest position and
+        sharing its parent."""
+        hook = armature.data.bones.get(PRF_HOOK + bone.name)
+        rest = bone.bone
+        return constraint.type == 'COPY_TRANSFORMS' \
+               and constraint.target == armature \
+               and hook is not None and constraint.subtarget == hook.name \
+               and constraint.owner_space == 'LOCAL' and constraint.target_space == 'LOCAL' \
+               and constraint.influence == 1.0 and not constraint.mute \
+               and getattr(constraint, "mix_mode", 'REPLACE') == 'REPLACE' \
+               and hook.parent == rest.parent \
+               and abs(hook.length - rest.length) < 1e-5 \
+               and all(abs(a - b) < 1e-5 for hook_row, rest_row in zip(hook.matrix_local, rest.matrix_local)
+                       for a, b in zip(hook_row, rest_row))
+
+    def execute(self, context):
+        from .instrumentation import playback_fps
+
+        armature = context.active_object
+        pose_bones = armature.pose.bones if self.scope == 'ALL' else context.selected_pose_bones or []
+        hooked = {}
+        for bone in pose_bones:
+            if len(bone.constraints) == 1 and self.is_hook_constraint(armature, bone, bone.constraints[0]):
+                hooked[bone.name] = bone.constraints[0].name
+        if not hooked:
+            self.report({'INFO'}, "No bone constrained to its hook")
+            return {'CANCELLED'}
+
+        fps_before = playback_fps(context.scene, self.benchmark_frames) if self.benchmark else None
+
+        for bone_name, constraint_name in hooked.items():
+            bone = armature.pose.bones[bone_name]
+            bone.constraints.remove(bone.constraints[constraint_name])
+        prev_mode = armature.mode
+        bpy.ops.object.mode_set(mode='EDIT')
+        edit_bones = armature.data.edit_bones
+        for bone_name in hooked:
+            bone = edit_bones[bone_name]
+            bone.use_connect = False
+            bone.parent = edit_bones[PRF_HOOK + bone_name]
+        bpy.ops.object.mode_set(mode=prev_mode)
+
+        if self.benchmark:
+            fps_after = playback_fps(context.scene, self.benchmark_frames)
+            self.report({'INFO'}, "Parented %d bones to hooks, playback %.1f fps -> %.1f fps"
+                        % (len(hooked), fps_before, fps_after))
+        else:
+            self.report({'INFO'}, "Parented %d bones to hooks" % len(hooked))
+
+        return {'FINISHED'}
@@ -0,0 +1,305 @@
+"""Opt-in timing of the add-on's operators.
+
+Switched on by the Profile Operators add-on preference, or by setting
+$ADH_RIGGING_TOOLS_PROFILE to "1", or to the path of the log file to
+write. Each call to an operator's execute, or from invoke to the end of
+its modal run, is recorded with its wall time, the bpy.ops calls and
+mode switches it made and how much data was selected. The recent
+records are summarized in a sidebar panel, and every record is appended
+to a JSON-lines log.
+
+bpy.ops calls are counted by patching the operator caller class the
+first time a measurement starts, so nothing changes for the rest of
+Blender until profiling is used.
+
+Other modules can follow operator runs through the same wrappers by
+adding an observer, with is_active(context), start(operator, context,
+measurement) and finish(operator, measurement, result) methods."""
+
+import functools
+import json
+import os
+import time
+from collections import Counter, deque
+
+import bpy
+
+from .prefs import PROFILE_ENV, get_preferences
+
+LOG_FILENAME = "adh_rigging_tools_profile.jsonl"
+HISTORY_SIZE = 50
+MODE_OPERATORS = {"object.mode_set", "object.editmode_toggle", "object.posemode_toggle"}
+
+history = deque(maxlen=HISTORY_SIZE)
+_active = []  # measurements in progress, innermost last
+_modal = {}  # operator pointer: measurement of a running modal operator
+_ops_call = None  # (caller class, original __call__)
+observers = []
+last_error = None  # why the log couldn't be written, shown in the panel
+
+
+class Measurement:
+    def __init__(self, operator, context, phase):
+        self.operator = operator.bl_idname
+        self.key = operator.as_pointer()
+        self.phase = phase
+        self.profile = is_enabled(context)
+        self.observers = [observer for observer in observers if observer.is_active(context)]
+        self.start = time.perf_counter()
+        self.ops = Counter()
+        objects = getattr(context, "selected_objects", None) or []
+        bones = getattr(context, "selected_pose_bones", None) \
+                or getattr(context, "selected_editable_bones", None) or []
+        self.objects = len(objects)
+        self.bones = len(bones)
+        self.vertices = sum(len(obj.data.vertices) for obj in objects if obj.type == 'MESH')
+        for observer in self.observers:
+            observer.start(operator, context, self)
+
+    def record(self, operator, result):
+        for observer in self.observers:
+            observer.finish(operator, self, result)
+        if not self.profile:
+            return
+        ops_calls = sum(self.ops.values())
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "operator": self.operator,
+            "phase": self.phase,
+            "result": sorted(result) if isinstance(result, set) else result,
+            "wall_time": time.perf_counter() - self.start,
+            "ops_calls": ops_calls,
+            "mode_switches": sum(self.ops[idname] for idname in MODE_OPERATORS),
+            "ops": dict(self.ops.most_common()),
+            "objects": self.objects,
+            "bones": self.bones,
+            "vertices": self.vertices,
+            "blender": bpy.app.version_string,
+            "file": bpy.data.filepath,
+        }
+        history.append(entry)
+        write_log(entry)
+
+
+def is_enabled(context=None):
+    if os.environ.get(PROFILE_ENV):
+        return True
+    prefs = get_preferences(context)
+    return prefs is not None and prefs.profiling
+
+
+def is_tracked(context):
+    return is_enabled(context) or any(observer.is_active(context) for observer in observers)
+
+
+def log_path():
+    env_value = os.environ.get(PROFILE_ENV, "")
+    if env_value and env_value != "1":
+        return env_value
+    prefs = get_preferences()
+    if prefs is not None and prefs.log_path:
+        return bpy.path.abspath(prefs.log_path)
+    return os.path.join(bpy.utils.user_resource('CONFIG', create=True), LOG_FILENAME)
+
+
+def write_log(entry):
+    global last_error
+    path = log_path()
+    try:
+        with open(path, "a") as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+        last_error = None
+    except OSError as error:
+        last_error = "Can't write the log: %s" % (error.strerror or error)
+
+
+def patch_ops():
+    global _ops_call
+    if _ops_call is not None:
+        return
+    caller_class = type(bpy.ops.object.mode_set)
+    original_call = caller_class.__call__
+
+    def counting_call(op, *args, **kwargs):
+        if _active:
+            idname = op.idname_py()
+            for measurement in _active:
+                measurement.ops[idname] += 1
+        return original_call(op, *args, **kwargs)
+
+    caller_class.__call__ = counting_call
+    _ops_call = (caller_class, original_call)
+
+
+def unpatch_ops():
+    global _ops_call
+    if _ops_call is not None:
+        caller_class, original_call = _ops_call
+        caller_class.__call__ = original_call
+        _ops_call = None
+
+
+def is_measured(operator):
+    """Whether a measurement of this very operator is in progress, as
+    when its invoke() calls its execute(): the run is recorded once."""
+    key = operator.as_pointer()
+    return any(measurement.key == key for measurement in _active)
+
+
+def measure(operator, measurement, call):
+    """Runs call() as part of the measurement, recording it unless a
+    modal run has started or continues."""
+    patch_ops()
+    _active.append(measurement)
+    result = {'CANCELLED'}
+    try:
+        result = call()
+    except Exception:
+        result = "ERROR"
+        raise
+    finally:
+        _active.remove(measurement)
+        key = operator.as_pointer()
+        running = isinstance(result, set) and \
+                  ('RUNNING_MODAL' in result or 'PASS_THROUGH' in result and key in _modal)
+        if running:
+            _modal[key] = measurement
+        else:
+            _modal.pop(key, None)
+            measurement.record(operator, result)
+    return result
+
+
+# Blender checks the argument count of registered methods, so each
+# wrapper keeps the signature of what it wraps.
+
+def wrap_execute(func):
+    @functools.wraps(func)
+    def execute(self, context):
+        if not is_tracked(context) or is_measured(self):
+            return func(self, context)
+        return measure(self, Measurement(self, context, "execute"), lambda: func(self, context))
+    return execute
+
+
+def wrap_invoke(func):
+    @functools.wraps(func)
+    def invoke(self, context, event):
+        if not is_tracked(context) or is_measured(self):
+            return func(self, context, event)
+        return measure(self, Measurement(self, context, "invoke"), lambda: func(self, context, event))
+    return invoke
+
+
+def wrap_modal(func):
+    @functools.wraps(func)
+    def modal(self, context, event):
+        measurement = _modal.get(self.as_pointer())
+        if measurement is None:
+            return func(self, context, event)
+        return measure(self, measurement, lambda: func(self, context, event))
+    return modal
+
+
+WRAPPERS = (("execute", wrap_execute), ("invoke", wrap_invoke), ("modal", wrap_modal))
+
+
+def instrument(classes):
+    """Wraps the operator methods of classes, before registration."""
+    for cls in classes:
+        if not issubclass(cls, bpy.types.Operator):
+            continue
+        for name, wrapper in WRAPPERS:
+            func = getattr(cls, name, None)
+            if func is not None and not getattr(func, "adh_instrumented", False):
+                wrapped = wrapper(func)
+                wrapped.adh_instrumented = True
+                setattr(cls, name, wrapped)
+
+
+def playback_fps(scene, frame_count=100):
+    """Frames per second of evaluating the scene frame after frame over
+    its frame range, as in playback without the drawing."""
+    start_frame = scene.frame_current
+    frame_range = scene.frame_end - scene.frame_start + 1
+    start = time.perf_counter()
+    for index in range(frame_count):
+        scene.frame_set(scene.frame_start + index % frame_range)
+    elapsed = time.perf_counter() - start
+    scene.frame_set(start_frame)
+    return frame_count / max(elapsed, 1e-9)
+
+
+def summarize():
+    """[(operator, calls, last, mean, max wall time, mean bpy.ops calls)]
+    over the recent records, most recently used first."""
+    by_operator = {}
+    for entry in reversed(history):
+        by_operator.setdefault(entry["operator"], []).append(entry)
+    summary = []
+    for operator, entries in by_operator.items():
+        times = [entry["wall_time"] for entry in entries]
+        summary.append((operator, len(entries), times[0], sum(times) / len(times), max(times),
+                        sum(entry["ops_calls"] for entry in entries) / len(entries)))
+    return summary
+
+
+class ADH_ClearProfile(bpy.types.Operator):
+    """Clears the recent operator timings shown in the panel. The log file is kept."""
+    bl_idname = 'wm.adh_clear_profile'
+    bl_label = 'Clear Operator Timings'
+
+    def execute(self, context):
+        history.clear()
+        return {'FINISHED'}
+
+
+class ADH_PT_Profile(bpy.types.Panel):
+    bl_idname = 'VIEW3D_PT_adh_profile'
+    bl_label = "Operator Timings"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "ADH Rigging Tools"
+
+    @classmethod
+    def poll(cls, context):
+        return is_enabled(context)
+
+    def draw(self, context):
+        layout = self.layout
+
+        summary = summarize()
+        if not summary:
+            layout.label(text="No operator run yet")
+        for operator, calls, last, mean, longest, ops_calls in summary:
+            box = layout.box()
+            box.label(text="%s (%d)" % (operator, calls))
+            col = box.column(align=True)
+            col.label(text="Last %.0f ms, mean %.0f ms, max %.0f ms"
+                           % (last * 1000, mean * 1000, longest * 1000))
+            col.label(text="%.1f bpy.ops calls per run" % ops_calls)
+        layout.operator(ADH_ClearProfile.bl_idname, text="Clear")
+        layout.label(text="Log: " + log_path())
+        if last_error:
+            layout.label(text=last_error, icon='ERROR')
+
+
+classes = (
+    ADH_ClearProfile,
+    ADH_PT_Profile,
+)
+
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+
+
+def unregister():
+    from bpy.utils import unregister_class
+    for cls in reversed(classes):
+        unregister_class(cls)
+    unpatch_ops()
+    _active.clear()
+    _modal.clear()
@@ -0,0 +1,372 @@
+import os
+
+import bpy
+from mathutils import Matrix
+
+from .chunked import ADH_AbstractChunkedOperator
+from .common import PRF_LATTICE
+from .snapshot import ObjectSnapshot
+
+
+def fill_lattice_vertex_group(obj, lattice, vg, falloff=0.0):
+    """Weights the vertex group by each vertex's position relative to
+    the lattice's bounds, leaving out vertices it can't affect."""
+    from . import geometry
+
+    lo, hi = geometry.lattice_bounds(geometry.read_coordinates(lattice.data.points))
+    matrix = lattice.matrix_world.inverted() @ obj.matrix_world
+    co = geometry.transform_points(geometry.read_coordinates(obj.data.vertices), matrix)
+    weights = geometry.box_weights(co, lo, hi, falloff)
+    geometry.write_weights(vg, weights)
+
+
+def bind_to_lattice(obj, lattice, create_vertex_group=False, falloff=0.0):
+    """Adds (or renames) obj's LATTICE modifier using the lattice,
+    optionally limited to a vertex group named after the lattice."""
+    lm_possibles = [m for m in obj.modifiers if
+                    m.type == 'LATTICE' and m.object == lattice]
+    if lm_possibles:
+        lm = lm_possibles[0]
+        lm.name = lattice.name
+    else:
+        lm = obj.modifiers.new(lattice.name, 'LATTICE')
+        lm.object = lattice
+
+    lm.show_expanded = False
+    if create_vertex_group:
+        vg = obj.vertex_groups.get(lattice.name, None)
+        if not vg:
+            vg = obj.vertex_groups.new(name=lattice.name)
+        lm.vertex_group = vg.name
+        fill_lattice_vertex_group(obj, lattice, vg, falloff)
+
+    return lm
+
+
+class ADH_BindToLattice(bpy.types.Operator):
+    """Bind selected objects to active lattice."""
+    bl_idname = 'lattice.adh_bind_to_objects'
+    bl_label = 'Bind Lattice to Objects'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    create_vertex_group: bpy.props.BoolProperty(
+        name="Create Vertex Group",
+        description="Create limiting vertex group using the lattice object's name.",
+        default=False
+    )
+
+    falloff: bpy.props.FloatProperty(
+        name="Falloff Margin",
+        description="Margin outside the lattice, relative to its size, over which vertex group weights fall to zero.",
+        default=0.0,
+        min=0.0,
+        soft_max=1.0,
+        subtype='FACTOR',
+    )
+
+    def draw(self, context):
+        layout = self.layout
+
+        layout.prop(self, "create_vertex_group")
+        row = layout.row()
+        row.active = self.create_vertex_group
+        row.prop(self, "falloff")
+
+    @classmethod
+    def poll(self, context):
+        obj = context.active_object
+        return obj and obj.type == 'LATTICE' and context.selected_objects
+
+    def execute(self, context):
+        lattice = context.active_object
+        objects = [o for o in context.selected_objects if o.type == 'MESH']
+
+        for obj in objects:
+            bind_to_lattice(obj, lattice, self.create_vertex_group, self.falloff)
+
+        return {'FINISHED'}
+
+
+class ADH_CreateFittedLattice(bpy.types.Operator):
+    """Creates lattice enclosing selected meshes, or selected vertices in edit mode, and binds them to it."""
+    bl_idname = 'object.adh_create_fitted_lattice'
+    bl_label = 'Create Fitted Lattice'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    per_object: bpy.props.BoolProperty(
+        name="One per Object",
+        description="Create a separate lattice for each selected mesh.",
+        default=False
+    )
+
+    oriented: bpy.props.BoolProperty(
+        name="Oriented",
+        description="Align lattice to the points' principal axes instead of world axes.",
+        default=False
+    )
+
+    density: bpy.props.FloatProperty(
+        name="Density",
+        description="Lattice points per unit length along each axis.",
+        default=2.0,
+        min=0.0,
+        soft_max=20.0,
+    )
+
+    max_resolution: bpy.props.IntProperty(
+        name="Max Resolution",
+        description="Maximum number of lattice points along each axis.",
+        default=8,
+        min=2,
+        max=64,
+    )
+
+    margin: bpy.props.FloatProperty(
+        name="Margin",
+        description="Padding around the enclosed points, relative to the lattice's size.",
+        default=0.05,
+        min=0.0,
+        soft_max=0.5,
+        subtype='FACTOR',
+    )
+
+    create_vertex_group: bpy.props.BoolProperty(
+        name="Create Vertex Group",
+        description="Create limiting vertex group using the lattice object's name.",
+        default=False
+    )
+
+    falloff: bpy.props.FloatProperty(
+        name="Falloff Margin",
+        description="Margin outside the lattice, relative to its size, over which vertex group weights fall to zero.",
+        default=0.0,
+        min=0.0,
+        soft_max=1.0,
+        subtype='FACTOR',
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return any(o.type == 'MESH' for o in context.selected_objects)
+
+    def get_world_points(self, obj, only_selected):
+        from . import geometry
+
+        co = geometry.read_coordinates(obj.data.vertices)
+        if only_selected:
+            selection = geometry.read_flags(obj.data.vertices, "select")
+            co = co[selection]
+        return geometry.transform_points(co, obj.matrix_world)
+
+    def create_lattice(self, context, name, point_sets):
+        from . import geometry
+
+        matrix, resolution = geometry.fit_lattice(point_sets, self.oriented, self.margin,
+                                                  self.density, self.max_resolution)
+        lattice_data = bpy.data.lattices.new(name)
+        lattice_data.points_u, lattice_data.points_v, lattice_data.points_w = resolution
+
+        lattice = bpy.data.objects.new(name, lattice_data)
+        lattice.matrix_world = Matrix(matrix.tolist())
+        context.collection.objects.link(lattice)
+
+        return lattice
+
+    def execute(self, context):
+        only_selected = context.mode == 'EDIT_MESH'
+        objects = list(context.objects_in_mode) if only_selected \
+            else [o for o in context.selected_objects if o.type == 'MESH']
+        if only_selected:
+            bpy.ops.object.mode_set(mode='OBJECT')  # Flush edit mode selection
+
+        point_sets = [self.get_world_points(obj, only_selected) for obj in objects]
+        groups = [([obj], [points]) for obj, points in zip(objects, point_sets)] \
+            if self.per_object else [(objects, point_sets)]
+        groups = [(group_objects, group_points) for group_objects, group_points in groups
+                  if sum(len(points) for points in group_points)]
+        if not groups:
+            return {'CANCELLED'}
+
+        lattices = []
+        for group_objects, group_points in groups:
+            lattice = self.create_lattice(context, PRF_LATTICE + group_objects[0].name, group_points)
+            for obj in group_objects:
+                bind_to_lattice(obj, lattice, self.create_vertex_group, self.falloff)
+            lattices.append(lattice)
+
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        for lattice in lattices:
+            lattice.select_set(True)
+        context.view_layer.objects.active = lattices[-1]
+
+        return {'FINISHED'}
+
+
+class ADH_ApplyLattices(bpy.types.Operator, ADH_AbstractChunkedOperator):
+    """Applies all lattice modifiers, deletes all shapekeys. Used for lattice-initialized shapekey creation."""
+    bl_idname = 'mesh.adh_apply_lattices'
+    bl_label = 'Apply Lattices'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' \
+               and context.selected_objects != [] \
+               and context.active_object.type == 'MESH'
+
+    def run(self, context):
+        obj = context.active_object
+        shape_key_count = len(obj.data.shape_keys.key_blocks) if obj.data.shape_keys else 0
+        lattice_mods = [m.name for m in obj.modifiers if m.type == 'LATTICE']
+        step_count = shape_key_count + len(lattice_mods)
+        self.snapshot(ObjectSnapshot, obj, data=True)
+        for i in range(shape_key_count, 0, -1):
+            obj.active_shape_key_index = i - 1
+            bpy.ops.object.shape_key_remove()
+            yield (shape_key_count - i + 1) / step_count
+        for index, name in enumerate(lattice_mods):
+            bpy.ops.object.modifier_apply(modifier=name)
+            yield (shape_key_count + index + 1) / step_count
+
+
+def move_modifier(context, obj, name, index=0):
+    """Moves the modifier up the stack to the given index."""
+    if hasattr(context, "temp_override"):
+        with context.temp_override(object=obj):
+            bpy.ops.object.modifier_move_to_index(modifier=name, index=index)
+    else:
+        override = {"object": obj}
+        while obj.modifiers.find(name) > index:
+            bpy.ops.object.modifier_move_up(override, modifier=name)
+
+
+class ADH_BakeLatticeCache(bpy.types.Operator, ADH_AbstractChunkedOperator):
+    """Bakes the lattice deformation of selected meshes over a frame range to point cache files, optionally replacing the modifiers baked with a Mesh Cache modifier reading them."""
+    bl_idname = 'object.adh_bake_lattice_cache'
+    bl_label = 'Bake Lattice Deformation'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    directory: bpy.props.StringProperty(
+        name="Directory",
+        description="Where cache files are written, one .npy and one .pc2 or .mdd per object",
+        default="//cache/",
+        subtype='DIR_PATH',
+    )
+
+    cache_format: bpy.props.EnumProperty(
+        name="Format",
+        items=[('PC2', "PC2", "Point Cache 2, little-endian"),
+               ('MDD', "MDD", "Lightwave MDD, big-endian")],
+        default='PC2',
+    )
+
+    use_scene_range: bpy.props.BoolProperty(
+        name="Scene Frame Range",
+        description="Bake the scene's frame range.",
+        default=True,
+    )
+
+    frame_start: bpy.props.IntProperty(name="Start", default=1)
+    frame_end: bpy.props.IntProperty(name="End", default=250)
+
+    swap_modifiers: bpy.props.BoolProperty(
+        name="Use Cache",
+        description="Disable the baked modifiers and read the cache with a Mesh Cache modifier instead.",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' \
+               and any(o.type == 'MESH' for o in context.selected_objects)
+
+    def draw(self, context):
+        layout = self.layout
+
+        layout.prop(self, "directory")
+        layout.prop(self, "cache_format")
+        layout.prop(self, "use_scene_range")
+        row = layout.row(align=True)
+        row.active = not self.use_scene_range
+        row.prop(self, "frame_start")
+        row.prop(self, "frame_end")
+        layout.prop(self, "swap_modifiers")
+
+    @staticmethod
+    def baked_modifiers(obj):
+        """Modifiers up to the last enabled lattice modifier, or None."""
+        lattice_indices = [index for index, m in enumerate(obj.modifiers)
+                           if m.type == 'LATTICE' and m.show_viewport]
+        return list(obj.modifiers)[:lattice_indices[-1] + 1] if lattice_indices else None
+
+    def swap_in_cache(self, context, obj, modifiers, writer, frame_start):
+        for m in modifiers:
+            m.show_viewport = m.show_render = False
+        cache_mod = obj.modifiers.new("Lattice Cache", 'MESH_CACHE')
+        cache_mod.cache_format = self.cache_format
+        cache_mod.filepath = bpy.path.relpath(writer.cache_path) if bpy.data.filepath else writer.cache_path
+        cache_mod.time_mode = 'FRAME'
+        cache_mod.play_mode = 'SCENE'
+        cache_mod.frame_start = frame_start
+        move_modifier(context, obj, cache_mod.name)
+
+    def run(self, context):
+        from . import geometry
+        from .point_cache import PointCacheWriter
+
+        scene = context.scene
+        frame_start, frame_end = (scene.frame_start, scene.frame_end) if self.use_scene_range \
+            else (self.frame_start, self.frame_end)
+        frame_count = frame_end - frame_start + 1
+        if frame_count < 1:
+            self.report({'ERROR'}, "Empty frame range, %d to %d" % (frame_start, frame_end))
+            return {'CANCELLED'}
+        targets = [(obj, self.baked_modifiers(obj)) for obj in context.selected_objects
+                   if obj.type == 'MESH' and self.baked_modifiers(obj)]
+        if not targets:
+            self.report({'ERROR'}, "No selected mesh with a lattice modifier")
+            return {'CANCELLED'}
+
+        # Modifiers after the baked ones stay out of the evaluation.
+        hidden = [m for obj, modifiers in targets for m in obj.modifiers[len(modifiers):]
+                  if m.show_viewport]
+        directory = bpy.path.abspath(self.directory)
+        fps = scene.render.fps / scene.render.fps_base
+        writers = []
+        prev_frame = scene.frame_current
+        try:
+            for m in hidden:
+                m.show_viewport = False
+            for obj, _ in targets:
+                writers.append(PointCacheWriter(
+                    os.path.join(directory, bpy.path.clean_name(obj.name)), len(obj.data.vertices),
+                    frame_start, frame_count, self.cache_format, fps))
+
+            for frame_index in range(frame_count):
+                scene.frame_set(frame_start + frame_index)
+                depsgraph = context.evaluated_depsgraph_get()
+                for (obj, _), writer in zip(targets, writers):
+                    obj_eval = obj.evaluated_get(depsgraph)
+                    mesh = obj_eval.to_mesh()
+                    try:
+                        if len(mesh.vertices) != writer.point_count:
+                            self.report({'ERROR'}, "%s: modifiers before the lattice change the vertex count"
+                                        % obj.name)
+                            return {'CANCELLED'}
+                        writer.write(frame_index, geometry.read_coordinates(mesh.vertices))
+                    finally:
+                        obj_eval.to_mesh_clear()
+                yield (frame_index + 1) / frame_count
+        finally:
+            for writer in writers:
+                writer.close()
+            for m in hidden:
+                m.show_viewport = True
+            scene.frame_set(prev_frame)
+
+        if self.swap_modifiers:
+            for (obj, modifiers), writer in zip(targets, writers):
+                self.swap_in_cache(context, obj, modifiers, writer, frame_start)
+        self.report({'INFO'}, "Baked %d objects over %d frames to %s"
+                    % (len(targets), frame_count, directory))
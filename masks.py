@@ -0,0 +1,233 @@
+import bpy
+
+
+class ADH_AbstractMaskOperator:
+    MASK_NAME = 'Z_ADH_MASK'
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None \
+               and context.active_object.type == 'MESH'
+
+    orig_vg = None
+
+    def save_vg(self, context):
+        self.orig_vg = context.object.vertex_groups.active
+
+    def restore_vg(self, context):
+        if self.orig_vg:
+            context.object.vertex_groups.active_index = self.orig_vg.index
+
+    def get_mask_vg(self, mesh):
+        vg = mesh.vertex_groups.get(self.MASK_NAME)
+        if not vg:
+            vg = mesh.vertex_groups.new(name=self.MASK_NAME)
+        return vg
+
+    def read_mask(self, mesh):
+        """Boolean array of vertices currently in the mask."""
+        import numpy as np
+        from . import geometry
+
+        vg = mesh.vertex_groups.get(self.MASK_NAME)
+        if not vg:
+            return np.zeros(len(mesh.data.vertices), dtype=bool)
+        return geometry.read_group_max(mesh.data, [vg.index]) > 0
+
+    def write_mask(self, context, mask):
+        """Replaces mask vertex group with the boolean array. Can't be
+        used in edit mode."""
+        from . import geometry
+
+        mesh = context.active_object
+        vg = self.get_mask_vg(mesh)
+        geometry.write_weights(vg, mask)
+        self.setup_mask_modifier(context)
+
+    def setup_mask_modifier(self, context):
+        mesh = context.active_object
+        mm = mesh.modifiers.get(self.MASK_NAME)
+        if not mm or mm.type != 'MASK':
+            mm = mesh.modifiers.new(self.MASK_NAME, 'MASK')
+        mm.show_render = False
+        mm.show_expanded = False
+        mm.vertex_group = self.MASK_NAME
+
+
+class ADH_DeleteMask(bpy.types.Operator, ADH_AbstractMaskOperator):
+    """Delete mask and its vertex group."""
+    bl_idname = 'mesh.adh_delete_mask'
+    bl_label = 'Delete Mask'
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        mesh = context.active_object
+
+        mm = mesh.modifiers.get(self.MASK_NAME)
+        if mm and mm.type == 'MASK':
+            mesh.modifiers.remove(mm)
+
+        vg = mesh.vertex_groups.get(self.MASK_NAME)
+        if vg:
+            mesh.vertex_groups.remove(vg)
+
+        return {'FINISHED'}
+
+
+class ADH_MaskSelectedVertices(bpy.types.Operator, ADH_AbstractMaskOperator):
+    """Add selected vertices to mask"""
+    bl_idname = 'mesh.adh_mask_selected_vertices'
+    bl_label = 'Mask Selected Vertices'
+    bl_options = {'REGISTER'}
+
+    action: bpy.props.EnumProperty(
+        name='Action',
+        items=[('add', 'Add', 'Add selected vertices to mask.'),
+               ('remove', 'Remove', 'Remove selected vertices from mask.'),
+               ('invert', 'Invert', 'Invert mask')],
+        default='add',
+        options={'HIDDEN', 'SKIP_SAVE'})
+
+    def selected_indices(self, mesh):
+        import numpy as np
+        from . import geometry
+
+        return np.flatnonzero(geometry.read_flags(mesh.data.vertices, "select"))
+
+    def execute(self, context):
+        from . import geometry
+
+        mesh = context.active_object
+        self.save_vg(context)
+
+        vg = mesh.vertex_groups.get(self.MASK_NAME)
+        if not vg:
+            vg = mesh.vertex_groups.new(name=self.MASK_NAME)
+        mesh.vertex_groups.active_index = vg.index
+
+        if self.action == 'invert':
+            bpy.ops.object.vertex_group_invert()
+
+        self.setup_mask_modifier(context)
+
+        mesh.data.update()
+
+        if self.action == 'add':
+            if context.object.mode == 'EDIT':
+                bpy.ops.object.vertex_group_assign()
+            else:
+                geometry.add_to_group(vg, self.selected_indices(mesh), 1.0, 'REPLACE')
+        elif self.action == 'remove':
+            if context.object.mode == 'EDIT':
+                bpy.ops.object.vertex_group_remove_from()
+            else:
+                geometry.remove_from_group(vg, self.selected_indices(mesh))
+
+        self.restore_vg(context)
+
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if event.shift:
+            self.action = 'remove'
+        elif event.ctrl:
+            self.action = 'invert'
+        return self.execute(context)
+
+
+class ADH_GrowMask(bpy.types.Operator, ADH_AbstractMaskOperator):
+    """Grow or shrink mask by rings of neighboring vertices"""
+    bl_idname = 'mesh.adh_grow_mask'
+    bl_label = 'Grow/Shrink Mask'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    action: bpy.props.EnumProperty(
+        name='Action',
+        items=[('grow', 'Grow', 'Add neighboring vertices to mask.'),
+               ('shrink', 'Shrink', 'Remove border vertices from mask.')],
+        default='grow')
+
+    steps: bpy.props.IntProperty(
+        name="Steps",
+        description="Number of vertex rings to grow or shrink by.",
+        default=1,
+        min=1,
+        soft_max=100,
+    )
+
+    def execute(self, context):
+        from . import geometry
+
+        mesh = context.active_object
+        prev_mode = mesh.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        mask = self.read_mask(mesh)
+        adjacency = geometry.mesh_adjacency(mesh.data)
+        if self.action == 'grow':
+            mask = geometry.grow_mask(mask, adjacency, self.steps)
+        else:
+            mask = geometry.shrink_mask(mask, adjacency, self.steps)
+        self.write_mask(context, mask)
+
+        bpy.ops.object.mode_set(mode=prev_mode)
+
+        return {'FINISHED'}
+
+
+class ADH_MaskFromBones(bpy.types.Operator, ADH_AbstractMaskOperator):
+    """Mask vertices influenced by selected bones of the mesh's armatures"""
+    bl_idname = 'mesh.adh_mask_from_bones'
+    bl_label = 'Mask from Bones'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    action: bpy.props.EnumProperty(
+        name='Action',
+        items=[('replace', 'Replace', 'Mask only vertices influenced by the bones.'),
+               ('add', 'Add', 'Add vertices influenced by the bones to mask.')],
+        default='replace')
+
+    threshold: bpy.props.FloatProperty(
+        name="Threshold",
+        description="Minimum bone weight for a vertex to be masked.",
+        default=0.0,
+        min=0.0,
+        max=1.0,
+        subtype='FACTOR',
+    )
+
+    steps: bpy.props.IntProperty(
+        name="Grow",
+        description="Number of vertex rings to grow the masked region by.",
+        default=0,
+        min=0,
+        soft_max=100,
+    )
+
+    def get_bone_names(self, mesh):
+        armatures = {m.object for m in mesh.modifiers
+                     if m.type == 'ARMATURE' and m.object is not None}
+        return {b.name for arm in armatures for b in arm.data.bones if b.select}
+
+    def execute(self, context):
+        from . import geometry
+
+        mesh = context.active_object
+        bone_names = self.get_bone_names(mesh)
+        group_indices = [vg.index for vg in mesh.vertex_groups if vg.name in bone_names]
+        if not group_indices:
+            return {'CANCELLED'}
+
+        prev_mode = mesh.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        mask = geometry.read_group_max(mesh.data, group_indices) > self.threshold
+        if self.steps:
+            mask = geometry.grow_mask(mask, geometry.mesh_adjacency(mesh.data), self.steps)
+        if self.action == 'add':
+            mask |= self.read_mask(mesh)
+        self.write_mask(context, mask)
+
+        bpy.ops.object.mode_set(mode=prev_mode)
+
+        return {'FINISHED'}
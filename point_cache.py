@@ -0,0 +1,60 @@
+"""Streaming writers for baked vertex positions.
+
+Each baked object gets a memory-mapped float32 .npy array of shape
+(frames, vertices, 3), written frame by frame so memory use doesn't grow
+with the frame range, plus the same frames in a format Blender's Mesh
+Cache modifier reads:
+
+- PC2: little-endian. The header is "POINTCACHE2\\0", version, point
+  count, start frame, sample rate and sample count. The float32 XYZ
+  frames follow.
+- MDD: big-endian. The header is the frame count and point count,
+  followed by one float32 time in seconds per frame, then the float32
+  XYZ frames."""
+
+import os
+import struct
+
+import numpy as np
+
+FORMAT_EXTENSIONS = {'PC2': ".pc2", 'MDD': ".mdd"}
+
+
+def write_pc2_header(cache_file, point_count, start_frame, frame_count):
+    cache_file.write(struct.pack("<12siiffi", b"POINTCACHE2\0", 1, point_count,
+                                 float(start_frame), 1.0, frame_count))
+
+
+def write_mdd_header(cache_file, point_count, start_frame, frame_count, fps):
+    cache_file.write(struct.pack(">ii", frame_count, point_count))
+    times = (np.arange(frame_count, dtype=np.float64) + start_frame) / fps
+    cache_file.write(times.astype(">f4").tobytes())
+
+
+class PointCacheWriter:
+    """Writes the frames of one object to `<path_base>.npy` and
+    `<path_base>.pc2` or `.mdd`."""
+
+    def __init__(self, path_base, point_count, start_frame, frame_count, cache_format='PC2', fps=24.0):
+        os.makedirs(os.path.dirname(path_base) or ".", exist_ok=True)
+        self.point_count = point_count
+        self.npy_path = path_base + ".npy"
+        self.cache_path = path_base + FORMAT_EXTENSIONS[cache_format]
+        self.frames = np.lib.format.open_memmap(self.npy_path, mode='w+', dtype=np.float32,
+                                                shape=(frame_count, point_count, 3))
+        self.byte_order = "<" if cache_format == 'PC2' else ">"
+        self.cache_file = open(self.cache_path, "wb")
+        if cache_format == 'PC2':
+            write_pc2_header(self.cache_file, point_count, start_frame, frame_count)
+        else:
+            write_mdd_header(self.cache_file, point_count, start_frame, frame_count, fps)
+
+    def write(self, frame_index, co):
+        """Frames must be written in order, each once."""
+        self.frames[frame_index] = co
+        self.cache_file.write(np.asarray(co, dtype=self.byte_order + "f4").tobytes())
+
+    def close(self):
+        self.cache_file.close()
+        self.frames.flush()
+        del self.frames
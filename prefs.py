@@ -0,0 +1,72 @@
+"""The add-on preferences, read by the operator profiling (see the
+instrumentation module) and by the memory limit of computations on huge
+meshes (see geometry.memory_limit())."""
+
+import os
+import sys
+
+import bpy
+
+PROFILE_ENV = "ADH_RIGGING_TOOLS_PROFILE"
+MEMORY_ENV = "ADH_RIGGING_TOOLS_MEMORY_MB"
+
+
+def get_preferences(context=None):
+    addon = (context or bpy.context).preferences.addons.get(__package__)
+    return addon.preferences if addon else None
+
+
+def update_memory_limit(prefs):
+    # Until geometry is imported, memory_limit() reads the preference.
+    geometry = sys.modules.get(__package__ + ".geometry")
+    if geometry is not None:
+        geometry.set_memory_limit(prefs.memory_limit)
+
+
+class ADH_RiggingToolsPreferences(bpy.types.AddonPreferences):
+    bl_idname = __package__
+
+    profiling: bpy.props.BoolProperty(
+        name="Profile Operators",
+        description="Record the time, bpy.ops calls and data size of every operator run",
+        default=False,
+    )
+
+    log_path: bpy.props.StringProperty(
+        name="Profile Log",
+        description="JSON-lines file the records are appended to (default: in Blender's config directory)",
+        subtype='FILE_PATH',
+    )
+
+    memory_limit: bpy.props.IntProperty(
+        name="Memory Limit (MB)",
+        description="Memory the temporary arrays of operators on huge meshes may use; "
+                    "they work through the vertices in chunks that fit",
+        default=256,
+        min=16,
+        update=lambda self, context: update_memory_limit(self),
+    )
+
+    def draw(self, context):
+        layout = self.layout
+
+        row = layout.row()
+        row.prop(self, "profiling")
+        if os.environ.get(PROFILE_ENV):
+            row.label(text="Enabled by $" + PROFILE_ENV)
+        col = layout.column()
+        col.active = self.profiling
+        col.prop(self, "log_path")
+
+        row = layout.row()
+        row.prop(self, "memory_limit")
+        if os.environ.get(MEMORY_ENV):
+            row.label(text="Set by $" + MEMORY_ENV)
+
+
+def register():
+    bpy.utils.register_class(ADH_RiggingToolsPreferences)
+
+
+def unregister():
+    bpy.utils.unregister_class(ADH_RiggingToolsPreferences)
@@ -0,0 +1,564 @@
+"""Rig-build recipes: add-on operator runs recorded into a text
+datablock, one JSON line per step, to be replayed on a new or updated
+model.
+
+A step stores the operator and its properties, the objects, bones and
+edit-mode elements selected when it ran, what it created (objects,
+bones and modifiers) and a hash of its inputs: the properties, the
+selection and the geometry of the selected objects. On replay a step is
+skipped when its hash is unchanged, what it created is still there and
+no earlier step it depends on ran again; otherwise what it created
+before is set aside and the step runs again. If it fails, replay stops
+there and the old outputs are put back.
+
+Bones created by recipe steps are left out of armature hashes, so an
+armature step isn't invalidated by the bones later steps add to it.
+Dependent steps are caught instead by following which objects the
+re-run steps touched."""
+
+import json
+
+import bpy
+
+from . import instrumentation
+from .snapshot import Snapshot, add_modifier, modifier_settings
+
+DEFAULT_TEXT = "Rig Recipe"
+EDIT_ELEMENTS = {'MESH': "vertices", 'LATTICE': "points"}
+# object.mode_set() modes entering the context modes steps record, other
+# than the EDIT_* ones, all entered with 'EDIT'.
+MODE_SET_MODES = {
+    'OBJECT': 'OBJECT',
+    'POSE': 'POSE',
+    'SCULPT': 'SCULPT',
+    'PAINT_WEIGHT': 'WEIGHT_PAINT',
+    'PAINT_VERTEX': 'VERTEX_PAINT',
+    'PAINT_TEXTURE': 'TEXTURE_PAINT',
+    'PARTICLE': 'PARTICLE_EDIT',
+}
+
+ASIDE_SUFFIX = "~replaced"
+_recording = None  # name of the text datablock being recorded into
+_replaying = False
+
+
+def read_recipe(text):
+    return [json.loads(line.body) for line in text.lines if line.body.strip()]
+
+
+def write_recipe(text, steps):
+    text.clear()
+    text.write("".join(json.dumps(step, sort_keys=True) + "\n" for step in steps))
+
+
+def operator_properties(operator):
+    properties = {}
+    for prop in operator.bl_rna.properties:
+        key = prop.identifier
+        if key == 'rna_type' or prop.type in {'POINTER', 'COLLECTION'}:
+            continue
+        value = getattr(operator.properties, key)
+        if isinstance(value, set):
+            value = sorted(value)
+        elif not isinstance(value, (bool, int, float, str)):
+            value = list(value)
+        properties[key] = value
+    return properties
+
+
+def call_operator(idname, properties):
+    category, name = idname.split(".")
+    op = getattr(getattr(bpy.ops, category), name)
+    rna_properties = op.get_rna_type().properties
+    kwargs = {}
+    for key, value in properties.items():
+        prop = rna_properties.get(key)
+        if prop is None:
+            continue
+        if prop.type == 'ENUM' and prop.is_enum_flag:
+            value = set(value)
+        kwargs[key] = value
+    return op('EXEC_DEFAULT', **kwargs)
+
+
+def selection_state(context):
+    """The selection and mode a step ran with."""
+    from . import geometry
+    import numpy as np
+
+    active = context.active_object
+    state = {
+        "mode": context.mode,
+        "active": active.name if active else None,
+        "selected": sorted(obj.name for obj in context.selected_objects),
+        "elements": {},
+    }
+    for obj in set(context.selected_objects) | ({active} if active else set()):
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
+            elements = EDIT_ELEMENTS.get(obj.type)
+            if elements:
+                collection = getattr(obj.data, elements)
+                state["elements"][obj.name] = np.flatnonzero(
+                    geometry.read_flags(collection, "select")).tolist()
+    if active is not None and active.type == 'ARMATURE':
+        bones = active.data.bones
+        state["active_bone"] = bones.active.name if bones.active else None
+        state["selected_bones"] = [bone.name for bone in bones if bone.select]
+    return state
+
+
+def restore_selection(context, state):
+    """Selects what the step ran with and enters its mode."""
+    import numpy as np
+
+    view_layer = context.view_layer
+    names = set(state["selected"]) | ({state["active"]} if state["active"] else set())
+    for obj in view_layer.objects:
+        obj.select_set(obj.name in names)
+    active = bpy.data.objects.get(state["active"]) if state["active"] else None
+    view_layer.objects.active = active
+
+    for name, indices in state["elements"].items():
+        obj = bpy.data.objects[name]
+        collection = getattr(obj.data, EDIT_ELEMENTS[obj.type])
+        flags = np.zeros(len(collection), dtype=bool)
+        flags[[index for index in indices if index < len(flags)]] = True
+        collection.foreach_set("select", flags)
+        if obj.type == 'MESH':
+            obj.data.edges.foreach_set("select", np.zeros(len(obj.data.edges), dtype=bool))
+            obj.data.polygons.foreach_set("select", np.zeros(len(obj.data.polygons), dtype=bool))
+
+    if active is not None and active.type == 'ARMATURE' and "selected_bones" in state:
+        selected_bones = set(state["selected_bones"])
+        for bone in active.data.bones:
+            bone.select = bone.select_head = bone.select_tail = bone.name in selected_bones
+        active.data.bones.active = active.data.bones.get(state["active_bone"] or "")
+
+    mode = state["mode"]
+    if active is not None and mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='EDIT' if mode.startswith('EDIT_') else MODE_SET_MODES.get(mode, mode))
+
+
+def object_digest(obj, excluded_bones):
+    """Hash of an object's transform and geometry."""
+    from . import geometry
+    import numpy as np
+
+    arrays = [np.array(obj.matrix_world)]
+    data = obj.data
+    if obj.type == 'MESH':
+        arrays += [geometry.read_coordinates(data.vertices), geometry.read_edges(data.edges)]
+        if data.shape_keys:
+            arrays.append(np.array([key.name for key in data.shape_keys.key_blocks]))
+    elif obj.type == 'LATTICE':
+        arrays.append(geometry.read_vectors(data.points, "co"))
+    elif obj.type == 'ARMATURE':
+        keep = np.array([bone.name not in excluded_bones for bone in data.bones], dtype=bool)
+        arrays += [geometry.read_vectors(data.bones, "head_local")[keep],
+                   geometry.read_vectors(data.bones, "tail_local")[keep],
+                   np.array([bone.name for bone in data.bones if bone.name not in excluded_bones])]
+    return geometry.array_hash(*arrays)
+
+
+def data_digest(state, excluded_bones):
+    names = sorted(set(state["selected"]) | ({state["active"]} if state["active"] else set()))
+    return {name: object_digest(bpy.data.objects[name], excluded_bones.get(name, ()))
+            for name in names}
+
+
+def step_hash(step, digests):
+    from . import geometry
+    import numpy as np
+
+    description = json.dumps([step["operator"], step["properties"], step["selection"], digests],
+                             sort_keys=True)
+    return geometry.array_hash(np.frombuffer(description.encode(), dtype=np.uint8))
+
+
+def scene_contents():
+    """(objects, {armature: bones}, {object: modifiers}) names."""
+    for obj in bpy.data.objects:
+        if obj.mode == 'EDIT' and obj.type == 'ARMATURE':
+            obj.update_from_editmode()
+    objects = {obj.name for obj in bpy.data.objects}
+    bones = {obj.name: {bone.name for bone in obj.data.bones}
+             for obj in bpy.data.objects if obj.type == 'ARMATURE'}
+    modifiers = {obj.name: {mod.name for mod in obj.modifiers} for obj in bpy.data.objects}
+    return objects, bones, modifiers
+
+
+def created_since(before, after):
+    def added(old, new):
+        return {name: sorted(items - old.get(name, set()))
+                for name, items in new.items() if items - old.get(name, set())}
+    return {"objects": sorted(after[0] - before[0]),
+            "bones": added(before[1], after[1]),
+            "modifiers": added(before[2], after[2])}
+
+
+def recipe_bones(steps):
+    """{armature: names of bones created by the steps}."""
+    bones = {}
+    for step in steps:
+        for armature, names in step.get("created", {}).get("bones", {}).items():
+            bones.setdefault(armature, set()).update(names)
+    return bones
+
+
+def outputs_present(step):
+    created = step.get("created", {})
+    objects = bpy.data.objects
+    if any(name not in objects for name in created.get("objects", ())):
+        return False
+    for owners, collection in (("bones", lambda obj: obj.data.bones),
+                               ("modifiers", lambda obj: obj.modifiers)):
+        for owner, names in created.get(owners, {}).items():
+            obj = objects.get(owner)
+            if obj is None or any(name not in collection(obj) for name in names):
+                return False
+    return True
+
+
+def remove_outputs(context, created):
+    """Removes created objects, bones and modifiers, as listed in a
+    step's "created"."""
+    for owner, names in created.get("modifiers", {}).items():
+        obj = bpy.data.objects.get(owner)
+        for name in (names if obj else ()):
+            mod = obj.modifiers.get(name)
+            if mod is not None:
+                obj.modifiers.remove(mod)
+    for owner, names in created.get("bones", {}).items():
+        armature = bpy.data.objects.get(owner)
+        if armature is None or armature.type != 'ARMATURE':
+            continue
+        context.view_layer.objects.active = armature
+        bpy.ops.object.mode_set(mode='EDIT')
+        edit_bones = armature.data.edit_bones
+        for name in names:
+            bone = edit_bones.get(name)
+            if bone is not None:
+                edit_bones.remove(bone)
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for name in created.get("objects", ()):
+        obj = bpy.data.objects.get(name)
+        if obj is not None:
+            bpy.data.objects.remove(obj)
+
+
+class ReplacedOutputs(Snapshot):
+    """What a step created in an earlier run, taken out of the scene
+    before it runs again. Objects are unlinked and renamed, modifiers and
+    bones removed, keeping their settings. discard() deletes the objects
+    once the step succeeded, restore() puts everything back if it failed.
+    Bones come back with their edit-mode settings, not their pose ones."""
+
+    def __init__(self, context, created):
+        self.objects = []
+        for name in created.get("objects", ()):
+            obj = bpy.data.objects.get(name)
+            if obj is None:
+                continue
+            collections = list(obj.users_collection)
+            for collection in collections:
+                collection.objects.unlink(obj)
+            obj.name = name + ASIDE_SUFFIX
+            self.objects.append((obj, name, collections))
+
+        self.modifiers = []
+        for owner, names in created.get("modifiers", {}).items():
+            obj = bpy.data.objects.get(owner)
+            for name in (names if obj else ()):
+                index = obj.modifiers.find(name)
+                if index >= 0:
+                    mod = obj.modifiers[index]
+                    self.modifiers.append((obj, index, name, mod.type, modifier_settings(mod)))
+                    obj.modifiers.remove(mod)
+        self.modifiers.sort(key=lambda saved: saved[1])
+
+        self.bones = []
+        for owner, names in created.get("bones", {}).items():
+            armature = bpy.data.objects.get(owner)
+            if armature is None or armature.type != 'ARMATURE':
+                continue
+            context.view_layer.objects.active = armature
+            bpy.ops.object.mode_set(mode='EDIT')
+            edit_bones = armature.data.edit_bones
+            saved = []
+            for bone in [edit_bones.get(name) for name in names]:
+                if bone is not None:
+                    saved.append((bone.name, bone.head.copy(), bone.tail.copy(), bone.roll,
+                                  bone.parent.name if bone.parent else None,
+                                  bone.use_connect, bone.use_deform))
+            for name, *_ in saved:
+                edit_bones.remove(edit_bones[name])
+            bpy.ops.object.mode_set(mode='OBJECT')
+            self.bones.append((armature, saved))
+
+    def restore(self, context):
+        for obj, name, collections in self.objects:
+            for collection in collections:
+                collection.objects.link(obj)
+            obj.name = name
+        for obj, index, name, modifier_type, settings in self.modifiers:
+            add_modifier(context, obj, index, name, modifier_type, settings)
+        for armature, saved in self.bones:
+            context.view_layer.objects.active = armature
+            bpy.ops.object.mode_set(mode='EDIT')
+            edit_bones = armature.data.edit_bones
+            for name, head, tail, roll, _, _, use_deform in saved:
+                bone = edit_bones.new(name)
+                bone.head, bone.tail, bone.roll = head, tail, roll
+                bone.use_deform = use_deform
+            # Parents once all are back, they may be among them.
+            for name, _, _, _, parent, use_connect, _ in saved:
+                bone = edit_bones[name]
+                bone.parent = edit_bones.get(parent or "")
+                bone.use_connect = use_connect
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+    def discard(self):
+        for obj, _, _ in self.objects:
+            bpy.data.objects.remove(obj)
+        self.objects = []
+
+
+def set_object_mode(context):
+    if context.active_object is not None and context.active_object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+
+def touched_objects(step):
+    created = step.get("created", {})
+    selection = step["selection"]
+    return set(selection["selected"]) | ({selection["active"]} if selection["active"] else set()) \
+           | set(created.get("objects", ())) | set(created.get("bones", {})) \
+           | set(created.get("modifiers", {}))
+
+
+class RecipeRecorder:
+    """Instrumentation observer collecting finished operator runs into
+    the recipe being recorded. The steps are kept in memory and written
+    to the text when recording stops."""
+
+    def __init__(self):
+        self.steps = []
+        self.bones = {}  # recipe_bones(self.steps)
+
+    def begin(self, steps):
+        self.steps = steps
+        self.bones = recipe_bones(steps)
+
+    def end(self, text):
+        write_recipe(text, self.steps)
+        self.begin([])
+
+    def is_active(self, context):
+        return _recording is not None and not _replaying
+
+    def start(self, operator, context, measurement):
+        measurement.recipe_selection = selection_state(context)
+        measurement.recipe_digests = data_digest(measurement.recipe_selection, self.bones)
+        measurement.recipe_contents = scene_contents()
+
+    def finish(self, operator, measurement, result):
+        if result != {'FINISHED'}:
+            return
+        step = {
+            "operator": operator.bl_idname,
+            "properties": operator_properties(operator),
+            "selection": measurement.recipe_selection,
+        }
+        step["input_hash"] = step_hash(step, measurement.recipe_digests)
+        step["created"] = created_since(measurement.recipe_contents, scene_contents())
+        self.steps.append(step)
+        for armature, names in step["created"]["bones"].items():
+            self.bones.setdefault(armature, set()).update(names)
+
+
+recorder = RecipeRecorder()
+
+
+class ADH_RecordRecipe(bpy.types.Operator):
+    """Starts recording add-on operator runs into a rig recipe text."""
+    bl_idname = 'wm.adh_record_recipe'
+    bl_label = 'Record Rig Recipe'
+
+    text_name: bpy.props.StringProperty(
+        name="Text",
+        description="Text datablock the recipe is stored in",
+        default=DEFAULT_TEXT,
+    )
+
+    append: bpy.props.BoolProperty(
+        name="Append",
+        description="Add to the steps already in the recipe instead of starting over.",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return _recording is None
+
+    def execute(self, context):
+        global _recording
+        text = bpy.data.texts.get(self.text_name) or bpy.data.texts.new(self.text_name)
+        recorder.begin(read_recipe(text) if self.append else [])
+        _recording = text.name
+        self.report({'INFO'}, "Recording rig recipe into %s" % text.name)
+        return {'FINISHED'}
+
+
+class ADH_StopRecipe(bpy.types.Operator):
+    """Stops recording the rig recipe."""
+    bl_idname = 'wm.adh_stop_recipe'
+    bl_label = 'Stop Recording Rig Recipe'
+
+    @classmethod
+    def poll(cls, context):
+        return _recording is not None
+
+    def execute(self, context):
+        global _recording
+        recorder.end(bpy.data.texts.get(_recording) or bpy.data.texts.new(_recording))
+        _recording = None
+        return {'FINISHED'}
+
+
+class ADH_ReplayRecipe(bpy.types.Operator):
+    """Replays a rig recipe, running again only the steps whose inputs changed or whose results are missing."""
+    bl_idname = 'wm.adh_replay_recipe'
+    bl_label = 'Replay Rig Recipe'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    text_name: bpy.props.StringProperty(
+        name="Text",
+        description="Text datablock the recipe is stored in",
+        default=DEFAULT_TEXT,
+    )
+
+    force: bpy.props.BoolProperty(
+        name="Run All Steps",
+        description="Run every step again, even those whose inputs didn't change.",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return _recording is None and context.mode == 'OBJECT'
+
+    def run_step(self, context, index, step):
+        """Runs the step again in place of its old outputs, putting
+        them back if it fails. Returns whether it succeeded."""
+        replaced = ReplacedOutputs(context, step.get("created", {}))
+        before = scene_contents()
+        try:
+            restore_selection(context, step["selection"])
+            call_operator(step["operator"], step["properties"])
+        except (RuntimeError, TypeError) as error:
+            # TypeError: a mode or property value this Blender doesn't know.
+            self.report({'ERROR'}, "Step %d (%s) failed: %s" % (index + 1, step["operator"], error))
+            set_object_mode(context)
+            remove_outputs(context, created_since(before, scene_contents()))
+            replaced.restore(context)
+            return False
+        step["created"] = created_since(before, scene_contents())
+        replaced.discard()
+        return True
+
+    def replay(self, context, text):
+        """Replays the steps in text, returning False if one couldn't
+        run. The steps run before that are saved back either way."""
+        steps = read_recipe(text)
+        excluded_bones = recipe_bones(steps)
+        dirty = set()
+        run_count = 0
+        try:
+            for index, step in enumerate(steps):
+                set_object_mode(context)
+                selection = step["selection"]
+                names = set(selection["selected"]) | ({selection["active"]} if selection["active"] else set())
+                missing = [name for name in names if name not in bpy.data.objects]
+                if missing:
+                    self.report({'ERROR'}, "Step %d (%s): no object named %s"
+                                % (index + 1, step["operator"], missing[0]))
+                    return False
+
+                input_hash = step_hash(step, data_digest(selection, excluded_bones))
+                if not self.force and input_hash == step.get("input_hash") \
+                        and not (names & dirty) and outputs_present(step):
+                    continue
+
+                if not self.run_step(context, index, step):
+                    return False
+                step["input_hash"] = input_hash
+                excluded_bones = recipe_bones(steps)
+                dirty |= touched_objects(step)
+                run_count += 1
+        finally:
+            if run_count:
+                write_recipe(text, steps)
+
+        set_object_mode(context)
+        self.report({'INFO'}, "Ran %d of %d steps" % (run_count, len(steps)))
+        return True
+
+    def execute(self, context):
+        global _replaying
+        text = bpy.data.texts.get(self.text_name)
+        if text is None:
+            self.report({'ERROR'}, "No recipe named %s" % self.text_name)
+            return {'CANCELLED'}
+
+        _replaying = True
+        try:
+            replayed = self.replay(context, text)
+        finally:
+            _replaying = False
+        return {'FINISHED'} if replayed else {'CANCELLED'}
+
+
+class ADH_PT_Recipe(bpy.types.Panel):
+    bl_idname = 'VIEW3D_PT_adh_recipe'
+    bl_label = "Rig Recipe"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "ADH Rigging Tools"
+
+    def draw(self, context):
+        layout = self.layout
+
+        if _recording is None:
+            layout.operator(ADH_RecordRecipe.bl_idname, icon='REC')
+        else:
+            layout.label(text="Recording into " + _recording)
+            layout.operator(ADH_StopRecipe.bl_idname, icon='PAUSE')
+        layout.operator(ADH_ReplayRecipe.bl_idname, icon='PLAY')
+
+
+classes = (
+    ADH_RecordRecipe,
+    ADH_StopRecipe,
+    ADH_ReplayRecipe,
+    ADH_PT_Recipe,
+)
+
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+    instrumentation.observers.append(recorder)
+
+
+def unregister():
+    global _recording
+    from bpy.utils import unregister_class
+    if recorder in instrumentation.observers:
+        instrumentation.observers.remove(recorder)
+    if _recording is not None:
+        recorder.end(bpy.data.texts.get(_recording) or bpy.data.texts.new(_recording))
+    _recording = None
+    for cls in reversed(classes):
+        unregister_class(cls)
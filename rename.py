@@ -0,0 +1,47 @@
+import re
+
+import bpy
+
+
+class ADH_RenameRegex(bpy.types.Operator):
+    """Renames selected objects or bones using regular expressions. Depends on re, standard library module."""
+    bl_idname = 'object.adh_rename_regex'
+    bl_label = 'Rename Regex'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    regex_search_pattern: bpy.props.StringProperty(
+        name="Search String",
+        default="",
+    )
+    regex_replacement_string: bpy.props.StringProperty(
+        name="Replacement String",
+        default="",
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.selected_objects != []
+
+    def execute(self, context):
+        search_str = self.regex_search_pattern
+        replacement_str = self.regex_replacement_string
+        substring_re = re.compile(search_str)
+        if context.mode == 'OBJECT':
+            item_list = context.selected_objects
+        elif context.mode == 'POSE':
+            item_list = context.selected_pose_bones
+        elif context.mode == 'EDIT_ARMATURE':
+            item_list = context.selected_bones
+        else:
+            return {'CANCELLED'}
+
+        for item in item_list:
+            item.name = substring_re.sub(replacement_str, item.name)
+
+        # In pose mode, operator's result won't show immediately. This
+        # solves it somehow: only the View3D area will refresh
+        # promptly.
+        if context.mode == 'POSE' and context.area is not None:
+            context.area.tag_redraw()
+
+        return {'FINISHED'}
@@ -0,0 +1,114 @@
+"""Reverse index from custom shape objects to the pose bones using
+them, built on first use and kept current by a depsgraph handler that
+rescans only the armatures being updated."""
+
+from collections import defaultdict
+
+import bpy
+from bpy.app.handlers import persistent
+
+
+class ShapeIndex:
+    def __init__(self):
+        self.armatures = {}  # armature pointer: (armature, {bone name: widget pointer})
+        self.users = defaultdict(set)  # widget pointer: {(armature pointer, bone name)}
+
+    def forget(self, armature_key):
+        entry = self.armatures.pop(armature_key, None)
+        if entry is None:
+            return
+        for bone_name, widget_key in entry[1].items():
+            users = self.users[widget_key]
+            users.discard((armature_key, bone_name))
+            if not users:
+                del self.users[widget_key]
+
+    def scan(self, armature):
+        armature_key = armature.as_pointer()
+        self.forget(armature_key)
+        if armature.pose is None:
+            return
+        shapes = {bone.name: bone.custom_shape.as_pointer()
+                  for bone in armature.pose.bones if bone.custom_shape is not None}
+        self.armatures[armature_key] = (armature, shapes)
+        for bone_name, widget_key in shapes.items():
+            self.users[widget_key].add((armature_key, bone_name))
+
+    def bones_using(self, widget):
+        """Returns [(armature, pose bone)] using widget as custom shape.
+        Entries gone stale (deleted armatures, renamed bones) are
+        skipped."""
+        result = []
+        for armature_key, bone_name in list(self.users.get(widget.as_pointer(), ())):
+            entry = self.armatures.get(armature_key)
+            if entry is None:  # forgotten for an earlier bone of the same armature
+                continue
+            armature = entry[0]
+            try:
+                bone = armature.pose.bones.get(bone_name)
+            except ReferenceError:
+                self.forget(armature_key)
+                continue
+            if bone is not None and bone.custom_shape == widget:
+                result.append((armature, bone))
+        return result
+
+    def is_used(self, widget):
+        return bool(self.bones_using(widget))
+
+
+_index = None
+
+
+def get_index():
+    global _index
+    if _index is None:
+        _index = ShapeIndex()
+        for obj in bpy.data.objects:
+            if obj.type == 'ARMATURE':
+                _index.scan(obj)
+    return _index
+
+
+def invalidate():
+    global _index
+    _index = None
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph=None):
+    if _index is None:
+        return
+    if depsgraph is None:  # Blender 2.80 doesn't say what was updated.
+        invalidate()
+        return
+    for update in depsgraph.updates:
+        obj = update.id
+        if isinstance(obj, bpy.types.Object) and obj.type == 'ARMATURE':
+            _index.scan(obj.original)
+
+
+@persistent
+def on_file_change(*args):
+    invalidate()
+
+
+_handlers = (
+    (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update),
+    (bpy.app.handlers.load_post, on_file_change),
+    (bpy.app.handlers.undo_post, on_file_change),
+    (bpy.app.handlers.redo_post, on_file_change),
+)
+
+
+def register():
+    for handlers, func in _handlers:
+        if func not in handlers:
+            handlers.append(func)
+
+
+def unregister():
+    for handlers, func in _handlers:
+        if func in handlers:
+            handlers.remove(func)
+    invalidate()
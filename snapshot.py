@@ -0,0 +1,185 @@
+"""Snapshots of the data chunked operators change, to put it back when
+one run modally is cancelled halfway through. Blender's undo can't be
+used from a modal operator: undoing reloads the file's data under it.
+
+Operators take them through ADH_AbstractChunkedOperator.snapshot()
+before changing anything. restore(context) is called on every snapshot,
+newest first, when the operator is cancelled, and discard() once it
+finishes."""
+
+import bpy
+
+
+def set_active(context, obj, mode):
+    """Makes obj the active object, in the given mode."""
+    objects = context.view_layer.objects
+    if objects.active is not None and objects.active != obj and objects.active.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    objects.active = obj
+    if obj.mode != mode:
+        bpy.ops.object.mode_set(mode=mode)
+
+
+def modifier_settings(modifier):
+    """Copies of the modifier's editable properties."""
+    settings = {}
+    for prop in modifier.bl_rna.properties:
+        if prop.is_readonly or prop.type == 'COLLECTION' or prop.identifier == "name":
+            continue
+        value = getattr(modifier, prop.identifier)
+        if prop.type != 'POINTER' and getattr(prop, "array_length", 0) > 0:
+            value = value.copy() if hasattr(value, "copy") else value[:]
+        settings[prop.identifier] = value
+    return settings
+
+
+def add_modifier(context, obj, index, name, modifier_type, settings):
+    """Adds back a removed modifier at its index in the stack."""
+    from .lattices import move_modifier
+
+    modifier = obj.modifiers.new(name, modifier_type)
+    for identifier, value in settings.items():
+        try:
+            setattr(modifier, identifier, value)
+        except (AttributeError, TypeError, ValueError):
+            pass  # not settable on a new modifier, e.g. the active one
+    move_modifier(context, obj, modifier.name, index)
+
+
+class Snapshot:
+    """Base of the snapshots, saving nothing: subclasses override
+    restore() to put back what they saved, and discard() when they hold
+    data of their own to free."""
+
+    def restore(self, context):
+        pass
+
+    def discard(self):
+        pass
+
+
+class SelectionSnapshot(Snapshot):
+    """Active object, its mode and the selected objects."""
+
+    def __init__(self, context):
+        self.active = context.view_layer.objects.active
+        self.mode = self.active.mode if self.active is not None else 'OBJECT'
+        self.selected = {obj.name for obj in context.selected_objects}
+
+    def restore(self, context):
+        objects = context.view_layer.objects
+        if objects.active is not None and objects.active.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        for obj in objects:
+            selected = obj.name in self.selected
+            if obj.select_get() != selected:
+                obj.select_set(selected)
+        if self.active is not None:
+            set_active(context, self.active, self.mode)
+
+
+class ObjectSnapshot(Snapshot):
+    """Parent and modifiers of an object, optionally its vertex groups
+    and a copy of its mesh, shape keys included. Modifiers added since
+    are removed and removed ones added back."""
+
+    def __init__(self, obj, vertex_groups=False, data=False):
+        self.obj = obj
+        self.parent = obj.parent
+        self.modifiers = [(m.name, m.type, modifier_settings(m)) for m in obj.modifiers]
+        self.groups = None
+        if vertex_groups:
+            from . import geometry
+
+            self.groups = [(vg.name, vg.lock_weight) for vg in obj.vertex_groups]
+            self.members = geometry.read_group_members(obj.data, len(self.groups))
+            self.active_group = obj.vertex_groups.active_index
+        self.data = obj.data.copy() if data else None
+        self.active_shape_key = obj.active_shape_key_index
+
+    def restore(self, context):
+        obj = self.obj
+        if obj.parent != self.parent:
+            obj.parent = self.parent
+
+        names = {name for name, _, _ in self.modifiers}
+        for modifier in [m for m in obj.modifiers if m.name not in names]:
+            obj.modifiers.remove(modifier)
+        for index, (name, modifier_type, settings) in enumerate(self.modifiers):
+            if name not in obj.modifiers:
+                add_modifier(context, obj, index, name, modifier_type, settings)
+
+        if self.data is not None:
+            changed = obj.data
+            name = changed.name
+            changed.user_remap(self.data)
+            bpy.data.meshes.remove(changed)
+            self.data.name = name
+            self.data = None
+            obj.active_shape_key_index = self.active_shape_key
+
+        if self.groups is not None:
+            self.restore_vertex_groups()
+
+    def restore_vertex_groups(self):
+        from . import geometry
+
+        vertex_groups = self.obj.vertex_groups
+        vertex_groups.clear()
+        for (name, lock_weight), (indices, weights) in zip(self.groups, self.members):
+            vg = vertex_groups.new(name=name)
+            geometry.write_weights(vg, weights, indices, decimals=None, remove_zero=False)
+            geometry.add_to_group(vg, indices[weights <= 0.0], 0.0)
+            vg.lock_weight = lock_weight
+        vertex_groups.active_index = self.active_group
+
+    def discard(self):
+        if self.data is not None:
+            bpy.data.meshes.remove(self.data)
+            self.data = None
+
+
+class ArmatureSnapshot(Snapshot):
+    """Bones with their parents, pose bone constraints, drivers and bone
+    layers of an armature. Bones, constraints and drivers added since
+    are removed. Restoring leaves the armature active in pose mode, a
+    SelectionSnapshot taken before sets the mode back."""
+
+    def __init__(self, armature):
+        self.armature = armature
+        bones = armature.data.edit_bones if armature.mode == 'EDIT' else armature.data.bones
+        self.bones = {bone.name: (bone.parent.name if bone.parent else None, bone.use_connect)
+                      for bone in bones}
+        self.constraints = {bone.name: {c.name for c in bone.constraints} for bone in armature.pose.bones}
+        drivers = armature.animation_data.drivers if armature.animation_data else []
+        self.drivers = {(fcurve.data_path, fcurve.array_index) for fcurve in drivers}
+        self.layers = armature.data.layers[:] if hasattr(armature.data, "layers") else None
+
+    def restore(self, context):
+        armature = self.armature
+        set_active(context, armature, 'EDIT')
+        edit_bones = armature.data.edit_bones
+        # Parents first: removing a bone hands its children to its parent.
+        for bone in edit_bones:
+            if bone.name not in self.bones:
+                continue
+            parent_name, use_connect = self.bones[bone.name]
+            parent = edit_bones[parent_name] if parent_name else None
+            if bone.parent != parent:
+                bone.parent = parent
+            if bone.use_connect != use_connect:
+                bone.use_connect = use_connect
+        for bone in [b for b in edit_bones if b.name not in self.bones]:
+            edit_bones.remove(bone)
+
+        bpy.ops.object.mode_set(mode='POSE')
+        for pose_bone in armature.pose.bones:
+            kept = self.constraints.get(pose_bone.name, ())
+            for constraint in [c for c in pose_bone.constraints if c.name not in kept]:
+                pose_bone.constraints.remove(constraint)
+        if armature.animation_data:
+            drivers = armature.animation_data.drivers
+            for fcurve in [f for f in drivers if (f.data_path, f.array_index) not in self.drivers]:
+                drivers.remove(fcurve)
+        if self.layers is not None:
+            armature.data.layers = self.layers
@@ -0,0 +1,238 @@
+import bpy
+from mathutils import Vector
+
+from .chunked import ADH_AbstractChunkedOperator
+from .common import PRF_ROOT, PRF_TIP, BBONE_BASE_SIZE
+from .snapshot import ArmatureSnapshot, SelectionSnapshot
+
+
+class ADH_CreateSpokes(bpy.types.Operator, ADH_AbstractChunkedOperator):
+    """Creates parentless bones in selected armature from the 3D cursor, ending at each selected vertices of active mesh object."""
+    bl_idname = 'armature.adh_create_spokes'
+    bl_label = 'Create Spokes'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    parent: bpy.props.BoolProperty(
+        name="Parent",
+        description="Create parent bone, one for each if armature selected.",
+        default=False
+    )
+
+    tip: bpy.props.BoolProperty(
+        name="Tracked Tip",
+        description="Create tip bone and insert Damped Track constraint with the tip as target.",
+        default=False
+    )
+
+    spoke_layers: bpy.props.BoolVectorProperty(
+        name="Spoke Layers",
+        description="Armature layers where spoke bones will be placed",
+        subtype='LAYER',
+        size=32,
+        default=[x == 29 for x in range(0, 32)]
+    )
+
+    aux_layers: bpy.props.BoolVectorProperty(
+        name="Parent and Tip Layers",
+        description="Armature layers where spoke tip and parent bones" + \
+                    " will be placed",
+        subtype='LAYER',
+        size=32,
+        default=[x == 30 for x in range(0, 32)]
+    )
+
+    basename: bpy.props.StringProperty(
+        name="Bone Name",
+        default="spoke",
+    )
+
+    invoked = False
+
+    def setup_bone_parent(self, armature, bone, parent_bone):
+        # Create per-bone parent if no parent set
+        if not parent_bone and self.parent:
+            parent_bone = armature.data.edit_bones.new(PRF_ROOT + bone.name)
+            parent_bone.tail = bone.head + Vector([0, 0, -.05])
+            parent_bone.head = bone.head
+            parent_bone.bbone_x = bone.bbone_x * 2
+            parent_bone.bbone_z = bone.bbone_x * 2
+            parent_bone.layers = self.aux_layers
+            parent_bone.align_orientation(bone)
+            parent_bone.use_deform = False
+
+            delta = parent_bone.head - parent_bone.tail
+            parent_bone.head += delta
+            parent_bone.tail += delta
+
+        if parent_bone:
+            bone_parent = bone.parent
+            bone.parent = parent_bone
+            bone.use_connect = True
+
+            parent_bone.parent = bone_parent
+
+    def setup_bone_tip(self, armature, bone):
+        if not self.tip:
+            return
+        tip_bone = armature.data.edit_bones.new(PRF_TIP + bone.name)
+        tip_bone.head = bone.tail
+        tip_bone.tail = bone.tail + Vector([.05, 0, 0])
+        tip_bone.bbone_x = bone.bbone_x * 2
+        tip_bone.bbone_z = bone.bbone_z * 2
+        tip_bone.align_orientation(bone)
+        tip_bone.layers = self.aux_layers
+        tip_bone.use_deform = False
+
+    def setup_bone_constraint(self, armature, bone_name):
+        if not self.tip:
+            return
+        pbone = armature.pose.bones[bone_name]
+        tip_name = PRF_TIP + bone_name
+        dt_constraint = pbone.constraints.new('DAMPED_TRACK')
+        dt_constraint.target = armature
+        dt_constraint.subtarget = tip_name
+
+    def setup_bone(self, armature, bone_name, head_co, tail_co, parent):
+        bone = armature.data.edit_bones.new(bone_name)
+        bone.head = head_co
+        bone.tail = tail_co
+        bone.bbone_x = BBONE_BASE_SIZE
+        bone.bbone_z = BBONE_BASE_SIZE
+        bone.use_deform = True
+        bone.select = True
+        bone.layers = self.spoke_layers
+        self.setup_bone_parent(armature, bone, parent)
+        self.setup_bone_tip(armature, bone)
+
+    def set_armature_layers(self, armature):
+        combined_layers = list(
+            map(any,
+                zip(armature.data.layers, self.spoke_layers, self.aux_layers)
+                if (self.parent or self.tip) else
+                zip(armature.data.layers, self.spoke_layers)))
+        armature.data.layers = combined_layers
+
+    def get_vertex_coordinates(self, mesh, armature):
+        # Get vertex coordinates localized to armature's matrix, transformed
+        # on a worker thread
+        import numpy as np
+        from . import executor, geometry
+
+        mesh.update_from_editmode()
+        vertices = mesh.data.vertices
+        co = geometry.read_coordinates(vertices)[geometry.read_flags(vertices, "select")]
+        matrix = np.array(armature.matrix_world.inverted() @ mesh.matrix_world)
+        vert_coordinates = yield executor.submit(geometry.transform_points, co, matrix, co)
+        return [Vector(co) for co in vert_coordinates]
+
+    def create_spokes(self, context, mesh, armature):
+        scene = context.scene
+
+        vert_coordinates = yield from self.get_vertex_coordinates(mesh, armature)
+        cursor_co = armature.matrix_world.inverted() @ scene.cursor.location
+
+        bpy.ops.object.editmode_toggle()
+        context.view_layer.objects.active = armature
+        prev_mode = armature.mode
+
+        bpy.ops.object.mode_set(mode='EDIT')
+        for bone in context.selected_editable_bones:
+            bone.select = False
+
+        parent = None
+        if self.parent:
+            parent = armature.data.edit_bones.new(PRF_ROOT + self.basename)
+            parent.head = cursor_co + Vector([0, 0, -1])
+            parent.tail = cursor_co
+        for index, vert_co in enumerate(vert_coordinates):
+            bone_name = "%s.%d" % (self.basename, index)
+            self.setup_bone(armature, bone_name, cursor_co, vert_co, parent)
+            yield (index + 1) / len(vert_coordinates) * 0.5
+
+        bpy.ops.object.mode_set(mode='POSE')
+        for index in range(len(vert_coordinates)):
+            bone_name = "%s.%d" % (self.basename, index)
+            self.setup_bone_constraint(armature, bone_name)
+            yield 0.5 + (index + 1) / len(vert_coordinates) * 0.5
+        bpy.ops.object.mode_set(mode=prev_mode)
+
+        self.set_armature_layers(armature)
+
+    def create_spoke_tips(self, context, armature):
+        prev_mode = armature.mode
+
+        bpy.ops.object.mode_set(mode='EDIT')
+        for bone in context.selected_bones:
+            self.setup_bone_parent(armature, bone, None)
+            self.setup_bone_tip(armature, bone)
+
+        bpy.ops.object.mode_set(mode='POSE')
+        for bone in context.selected_pose_bones:
+            self.setup_bone_constraint(armature, bone.name)
+        bpy.ops.object.mode_set(mode=prev_mode)
+
+        self.set_armature_layers(armature)
+        yield 1.0
+
+    @classmethod
+    def poll(cls, context):
+        active = context.active_object
+        return active is not None and active.mode in ['EDIT', 'POSE'] and \
+               active.type in ['MESH', 'ARMATURE'] and \
+               len(context.selected_objects) <= 2
+
+    def draw(self, context):
+        layout = self.layout
+
+        if self.invoked:
+            return
+
+        row = layout.row(align=True)
+        row.prop(self, "basename")
+
+        row = layout.row(align=True)
+        row.prop(self, "parent", toggle=True)
+        row.prop(self, "tip", toggle=True)
+
+        column = layout.column()
+        column.prop(self, "spoke_layers")
+
+        column = layout.column()
+        column.prop(self, "aux_layers")
+
+    def get_targets(self, context):
+        """(mesh, armature) to create spokes between, (None, armature) to
+        add tips to existing spokes, or None."""
+        obj1 = context.active_object
+        selected = [obj for obj in context.selected_objects if obj != obj1]
+        obj2 = selected[0] if selected else None
+
+        if obj1.type == 'MESH' and obj1.mode == 'EDIT' \
+                and obj2 and obj2.type == 'ARMATURE':
+            return obj1, obj2
+        elif obj1.type == 'ARMATURE':
+            return None, obj1
+        return None
+
+    def execute(self, context):
+        if self.get_targets(context) is None:
+            return {'CANCELLED'}
+        return ADH_AbstractChunkedOperator.execute(self, context)
+
+    def invoke(self, context, event):
+        if self.get_targets(context) is None:
+            return {'CANCELLED'}
+        return ADH_AbstractChunkedOperator.invoke(self, context, event)
+
+    def run(self, context):
+        mesh, armature = self.get_targets(context)
+        self.snapshot(SelectionSnapshot, context)
+        self.snapshot(ArmatureSnapshot, armature)
+        if mesh is not None:
+            return self.create_spokes(context, mesh, armature)
+        return self.create_spoke_tips(context, armature)
+
+    # def invoke(self, context, event):
+    #     retval = context.window_manager.invoke_props_dialog(self)
+    #     self.invoked = True
+    #     return retval
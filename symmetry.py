@@ -0,0 +1,61 @@
+"""X-mirror helpers: side name flipping and cached vertex
+correspondence."""
+
+import re
+
+import numpy as np
+from mathutils import kdtree
+
+from . import geometry
+
+SIDE_NAMES = {"L": "R", "R": "L", "l": "r", "r": "l",
+              "Left": "Right", "Right": "Left", "left": "right", "right": "left",
+              "LEFT": "RIGHT", "RIGHT": "LEFT"}
+SIDE_SUFFIX_RE = re.compile(r"(?<=[._\- ])(L|R|l|r|Left|Right|left|right|LEFT|RIGHT)(?=$|\.\d+$)")
+SIDE_PREFIX_RE = re.compile(r"^(L|R|l|r|Left|Right|left|right|LEFT|RIGHT)(?=[._\- ])")
+
+
+def name_side(name):
+    """Returns the side of a name: 'L', 'R' or '' for center."""
+    match = SIDE_SUFFIX_RE.search(name) or SIDE_PREFIX_RE.search(name)
+    if not match:
+        return ""
+    return match.group(1)[0].upper()
+
+
+def mirror_name(name):
+    """Flips a name's side marker, e.g. "arm.L" -> "arm.R", returning
+    center names unchanged."""
+    def flip(match):
+        return SIDE_NAMES[match.group(1)]
+
+    flipped, count = SIDE_SUFFIX_RE.subn(flip, name, count=1)
+    if count:
+        return flipped
+    return SIDE_PREFIX_RE.sub(flip, name, count=1)
+
+
+def mirror_points(points, tolerance=0.001, axis=0):
+    """Index of the mirror counterpart of each point across the plane
+    normal to axis, or -1 if none lies within tolerance."""
+    tree = kdtree.KDTree(len(points))
+    for index, co in enumerate(points.tolist()):
+        tree.insert(co, index)
+    tree.balance()
+
+    mirrored = points.copy()
+    mirrored[:, axis] *= -1
+    result = np.full(len(points), -1, dtype=np.int64)
+    for index, co in enumerate(mirrored.tolist()):
+        _, found, distance = tree.find(co)
+        if found is not None and distance <= tolerance:
+            result[index] = found
+    return result
+
+
+def mesh_mirror_map(mesh, tolerance=0.001):
+    """X-mirror vertex correspondence of a mesh, in its local space.
+    Cached on the mesh until its vertex count or coordinates change."""
+    co = geometry.read_coordinates(mesh.vertices)
+    key = (len(co), tolerance, geometry.array_hash(co))
+    return geometry.mesh_cached(mesh, "mirror_map", key, lambda: mirror_points(co, tolerance))
@@ -0,0 +1,175 @@
+"""Runs test cases inside a background Blender.
+
+Blender is found from $BLENDER or on PATH; without it every test is
+skipped. Each test calls run_case(name, **params), which starts
+
+    blender -b --factory-startup --python-expr <bootstrap> -- <name> <params>
+
+The bootstrap enables the add-on from this checkout, builds the case's
+synthetic fixtures and runs it (see in_blender/), then prints a JSON
+result line that run_case() returns. run_windowed_case() starts Blender
+with a window and simulated events instead, for the cases invoking
+operators; it needs a display (on Linux, xvfb-run works). Operator timings in the result are
+checked against TIME_BUDGETS, in seconds, scaled by $ADH_TEST_TIME_SCALE
+for slower machines."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, TESTS_DIR)
+
+from in_blender import ADDON_NAME, RESULT_MARKER  # noqa: E402
+
+BOOTSTRAP = "import sys; sys.path.insert(0, %r); import in_blender; in_blender.main()" % TESTS_DIR
+CASE_TIMEOUT = 600  # seconds
+
+# Seconds per timed operator call, at the sizes of test_performance; the
+# other tests use smaller fixtures and stay well within them.
+TIME_BUDGETS = {
+    "object.adh_rename_regex": 1.0,
+    "armature.adh_use_same_shape": 1.0,
+    "armature.adh_select_shape": 1.0,
+    "object.adh_finish_edit_shape": 1.0,
+    "object.adh_select_shape_users": 1.0,
+    "armature.adh_replace_shape": 1.0,
+    "object.adh_remove_unused_shapes": 1.0,
+    "armature.adh_create_shape": 1.0,
+    "armature.adh_create_shape:shared": 1.0,
+    "object.adh_save_widget_to_library": 1.0,
+    "armature.adh_share_shapes": 2.0,
+    "object.adh_sync_shape_position_to_bone": 1.0,
+    "lattice.adh_bind_to_objects": 2.0,
+    "object.adh_create_fitted_lattice": 2.0,
+    "mesh.adh_apply_lattices": 5.0,
+    "object.adh_bake_lattice_cache": 10.0,
+    "mesh.adh_mask_selected_vertices": 2.0,
+    "mesh.adh_delete_mask": 1.0,
+    "mesh.adh_grow_mask": 3.0,
+    "mesh.adh_mask_from_bones": 3.0,
+    "armature.adh_create_hooks": 5.0,
+    "armature.adh_create_hooks:lattice": 10.0,
+    "armature.adh_parent_bones_to_hooks": 2.0,
+    "armature.adh_create_spokes": 5.0,
+    "armature.adh_remove_vertex_groups_unselected_bones": 2.0,
+    "armature.adh_bind_to_bone": 5.0,
+    "armature.adh_bind_to_bone:nearest": 5.0,
+    "armature.adh_bind_to_bone:falloff": 5.0,
+    "armature.adh_bind_to_bone:modal": 10.0,
+    "armature.adh_bind_to_bone:cancel": 10.0,
+    "armature.adh_remove_vertex_groups_unselected_bones:cancel": 10.0,
+    "object.adh_mirror_weights": 5.0,
+    "object.adh_map_shape_keys_to_bones": 2.0,
+    "object.adh_analyze_shape_keys": 5.0,
+    "wm.adh_record_recipe": 1.0,
+    "wm.adh_stop_recipe": 1.0,
+    "wm.adh_replay_recipe": 10.0,
+}
+
+
+def find_blender():
+    return os.environ.get("BLENDER") or shutil.which("blender")
+
+
+def has_display():
+    if not sys.platform.startswith("linux"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def time_scale():
+    return float(os.environ.get("ADH_TEST_TIME_SCALE", "1.0"))
+
+
+def check_budgets(times):
+    """Fails on operator calls slower than their budget."""
+    scale = time_scale()
+    unknown = sorted(set(times) - set(TIME_BUDGETS))
+    assert not unknown, "no time budget for %s" % ", ".join(unknown)
+    over = ["%s took %.3fs, budget %.3fs" % (label, seconds, TIME_BUDGETS[label] * scale)
+            for label, seconds in sorted(times.items())
+            if seconds > TIME_BUDGETS[label] * scale]
+    assert not over, "over time budget:\n" + "\n".join(over)
+
+
+@pytest.fixture(scope="session")
+def blender():
+    path = find_blender()
+    if not path:
+        pytest.skip("Blender not found, set $BLENDER or put blender on PATH")
+    return path
+
+
+@pytest.fixture(scope="session")
+def blender_env(blender, tmp_path_factory):
+    """Environment for the Blender processes: the add-on linked under a
+    fixed module name, and user directories kept out of the real ones."""
+    root = tmp_path_factory.mktemp("blender")
+    addons_dir = root / "addons"
+    addons_dir.mkdir()
+    try:
+        os.symlink(REPO_DIR, str(addons_dir / ADDON_NAME), target_is_directory=True)
+    except OSError:
+        shutil.copytree(REPO_DIR, str(addons_dir / ADDON_NAME),
+                        ignore=shutil.ignore_patterns(".git", "tests", "__pycache__"))
+    env = dict(os.environ)
+    env.update({
+        "ADH_TEST_ADDONS_DIR": str(addons_dir),
+        "BLENDER_USER_CONFIG": str(root / "config"),
+        "BLENDER_USER_SCRIPTS": str(root / "scripts"),
+    })
+    for name in ("ADH_RIGGING_TOOLS_PROFILE", "ADH_RIGGING_TOOLS_WIDGETS", "ADH_RIGGING_TOOLS_MEMORY_MB"):
+        env.pop(name, None)
+    return env
+
+
+def launch_case(blender, env, name, params, windowed=False):
+    """Runs the case in Blender and returns its result dict, after
+    checking its operator timings."""
+    if windowed:
+        options = ["--enable-event-simulate", "--window-geometry", "0", "0", "1024", "768"]
+    else:
+        options = ["-b"]
+    command = [blender] + options + ["--factory-startup", "--python-exit-code", "1",
+                                     "--python-expr", BOOTSTRAP, "--", name, json.dumps(params)]
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             universal_newlines=True, timeout=CASE_TIMEOUT, env=env)
+    results = [line[len(RESULT_MARKER):] for line in process.stdout.splitlines()
+               if line.startswith(RESULT_MARKER)]
+    assert results, "case %s printed no result (exit code %d):\n%s" \
+                    % (name, process.returncode, process.stdout[-4000:])
+    result = json.loads(results[-1])
+    if "skip" in result:
+        pytest.skip(result["skip"])
+    assert "error" not in result, "case %s failed in Blender:\n%s" % (name, result["error"])
+    check_budgets(result.get("times", {}))
+    return result
+
+
+@pytest.fixture
+def run_case(blender, blender_env, tmp_path):
+    """run_case(name, **params) runs the case in background Blender."""
+    env = dict(blender_env, ADH_TEST_TMP_DIR=str(tmp_path))
+
+    def run(name, **params):
+        return launch_case(blender, env, name, params)
+    return run
+
+
+@pytest.fixture
+def run_windowed_case(blender, blender_env, tmp_path):
+    """run_windowed_case(name, **params) runs the case in Blender with a
+    window, for the generator cases invoking operators."""
+    if not has_display():
+        pytest.skip("no display for Blender's window, try xvfb-run")
+    env = dict(blender_env, ADH_TEST_TMP_DIR=str(tmp_path))
+
+    def run(name, **params):
+        return launch_case(blender, env, name, params, windowed=True)
+    return run
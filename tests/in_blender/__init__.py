@@ -0,0 +1,257 @@
+"""Test cases run inside Blender by conftest.run_case().
+
+Kept importable without bpy, for conftest to share the constants below.
+Cases live in the submodules listed in CASE_MODULES, one per add-on
+module, and are registered with @case(operator idnames...), naming the
+add-on operators they exercise. A case gets its parameters as keyword
+arguments and returns a JSON-serializable dict. Operators called through
+call() are timed into its "times" entry, which conftest checks against
+the time budgets.
+
+Cases written as generators run in a Blender with a window instead
+(conftest.run_windowed_case()), to go through invoke, modal runs and
+events like a user would. The generator yields the seconds to wait
+while the event loop runs, and returns its dict; invoke_modal() and
+press() drive the operators."""
+
+import importlib
+import inspect
+import json
+import os
+import sys
+import time
+import traceback
+
+ADDON_NAME = "adh_rigging_tools"
+RESULT_MARKER = "ADH_TEST_RESULT "
+CASE_MODULES = ("rename", "widgets", "lattices", "masks", "hooks", "spokes",
+                "weights", "drivers", "recipes", "chunked", "instrumentation")
+
+WAIT_STEP = 0.05  # seconds between checks while waiting on the event loop
+WAIT_TIMEOUT = 120.0
+
+cases = {}  # "module.function": function
+covered = set()  # operator idnames exercised by some case
+times = {}  # label: seconds, of the case running
+
+
+class Skip(Exception):
+    pass
+
+
+def case(*operators):
+    def register(func):
+        prefix = "" if func.__module__ == __name__ else func.__module__.rsplit(".", 1)[-1] + "."
+        cases[prefix + func.__name__] = func
+        covered.update(operators)
+        return func
+    return register
+
+
+def require_version(version, reason):
+    import bpy
+
+    if bpy.app.version < version:
+        raise Skip("%s needs Blender %s or later" % (reason, ".".join(map(str, version))))
+
+
+def require_bone_layers():
+    import bpy
+
+    if "layers" not in bpy.types.Armature.bl_rna.properties:
+        raise Skip("bone layers were replaced by bone collections in Blender 4.0")
+
+
+def require_window():
+    import bpy
+
+    if bpy.app.background:
+        raise Skip("needs a window, run through run_windowed_case()")
+    # Context.temp_override, to invoke operators in the window.
+    require_version((3, 2, 0), "Invoking operators from a test")
+
+
+def temp_dir():
+    """Directory of the running test, for files the case writes."""
+    return os.environ["ADH_TEST_TMP_DIR"]
+
+
+def call(idname, label=None, **properties):
+    """Runs the operator like a script would, timing it under label (by
+    default its idname). Fails unless it finished."""
+    import bpy
+
+    category, name = idname.split(".")
+    op = getattr(getattr(bpy.ops, category), name)
+    assert op.poll(), "%s: poll failed in mode %s" % (idname, bpy.context.mode)
+    start = time.perf_counter()
+    result = op('EXEC_DEFAULT', **properties)
+    times[label or idname] = time.perf_counter() - start
+    assert result == {'FINISHED'}, "%s returned %s" % (idname, result)
+    # Evaluate as the UI would after the operator, running the handlers.
+    bpy.context.view_layer.update()
+    return result
+
+
+class RunWatcher:
+    """Instrumentation observer collecting (idname, result) of every
+    finished operator run, to wait on modal runs and count them."""
+
+    def __init__(self):
+        self.runs = []
+
+    def is_active(self, context):
+        return True
+
+    def start(self, operator, context, measurement):
+        pass
+
+    def finish(self, operator, measurement, result):
+        self.runs.append((operator.bl_idname, sorted(result) if isinstance(result, set) else result))
+
+    def count(self, idname):
+        return sum(1 for run_idname, _ in self.runs if run_idname == idname)
+
+
+watcher = RunWatcher()
+
+
+def watch():
+    """Starts collecting operator runs into watcher.runs."""
+    observers = sys.modules[ADDON_NAME + ".instrumentation"].observers
+    if watcher not in observers:
+        observers.append(watcher)
+    return watcher
+
+
+def window_context():
+    """Window, 3D view area and its main region, for operators to run in."""
+    import bpy
+
+    window = bpy.context.window_manager.windows[0]
+    area = next(area for area in window.screen.areas if area.type == 'VIEW_3D')
+    region = next(region for region in area.regions if region.type == 'WINDOW')
+    return {"window": window, "area": area, "region": region}
+
+
+def invoke(idname, **properties):
+    """Invokes the operator as a click in the 3D view would."""
+    import bpy
+
+    category, name = idname.split(".")
+    op = getattr(getattr(bpy.ops, category), name)
+    with bpy.context.temp_override(**window_context()):
+        assert op.poll(), "%s: poll failed in mode %s" % (idname, bpy.context.mode)
+        return op('INVOKE_DEFAULT', **properties)
+
+
+def press(event_type, **modifiers):
+    """Sends a key press and release to the window."""
+    window = window_context()["window"]
+    window.event_simulate(type=event_type, value='PRESS', **modifiers)
+    window.event_simulate(type=event_type, value='RELEASE', **modifiers)
+
+
+def wait_until(predicate, timeout=WAIT_TIMEOUT):
+    """Generator letting the event loop run until predicate() holds."""
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        assert time.perf_counter() < deadline, "timed out waiting for %s" % predicate.__name__
+        yield WAIT_STEP
+
+
+def invoke_modal(idname, label=None, cancel_when=None, **properties):
+    """Generator invoking a modal operator and waiting for its run to
+    end, timed under label (by default idname + ":modal"). With
+    cancel_when, presses Esc once cancel_when() holds, and the default
+    label is idname + ":cancel". Returns the run's result."""
+    watch()
+    finished = watcher.count(idname)
+    start = time.perf_counter()
+    result = invoke(idname, **properties)
+    assert result == {'RUNNING_MODAL'}, "%s returned %s" % (idname, result)
+
+    def run_ended():
+        return watcher.count(idname) > finished
+    if cancel_when is not None:
+        yield from wait_until(cancel_when)
+        press('ESC')
+    yield from wait_until(run_ended)
+    times[label or idname + (":modal" if cancel_when is None else ":cancel")] = time.perf_counter() - start
+    return [run for run in watcher.runs if run[0] == idname][finished][1]
+
+
+def enable_addon():
+    import addon_utils
+
+    sys.path.insert(0, os.environ["ADH_TEST_ADDONS_DIR"])
+
+    def raise_error(error):
+        raise error
+    addon_utils.enable(ADDON_NAME, default_set=True, handle_error=raise_error)
+
+
+def load_cases():
+    for name in CASE_MODULES:
+        importlib.import_module(__name__ + "." + name)
+
+
+@case()
+def coverage():
+    """Add-on operators no case exercises."""
+    addon = sys.modules[ADDON_NAME]
+    operators = {cls.bl_idname for cls in addon.module_classes}
+    return {"operators": sorted(operators), "uncovered": sorted(operators - covered)}
+
+
+def report(result):
+    import bpy
+
+    result["times"] = dict(times)
+    print(RESULT_MARKER + json.dumps(result))
+    sys.stdout.flush()
+    if not bpy.app.background:
+        bpy.ops.wm.quit_blender()
+
+
+def drive(steps, result):
+    """Timer running a windowed case up to its next wait."""
+    try:
+        return steps.send(None)
+    except StopIteration as stop:
+        result.update(stop.value or {})
+    except Skip as reason:
+        result["skip"] = str(reason)
+    except Exception:
+        result["error"] = traceback.format_exc()
+    report(result)
+    return None
+
+
+def main():
+    import bpy
+
+    argv = sys.argv[sys.argv.index("--") + 1:]
+    name, params = argv[0], json.loads(argv[1])
+    result = {"case": name, "blender": bpy.app.version_string}
+    try:
+        enable_addon()
+        load_cases()
+        if name not in cases:
+            raise KeyError("no case named %s" % name)
+        from . import synthetic
+        synthetic.clear_scene()
+        value = cases[name](**params)
+        if inspect.isgenerator(value):
+            # Nothing has run yet: the body starts with the event loop.
+            require_window()
+            # The splash would take the first simulated events.
+            bpy.context.preferences.view.show_splash = False
+            bpy.app.timers.register(lambda: drive(value, result), first_interval=WAIT_STEP)
+            return
+        result.update(value or {})
+    except Skip as reason:
+        result["skip"] = str(reason)
+    except Exception:
+        result["error"] = traceback.format_exc()
+    report(result)
@@ -0,0 +1,85 @@
+"""Chunked operators run modally from invoke, driven by the window's
+timer events. Windowed cases, see conftest.run_windowed_case()."""
+
+import sys
+
+import numpy as np
+
+from . import ADDON_NAME, case, invoke_modal, synthetic, watcher
+from .weights import falloff_errors, rigged_grid, select_pose_bones
+
+
+def one_step_per_tick():
+    """Has chunked operators run a single step per timer tick, so Esc
+    lands halfway through even on small fixtures."""
+    sys.modules[ADDON_NAME + ".chunked"].CHUNK_TIME = 0.0
+
+
+def all_group_weights(mesh):
+    """Group names, in order, and their (groups, vertices) weights."""
+    names = mesh.vertex_groups.keys()
+    weights = np.zeros((len(names), len(mesh.data.vertices)))
+    for vert in mesh.data.vertices:
+        for elem in vert.groups:
+            weights[elem.group, vert.index] = elem.weight
+    return names, weights
+
+
+@case("armature.adh_bind_to_bone")
+def invoke_falloff(vertex_count=100000, bone_count=4, radius=0.75, curve='SMOOTH'):
+    # The falloff waits on executor futures between timer ticks.
+    armature, mesh = rigged_grid(vertex_count, bone_count)
+    active = synthetic.BONE_NAME % 1
+    before = synthetic.group_weights(mesh, active)
+    select_pose_bones(armature, [active])
+    synthetic.select(armature, mesh, mode='POSE')
+    yield 0.0
+    result = yield from invoke_modal("armature.adh_bind_to_bone", mode='FALLOFF', falloff_radius=radius,
+                                     falloff_curve=curve, falloff_blend='REPLACE', set_as_parent=False)
+    errors = falloff_errors(armature, mesh, active, radius, curve, before)
+    errors.update({"result": result, "runs": watcher.count("armature.adh_bind_to_bone"),
+                   "modifiers": [(m.type, m.object.name) for m in mesh.modifiers if m.type == 'ARMATURE']})
+    return errors
+
+
+@case("armature.adh_remove_vertex_groups_unselected_bones")
+def cancel_remove_groups(vertex_count=5000, bone_count=100):
+    armature, mesh = rigged_grid(vertex_count, bone_count)
+    mesh.vertex_groups[synthetic.BONE_NAME % 3].lock_weight = True
+    mesh.vertex_groups.active_index = 7
+    names, before = all_group_weights(mesh)
+    select_pose_bones(armature, [synthetic.BONE_NAME % 1])
+    synthetic.select(armature, mesh, mode='POSE')
+    one_step_per_tick()
+    yield 0.0
+
+    def some_removed():
+        return len(mesh.vertex_groups) < bone_count - 5
+    result = yield from invoke_modal("armature.adh_remove_vertex_groups_unselected_bones",
+                                     cancel_when=some_removed)
+    names_after, after = all_group_weights(mesh)
+    return {"result": result, "names_restored": names_after == names,
+            "weights_restored": bool(np.array_equal(after, before)),
+            "locked": [vg.name for vg in mesh.vertex_groups if vg.lock_weight],
+            "active_group": mesh.vertex_groups.active_index}
+
+
+@case("armature.adh_bind_to_bone")
+def cancel_bind(vertex_count=5000, bone_count=100):
+    armature, mesh = rigged_grid(vertex_count, bone_count)
+    names, before = all_group_weights(mesh)
+    select_pose_bones(armature, [synthetic.BONE_NAME % 1])
+    synthetic.select(armature, mesh, mode='POSE')
+    one_step_per_tick()
+    yield 0.0
+
+    def parented():
+        return mesh.parent == armature
+    result = yield from invoke_modal("armature.adh_bind_to_bone", cancel_when=parented,
+                                     mode='ACTIVE', set_as_parent=True)
+    names_after, after = all_group_weights(mesh)
+    return {"result": result, "parent": mesh.parent.name if mesh.parent else None,
+            "modifiers": [m.type for m in mesh.modifiers],
+            "names_restored": names_after == names,
+            "weights_restored": bool(np.array_equal(after, before)),
+            "mode": armature.mode}
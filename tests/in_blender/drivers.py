@@ -0,0 +1,49 @@
+import bpy
+import numpy as np
+
+from . import call, case, synthetic
+
+
+@case("object.adh_map_shape_keys_to_bones")
+def map_shape_keys(key_count=8, slider_distance=0.2):
+    armature = synthetic.make_armature(key_count)
+    for bone in armature.data.bones:
+        bone.name = bone.name.replace("bone.", "key.")
+    mesh = synthetic.make_grid(100)
+    synthetic.make_shape_keys(mesh, key_count)
+    driven = [synthetic.KEY_NAME % index for index in range(0, key_count, 2)]
+    for bone in armature.data.bones:
+        bone.select = bone.name in driven
+    synthetic.select(mesh, armature, active=mesh)
+    call("object.adh_map_shape_keys_to_bones", slider_axis='LOC_X', slider_distance=slider_distance)
+
+    shape_keys = mesh.data.shape_keys
+    drivers = {}
+    for fcurve in shape_keys.animation_data.drivers:
+        driver = fcurve.driver
+        target = driver.variables[0].targets[0]
+        drivers[fcurve.data_path] = [driver.expression, target.id.name, target.bone_target,
+                                     target.transform_type]
+    for name in driven:
+        armature.pose.bones[name].location.x = slider_distance / 2
+    bpy.context.view_layer.update()
+    return {"drivers": drivers,
+            "values": {key.name: round(key.value, 4) for key in shape_keys.key_blocks}}
+
+
+@case("object.adh_analyze_shape_keys")
+def analyze_shape_keys(vertex_count=1000, key_count=4):
+    mesh = synthetic.make_grid(vertex_count)
+    moved = synthetic.make_shape_keys(mesh, key_count)
+    synthetic.select(mesh)
+    call("object.adh_analyze_shape_keys", remove_dead=True, limit_sparse=True, sparse_ratio=0.5)
+
+    key_blocks = mesh.data.shape_keys.key_blocks
+    limited = {}
+    for key in key_blocks:
+        if key.vertex_group:
+            members = np.flatnonzero(synthetic.group_weights(mesh, key.vertex_group) > 0)
+            expected = moved.get(key.name, moved[synthetic.KEY_NAME % 0])
+            limited[key.name] = [key.vertex_group, bool(np.array_equal(members, expected))]
+    return {"keys": [key.name for key in key_blocks], "limited": limited,
+            "report": bpy.data.texts["Shape Key Analysis"].as_string().splitlines()}
@@ -0,0 +1,107 @@
+import bpy
+
+from . import call, case, require_bone_layers, synthetic
+
+HOOK_PREFIX = "hook-"
+
+
+def select_bones(armature, names):
+    for bone in armature.data.bones:
+        bone.select = bone.select_head = bone.select_tail = bone.name in names
+    armature.data.bones.active = armature.data.bones[names[0]]
+
+
+def pose_error(armature, names):
+    """Largest difference between the pose matrices of the bones and
+    their hooks, with every hook moved."""
+    for index, name in enumerate(names):
+        hook = armature.pose.bones[HOOK_PREFIX + name]
+        hook.location = (0.1 * index, 0.2, -0.1)
+        hook.rotation_quaternion = (0.9, 0.1 * index, 0.2, 0.0)
+    bpy.context.view_layer.update()
+    error = 0.0
+    for name in names:
+        bone = armature.pose.bones[name].matrix
+        hook = armature.pose.bones[HOOK_PREFIX + name].matrix
+        error = max(error, max(abs(a - b) for bone_row, hook_row in zip(bone, hook)
+                               for a, b in zip(bone_row, hook_row)))
+    for name in names:
+        hook = armature.pose.bones[HOOK_PREFIX + name]
+        hook.location = (0.0, 0.0, 0.0)
+        hook.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+    bpy.context.view_layer.update()
+    return error
+
+
+@case("armature.adh_create_hooks", "armature.adh_parent_bones_to_hooks")
+def bone_hooks(bone_count=8, bone_hook_mode='CONSTRAINT'):
+    require_bone_layers()
+    armature = synthetic.make_armature(bone_count)
+    names = [synthetic.BONE_NAME % index for index in range(bone_count)]
+    select_bones(armature, names)
+    synthetic.select(armature, mode='POSE')
+    call("armature.adh_create_hooks", bone_hook_mode=bone_hook_mode)
+
+    bones = armature.data.bones
+    result = {
+        "hooks": sorted(bone.name for bone in bones if bone.name.startswith(HOOK_PREFIX)),
+        "rest_error": max((bones[HOOK_PREFIX + name].head_local - bones[name].head_local).length
+                          + (bones[HOOK_PREFIX + name].tail_local - bones[name].tail_local).length
+                          for name in names),
+        "constraints": sorted({c.type for name in names for c in armature.pose.bones[name].constraints}),
+        "parents": sorted({bones[name].parent.name if bones[name].parent else "" for name in names}),
+        "deform": sorted({bones[HOOK_PREFIX + name].use_deform for name in names}),
+        "pose_error": pose_error(armature, names),
+        "mode": bpy.context.mode,
+    }
+    if bone_hook_mode == 'CONSTRAINT':
+        call("armature.adh_parent_bones_to_hooks", scope='ALL')
+        result["converted"] = {
+            "constraints": sum(len(armature.pose.bones[name].constraints) for name in names),
+            "parents": sorted({bones[name].parent.name for name in names if bones[name].parent}),
+            "pose_error": pose_error(armature, names),
+        }
+    return result
+
+
+@case("armature.adh_create_hooks")
+def symmetric_bone_hooks(bone_count=4, mirror_link='DRIVERS'):
+    require_bone_layers()
+    armature = synthetic.make_armature(bone_count, symmetric=True)
+    left = [synthetic.BONE_NAME % index + ".L" for index in range(bone_count)]
+    select_bones(armature, left)
+    synthetic.select(armature, mode='POSE')
+    call("armature.adh_create_hooks", symmetric=True, mirror_link=mirror_link)
+
+    hooks = sorted(bone.name for bone in armature.data.bones if bone.name.startswith(HOOK_PREFIX))
+    # Moving a left hook moves its right counterpart mirrored.
+    for index, name in enumerate(left):
+        armature.pose.bones[HOOK_PREFIX + name].location = (0.1, 0.05 * index, 0.2)
+    bpy.context.view_layer.update()
+    error = 0.0
+    for name in left:
+        source = armature.pose.bones[HOOK_PREFIX + name].matrix.translation
+        target = armature.pose.bones[HOOK_PREFIX + name[:-2] + ".R"].matrix.translation
+        error = max(error, abs(source.x + target.x), abs(source.y - target.y), abs(source.z - target.z))
+    return {"hooks": hooks, "mirror_error": error}
+
+
+@case("armature.adh_create_hooks")
+def lattice_hooks(resolution=3):
+    require_bone_layers()
+    armature = synthetic.make_armature(1)
+    lattice = synthetic.make_lattice((resolution, resolution, resolution), scale=(2.0, 2.0, 2.0))
+    for point in lattice.data.points:
+        point.select = True
+    synthetic.select(lattice, armature, active=lattice, mode='EDIT')
+    call("armature.adh_create_hooks", "armature.adh_create_hooks:lattice")
+
+    hook_modifiers = [m for m in lattice.modifiers if m.type == 'HOOK']
+    bones = armature.data.bones
+    head_error = max((armature.matrix_world @ bones[m.subtarget].head_local
+                      - lattice.matrix_world @ lattice.data.points[index].co).length
+                     for index, m in enumerate(hook_modifiers))
+    return {"points": len(lattice.data.points), "hooks": len([b for b in bones if b.name.startswith(HOOK_PREFIX)]),
+            "modifiers": len(hook_modifiers),
+            "targets": sorted({m.object.name for m in hook_modifiers}),
+            "head_error": head_error, "mode": bpy.context.mode}
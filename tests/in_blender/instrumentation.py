@@ -0,0 +1,26 @@
+"""Measurements of operator runs. Windowed cases, see
+conftest.run_windowed_case()."""
+
+import json
+import os
+import sys
+
+from . import ADDON_NAME, case, invoke, synthetic, temp_dir, watch, watcher
+
+
+@case("mesh.adh_mask_selected_vertices")
+def invoke_measured_once(vertex_count=1000):
+    # Its invoke() calls execute(), within the same measurement.
+    instrumentation = sys.modules[ADDON_NAME + ".instrumentation"]
+    path = os.path.join(temp_dir(), "profile.jsonl")
+    os.environ[sys.modules[ADDON_NAME + ".prefs"].PROFILE_ENV] = path
+    mesh = synthetic.make_grid(vertex_count)
+    synthetic.select(mesh)
+    watch()
+    yield 0.0
+    result = invoke("mesh.adh_mask_selected_vertices")
+    with open(path) as log_file:
+        entries = [json.loads(line) for line in log_file]
+    return {"result": sorted(result), "runs": watcher.count("mesh.adh_mask_selected_vertices"),
+            "history": len(instrumentation.history),
+            "entries": [(entry["operator"], entry["phase"]) for entry in entries]}
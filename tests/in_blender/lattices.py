@@ -0,0 +1,125 @@
+import os
+
+import bpy
+import numpy as np
+
+from . import call, case, synthetic, temp_dir
+
+
+def deform_lattice(lattice, amount=0.2):
+    """Pushes the lattice's +X points out along X."""
+    for point in lattice.data.points:
+        if point.co[0] > 0:
+            point.co_deform.x += amount
+
+
+@case("lattice.adh_bind_to_objects")
+def bind_to_lattice(vertex_count=1000):
+    mesh = synthetic.make_grid(vertex_count)
+    # Lattice covering x in [-1, 1] of the [-2, 2] grid.
+    lattice = synthetic.make_lattice(location=(0.0, 0.0, 0.5), scale=(2.0, 1.0, 2.0))
+    synthetic.select(lattice, mesh, active=lattice)
+    call("lattice.adh_bind_to_objects", create_vertex_group=True, falloff=0.0)
+    weights = synthetic.group_weights(mesh, lattice.name)
+    x = synthetic.read_co(mesh)[:, 0]
+    inside = np.abs(x) <= 1.0 + 1e-4
+    return {"modifiers": [(m.name, m.type, m.vertex_group) for m in mesh.modifiers],
+            "inside_weights": sorted(set(np.round(weights[inside], 3).tolist())),
+            "outside_weights": sorted(set(np.round(weights[~inside], 3).tolist()))}
+
+
+@case("object.adh_create_fitted_lattice")
+def fitted_lattice(vertex_count=1000, per_object=False, oriented=False):
+    meshes = [synthetic.make_grid(vertex_count, name="Mesh"),
+              synthetic.make_grid(vertex_count, name="Other", x_range=(3.0, 5.0))]
+    meshes[1].rotation_euler = (0.3, 0.0, 0.2)
+    synthetic.select(*meshes)
+    call("object.adh_create_fitted_lattice", per_object=per_object, oriented=oriented, margin=0.05)
+    lattices = [obj for obj in bpy.data.objects if obj.type == 'LATTICE']
+    outside = 0
+    for mesh in meshes:
+        lattice = next(m.object for m in mesh.modifiers if m.type == 'LATTICE')
+        to_lattice = np.array(lattice.matrix_world.inverted() @ mesh.matrix_world)
+        co = synthetic.read_co(mesh) @ to_lattice[:3, :3].T + to_lattice[:3, 3]
+        outside += int((np.abs(co) > 0.5 + 1e-4).any(axis=1).sum())
+    return {"lattices": sorted(obj.name for obj in lattices),
+            "resolutions": [[obj.data.points_u, obj.data.points_v, obj.data.points_w] for obj in lattices],
+            "outside": outside, "active": bpy.context.view_layer.objects.active.name}
+
+
+@case("mesh.adh_apply_lattices")
+def apply_lattices(vertex_count=1000, key_count=2):
+    mesh = synthetic.make_grid(vertex_count)
+    synthetic.make_shape_keys(mesh, key_count)
+    lattice = synthetic.make_lattice(scale=(4.2, 1.0, 1.2))
+    modifier = mesh.modifiers.new("Lattice", 'LATTICE')
+    modifier.object = lattice
+    deform_lattice(lattice)
+    synthetic.select(mesh)
+    expected = synthetic.evaluated_co(mesh)
+    original = synthetic.read_co(mesh)
+    call("mesh.adh_apply_lattices")
+    co = synthetic.read_co(mesh)
+    return {"shape_keys": mesh.data.shape_keys is not None,
+            "modifiers": [m.type for m in mesh.modifiers],
+            "moved": int((np.abs(co - original) > 1e-5).any(axis=1).sum()),
+            "max_error": float(np.abs(co - expected).max())}
+
+
+@case("object.adh_bake_lattice_cache")
+def bake_cache(vertex_count=1000, frames=10, cache_format='PC2'):
+    mesh = synthetic.make_grid(vertex_count)
+    lattice = synthetic.make_lattice(scale=(4.2, 1.0, 1.2))
+    deform_lattice(lattice)
+    modifier = mesh.modifiers.new("Lattice", 'LATTICE')
+    modifier.object = lattice
+    mesh.modifiers.new("After", 'SUBSURF').levels = 1
+    for frame, z in ((1, 0.0), (frames, 1.0)):
+        lattice.location.z = 0.5 + z
+        lattice.keyframe_insert("location", index=2, frame=frame)
+
+    scene = bpy.context.scene
+    expected = {}
+    mesh.modifiers["After"].show_viewport = False
+    for frame in (1, frames // 2, frames):
+        scene.frame_set(frame)
+        expected[frame] = synthetic.evaluated_co(mesh)
+    mesh.modifiers["After"].show_viewport = True
+    scene.frame_set(1)
+
+    synthetic.select(mesh)
+    directory = os.path.join(temp_dir(), "cache") + os.sep
+    call("object.adh_bake_lattice_cache", directory=directory, cache_format=cache_format,
+         use_scene_range=False, frame_start=1, frame_end=frames, swap_modifiers=True)
+
+    extension = ".pc2" if cache_format == 'PC2' else ".mdd"
+    baked = np.load(os.path.join(directory, "Mesh.npy"))
+    npy_error = max(float(np.abs(baked[frame - 1] - co).max()) for frame, co in expected.items())
+
+    # Read back through the Mesh Cache modifier, the later modifiers off.
+    mesh.modifiers["After"].show_viewport = False
+    cache_error = 0.0
+    for frame, co in expected.items():
+        scene.frame_set(frame)
+        cache_error = max(cache_error, float(np.abs(synthetic.evaluated_co(mesh) - co).max()))
+    return {"npy_shape": list(baked.shape),
+            "cache_size": os.path.getsize(os.path.join(directory, "Mesh" + extension)),
+            "modifiers": [(m.type, m.show_viewport) for m in mesh.modifiers],
+            "npy_error": npy_error, "cache_error": cache_error}
+
+
+@case("object.adh_bake_lattice_cache")
+def bake_empty_range(vertex_count=100):
+    mesh = synthetic.make_grid(vertex_count)
+    mesh.modifiers.new("Lattice", 'LATTICE').object = synthetic.make_lattice()
+    synthetic.select(mesh)
+    directory = os.path.join(temp_dir(), "cache") + os.sep
+    # The error report makes bpy.ops raise.
+    try:
+        bpy.ops.object.adh_bake_lattice_cache(directory=directory, use_scene_range=False,
+                                              frame_start=10, frame_end=9)
+        error = None
+    except RuntimeError as raised:
+        error = str(raised)
+    return {"error": error, "written": os.path.exists(directory),
+            "modifiers": [(m.type, m.show_viewport) for m in mesh.modifiers]}
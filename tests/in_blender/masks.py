@@ -0,0 +1,75 @@
+import bpy
+import numpy as np
+
+from . import call, case, synthetic
+
+MASK_NAME = "Z_ADH_MASK"
+
+
+def mask_state(obj):
+    modifier = obj.modifiers.get(MASK_NAME)
+    return {"masked": int((synthetic.group_weights(obj, MASK_NAME) > 0).sum()),
+            "modifier": modifier.type if modifier else None,
+            "group": MASK_NAME in obj.vertex_groups}
+
+
+def set_mask(obj, mask):
+    vg = obj.vertex_groups.get(MASK_NAME) or obj.vertex_groups.new(name=MASK_NAME)
+    vg.remove(list(range(len(obj.data.vertices))))
+    vg.add(np.flatnonzero(mask).tolist(), 1.0, 'REPLACE')
+
+
+@case("mesh.adh_mask_selected_vertices", "mesh.adh_delete_mask")
+def mask_selected(vertex_count=1000):
+    mesh = synthetic.make_grid(vertex_count)
+    x = synthetic.read_co(mesh)[:, 0]
+    synthetic.select(mesh)
+
+    mesh.data.vertices.foreach_set("select", (x < 0.5).tolist())
+    call("mesh.adh_mask_selected_vertices", action='add')
+    added = mask_state(mesh)
+    mesh.data.vertices.foreach_set("select", (x < -0.5).tolist())
+    call("mesh.adh_mask_selected_vertices", action='remove')
+    removed = mask_state(mesh)
+    masked = synthetic.group_weights(mesh, MASK_NAME) > 0
+    call("mesh.adh_delete_mask")
+    return {"added": added, "expected_added": int((x < 0.5).sum()),
+            "removed": removed, "expected_removed": int(((x >= -0.5) & (x < 0.5)).sum()),
+            "exact": bool((masked == ((x >= -0.5) & (x < 0.5))).all()),
+            "deleted": mask_state(mesh)}
+
+
+@case("mesh.adh_grow_mask")
+def grow_mask(vertex_count=1000, steps=2):
+    mesh = synthetic.make_grid(vertex_count)
+    nx, nz = mesh["grid_shape"]
+    center = (nz // 2) * nx + nx // 2
+    mask = np.zeros(nx * nz, dtype=bool)
+    mask[center] = True
+    set_mask(mesh, mask)
+    synthetic.select(mesh)
+    call("mesh.adh_grow_mask", action='grow', steps=steps)
+    grown = mask_state(mesh)["masked"]
+    call("mesh.adh_grow_mask", action='shrink', steps=steps)
+    # Grid edges join 4 neighbors: a diamond of 2 s (s + 1) + 1 vertices.
+    return {"grown": grown, "expected_grown": 2 * steps * (steps + 1) + 1,
+            "shrunk": mask_state(mesh)["masked"], "mode": bpy.context.mode}
+
+
+@case("mesh.adh_mask_from_bones")
+def mask_from_bones(vertex_count=1000, bone_count=4, threshold=0.5):
+    armature = synthetic.make_armature(bone_count)
+    mesh = synthetic.make_grid(vertex_count, x_range=(-bone_count / 2.0, bone_count / 2.0))
+    synthetic.add_bone_groups(mesh, bone_count)
+    mesh.modifiers.new("Armature", 'ARMATURE').object = armature
+    selected = [synthetic.BONE_NAME % 0, synthetic.BONE_NAME % 1]
+    for bone in armature.data.bones:
+        bone.select = bone.name in selected
+    expected = np.zeros(len(mesh.data.vertices), dtype=bool)
+    for name in selected:
+        expected |= synthetic.group_weights(mesh, name) > threshold
+    synthetic.select(mesh)
+    call("mesh.adh_mask_from_bones", action='replace', threshold=threshold, steps=0)
+    masked = synthetic.group_weights(mesh, MASK_NAME) > 0
+    return {"masked": int(masked.sum()), "expected": int(expected.sum()),
+            "exact": bool((masked == expected).all())}
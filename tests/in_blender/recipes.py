@@ -0,0 +1,100 @@
+import json
+
+import bpy
+import numpy as np
+
+from . import call, case, invoke, synthetic
+
+
+def lattices():
+    return [obj for obj in bpy.data.objects if obj.type == 'LATTICE']
+
+
+def recipe_steps(name):
+    return [json.loads(line) for line in bpy.data.texts[name].as_string().splitlines() if line.strip()]
+
+
+@case("object.adh_create_fitted_lattice")
+def record_and_replay(vertex_count=1000):
+    mesh = synthetic.make_grid(vertex_count)
+    synthetic.select(mesh)
+    call("wm.adh_record_recipe", text_name="Recipe", append=False)
+    call("object.adh_create_fitted_lattice", create_vertex_group=True)
+    call("wm.adh_stop_recipe")
+    steps = recipe_steps("Recipe")
+
+    # Nothing changed: the step is skipped and its lattice kept.
+    lattices()[0]["kept"] = True
+    synthetic.select(mesh)
+    call("wm.adh_replay_recipe", text_name="Recipe")
+    unchanged = [(obj.name, "kept" in obj) for obj in lattices()]
+
+    # Moved vertices: the lattice is made again around them.
+    co = synthetic.read_co(mesh) * np.array([2.0, 1.0, 1.0], dtype=np.float32)
+    mesh.data.vertices.foreach_set("co", co.ravel())
+    mesh.data.update()
+    call("wm.adh_replay_recipe", text_name="Recipe")
+    changed = [(obj.name, "kept" in obj, list(obj.dimensions)) for obj in lattices()]
+    return {"steps": [(step["operator"], step["created"]) for step in steps],
+            "unchanged": unchanged, "changed": changed,
+            "modifiers": [(m.type, m.object.name) for m in mesh.modifiers]}
+
+
+@case("object.adh_create_fitted_lattice")
+def failed_replay(vertex_count=1000):
+    mesh = synthetic.make_grid(vertex_count)
+    synthetic.select(mesh)
+    call("wm.adh_record_recipe", text_name="Recipe", append=False)
+    call("object.adh_create_fitted_lattice", create_vertex_group=True)
+    call("wm.adh_stop_recipe")
+    lattices()[0]["kept"] = True
+
+    # A property value the operator can't take makes the step fail.
+    steps = recipe_steps("Recipe")
+    steps[0]["properties"]["create_vertex_group"] = "yes"
+    text = bpy.data.texts["Recipe"]
+    text.clear()
+    text.write("".join(json.dumps(step) + "\n" for step in steps))
+    synthetic.select(mesh)
+    try:
+        bpy.ops.wm.adh_replay_recipe(text_name="Recipe", force=True)
+        error = None
+    except RuntimeError as exception:
+        error = str(exception)
+    return {"error": error,
+            "lattices": [(obj.name, "kept" in obj, len(obj.users_collection)) for obj in lattices()],
+            "modifiers": [(m.type, m.object.name) for m in mesh.modifiers]}
+
+
+@case("object.adh_mirror_weights")
+def replay_weight_paint(vertex_count=1000):
+    mesh = synthetic.make_grid(vertex_count)
+    x = synthetic.read_co(mesh)[:, 0]
+    synthetic.set_weights(mesh.vertex_groups.new(name="side.L"), np.clip(x, 0.0, 1.0))
+    synthetic.select(mesh, mode='WEIGHT_PAINT')
+    call("wm.adh_record_recipe", text_name="Recipe", append=False)
+    call("object.adh_mirror_weights", direction='L_TO_R')
+    call("wm.adh_stop_recipe")
+    steps = recipe_steps("Recipe")
+    expected = synthetic.group_weights(mesh, "side.R")
+
+    # Replayed from object mode, the step goes back to weight paint.
+    synthetic.select(mesh)
+    mesh.vertex_groups.remove(mesh.vertex_groups["side.R"])
+    call("wm.adh_replay_recipe", text_name="Recipe", force=True)
+    return {"steps": [(step["operator"], step["selection"]["mode"]) for step in steps],
+            "replayed": bool(np.array_equal(synthetic.group_weights(mesh, "side.R"), expected)),
+            "mode": mesh.mode}
+
+
+@case("mesh.adh_mask_selected_vertices")
+def record_invoked(vertex_count=1000):
+    # Its invoke() calls execute(), still a single step. Windowed, see
+    # conftest.run_windowed_case().
+    mesh = synthetic.make_grid(vertex_count)
+    synthetic.select(mesh)
+    yield 0.0
+    call("wm.adh_record_recipe", text_name="Recipe", append=False)
+    invoke("mesh.adh_mask_selected_vertices")
+    call("wm.adh_stop_recipe")
+    return {"steps": [step["operator"] for step in recipe_steps("Recipe")]}
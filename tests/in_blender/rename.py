@@ -0,0 +1,30 @@
+import bpy
+
+from . import call, case, synthetic
+
+
+@case("object.adh_rename_regex")
+def objects():
+    objs = [synthetic.link(bpy.data.objects.new(name, None)) for name in ("L_arm", "L_leg", "R_arm", "other")]
+    synthetic.select(*objs[:3])
+    call("object.adh_rename_regex", regex_search_pattern=r"^([LR])_(.*)$",
+         regex_replacement_string=r"\2.\1")
+    return {"names": sorted(obj.name for obj in bpy.data.objects)}
+
+
+@case("object.adh_rename_regex")
+def bones(bone_count=8):
+    armature = synthetic.make_armature(bone_count)
+    selected = [synthetic.BONE_NAME % index for index in range(0, bone_count, 2)]
+    for bone in armature.data.bones:
+        bone.select = bone.name in selected
+    synthetic.select(armature, mode='POSE')
+    call("object.adh_rename_regex", regex_search_pattern=r"^bone\.", regex_replacement_string="pose.")
+    pose_names = sorted(bone.name for bone in armature.data.bones)
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    for bone in armature.data.edit_bones:
+        bone.select = bone.name.startswith("bone.")
+    call("object.adh_rename_regex", regex_search_pattern=r"^bone\.", regex_replacement_string="edit.")
+    bpy.ops.object.mode_set(mode='OBJECT')
+    return {"pose_names": pose_names, "edit_names": sorted(bone.name for bone in armature.data.bones)}
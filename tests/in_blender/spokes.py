@@ -0,0 +1,53 @@
+import bpy
+import numpy as np
+
+from . import call, case, require_bone_layers, synthetic
+
+
+@case("armature.adh_create_spokes")
+def spokes(vertex_count=1000, spoke_count=16, parent=False, tip=False):
+    require_bone_layers()
+    armature = synthetic.make_armature(1)
+    armature.location = (0.5, -1.0, 0.25)
+    mesh = synthetic.make_grid(vertex_count)
+    mesh.rotation_euler = (0.0, 0.0, 0.5)
+    selected = np.linspace(0, len(mesh.data.vertices) - 1, spoke_count).astype(int)
+    mask = np.zeros(len(mesh.data.vertices), dtype=bool)
+    mask[selected] = True
+    mesh.data.vertices.foreach_set("select", mask.tolist())
+    bpy.context.scene.cursor.location = (0.0, 0.0, 2.0)
+    bpy.context.view_layer.update()
+    expected = [armature.matrix_world.inverted() @ mesh.matrix_world @ mesh.data.vertices[index].co
+                for index in selected]
+    synthetic.select(mesh, armature, active=mesh, mode='EDIT')
+    call("armature.adh_create_spokes", basename="spoke", parent=parent, tip=tip)
+
+    bones = armature.data.bones
+    cursor = armature.matrix_world.inverted() @ bpy.context.scene.cursor.location
+    names = ["spoke.%d" % index for index in range(spoke_count)]
+    return {
+        "bones": sorted(bone.name for bone in bones),
+        "tail_error": max((bones[name].tail_local - co).length for name, co in zip(names, expected)),
+        "head_error": max((bones[name].head_local - cursor).length for name in names),
+        "constraints": sorted({(c.type, c.subtarget) for name in names
+                               for c in armature.pose.bones[name].constraints}),
+        "active": bpy.context.view_layer.objects.active.name,
+    }
+
+
+@case("armature.adh_create_spokes")
+def spoke_tips(bone_count=8):
+    require_bone_layers()
+    armature = synthetic.make_armature(bone_count)
+    for bone in armature.data.bones:
+        bone.select = True
+    synthetic.select(armature, mode='POSE')
+    call("armature.adh_create_spokes", tip=True)
+    names = [synthetic.BONE_NAME % index for index in range(bone_count)]
+    bones = armature.data.bones
+    return {
+        "tips": sorted(bone.name for bone in bones if bone.name.startswith("tip-")),
+        "tip_error": max((bones["tip-" + name].head_local - bones[name].tail_local).length for name in names),
+        "constraints": sorted({(c.type, c.subtarget) for name in names
+                               for c in armature.pose.bones[name].constraints}),
+    }
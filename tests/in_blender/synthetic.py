@@ -0,0 +1,195 @@
+"""Deterministic synthetic fixtures: armatures with N bones, meshes with N
+vertices and K vertex groups, lattices at a given resolution and meshes
+with M shape keys. Built with plain bpy and NumPy, not with the add-on's
+own helpers, so the cases check the add-on against independent data.
+
+Bones stand upright along the X axis, BONE_SPACING apart: bone i goes
+from (x_i, 0, 0) to (x_i, 0, BONE_LENGTH). Grid meshes lie in the XZ
+plane over the same span, so every vertex has bones nearby."""
+
+import math
+
+import bpy
+import numpy as np
+
+BONE_NAME = "bone.%03d"
+KEY_NAME = "key.%03d"
+BONE_SPACING = 1.0
+BONE_LENGTH = 1.0
+
+
+def clear_scene():
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for collection in (bpy.data.objects, bpy.data.meshes, bpy.data.armatures,
+                       bpy.data.lattices, bpy.data.texts, bpy.data.actions):
+        for block in list(collection):
+            collection.remove(block)
+    scene = bpy.context.scene
+    scene.cursor.location = (0.0, 0.0, 0.0)
+    scene.frame_set(1)
+
+
+def link(obj):
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def select(*objects, active=None, mode='OBJECT'):
+    """Selects exactly the objects, makes active (default: the first)
+    the active object and switches it to mode."""
+    view_layer = bpy.context.view_layer
+    if view_layer.objects.active is not None and view_layer.objects.active.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for obj in view_layer.objects:
+        obj.select_set(obj in objects)
+    view_layer.objects.active = active or objects[0]
+    if mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode=mode)
+    return view_layer.objects.active
+
+
+def bone_x(index, bone_count):
+    """X of bone index, the row of bones centered on the origin."""
+    return (index - (bone_count - 1) / 2.0) * BONE_SPACING
+
+
+def make_armature(bone_count=4, name="Armature", symmetric=False):
+    """Upright bones named BONE_NAME % i. With symmetric, bone_count
+    pairs named BONE_NAME + ".L" at +X and ".R" at -X instead."""
+    armature = link(bpy.data.objects.new(name, bpy.data.armatures.new(name)))
+    select(armature, mode='EDIT')
+    edit_bones = armature.data.edit_bones
+    if symmetric:
+        layout = [((BONE_NAME % index) + suffix, sign * (index + 1) * BONE_SPACING)
+                  for index in range(bone_count) for suffix, sign in ((".L", 1.0), (".R", -1.0))]
+    else:
+        layout = [(BONE_NAME % index, bone_x(index, bone_count)) for index in range(bone_count)]
+    for bone_name, x in layout:
+        bone = edit_bones.new(bone_name)
+        bone.head = (x, 0.0, 0.0)
+        bone.tail = (x, 0.0, BONE_LENGTH)
+    bpy.ops.object.mode_set(mode='OBJECT')
+    return armature
+
+
+def grid_coordinates(vertex_count, x_range, z_range):
+    """(nx, nz, co) of a grid of about vertex_count points."""
+    width = x_range[1] - x_range[0]
+    height = z_range[1] - z_range[0]
+    nx = max(2, int(round(math.sqrt(vertex_count * width / height))))
+    nz = max(2, int(round(vertex_count / nx)))
+    x, z = np.meshgrid(np.linspace(x_range[0], x_range[1], nx),
+                       np.linspace(z_range[0], z_range[1], nz))
+    co = np.stack([x.ravel(), np.zeros(nx * nz), z.ravel()], axis=1)
+    return nx, nz, co
+
+
+def make_grid(vertex_count=1000, name="Mesh", x_range=(-2.0, 2.0), z_range=(0.0, 1.0)):
+    """Quad grid in the XZ plane, vertices ordered row by row along X."""
+    nx, nz, co = grid_coordinates(vertex_count, x_range, z_range)
+    rows = np.arange(nx * nz).reshape(nz, nx)
+    faces = np.stack([rows[:-1, :-1], rows[:-1, 1:], rows[1:, 1:], rows[1:, :-1]], axis=-1).reshape(-1, 4)
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(co.tolist(), [], faces.tolist())
+    mesh.update()
+    obj = link(bpy.data.objects.new(name, mesh))
+    obj["grid_shape"] = (nx, nz)
+    return obj
+
+
+def make_cubes(centers, size=0.1, name="Parts"):
+    """One loose cube per center."""
+    corners = np.array([(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=float) * size / 2
+    quads = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    co = []
+    faces = []
+    for index, center in enumerate(centers):
+        co.extend((corners + center).tolist())
+        faces.extend([[corner + index * 8 for corner in quad] for quad in quads])
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(co, [], faces)
+    mesh.update()
+    return link(bpy.data.objects.new(name, mesh))
+
+
+def read_co(obj):
+    co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
+def set_weights(vg, weights, decimals=3):
+    """Sets vertex group weights from an array over all vertices,
+    leaving out zeros."""
+    weights = np.round(np.asarray(weights, dtype=np.float64), decimals)
+    for value in np.unique(weights[weights > 0]):
+        vg.add(np.flatnonzero(weights == value).tolist(), float(value), 'REPLACE')
+
+
+def group_weights(obj, name):
+    """Weights of the vertex group over all vertices, 0 where absent."""
+    weights = np.zeros(len(obj.data.vertices))
+    vg = obj.vertex_groups.get(name)
+    if vg is None:
+        return weights
+    for vert in obj.data.vertices:
+        for elem in vert.groups:
+            if elem.group == vg.index:
+                weights[vert.index] = elem.weight
+    return weights
+
+
+def add_bone_groups(obj, bone_count):
+    """A group per bone of make_armature(bone_count), weighted by
+    distance along X with a linear falloff over BONE_SPACING."""
+    x = read_co(obj)[:, 0]
+    for index in range(bone_count):
+        vg = obj.vertex_groups.new(name=BONE_NAME % index)
+        set_weights(vg, 1.0 - np.abs(x - bone_x(index, bone_count)) / BONE_SPACING)
+
+
+def make_lattice(resolution=(4, 4, 4), name="Lattice", location=(0.0, 0.0, 0.5), scale=(1.0, 1.0, 1.0)):
+    data = bpy.data.lattices.new(name)
+    data.points_u, data.points_v, data.points_w = resolution
+    lattice = link(bpy.data.objects.new(name, data))
+    lattice.location = location
+    lattice.scale = scale
+    return lattice
+
+
+def make_shape_keys(obj, key_count, offset=0.1):
+    """Basis plus key_count keys named KEY_NAME % i, key i moving every
+    vertex with index % key_count == i by offset along Z, then a "dead"
+    key moving nothing and a copy of the first key."""
+    co = read_co(obj)
+    obj.shape_key_add(name="Basis", from_mix=False)
+    moved = {}
+    for index in range(key_count):
+        name = KEY_NAME % index
+        key = obj.shape_key_add(name=name, from_mix=False)
+        key_co = co.copy()
+        indices = np.arange(index, len(co), key_count)
+        key_co[indices, 2] += offset
+        key.data.foreach_set("co", key_co.ravel())
+        moved[name] = indices
+    obj.shape_key_add(name="dead", from_mix=False)
+    if key_count:
+        copy = obj.shape_key_add(name=KEY_NAME % 0 + ".copy", from_mix=False)
+        key_co = co.copy()
+        key_co[moved[KEY_NAME % 0], 2] += offset
+        copy.data.foreach_set("co", key_co.ravel())
+    obj.data.update()
+    return moved
+
+
+def evaluated_co(obj):
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+    finally:
+        obj_eval.to_mesh_clear()
+    return co.reshape(-1, 3)
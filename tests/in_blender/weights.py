@@ -0,0 +1,147 @@
+import numpy as np
+
+from . import call, case, synthetic
+
+
+def rigged_grid(vertex_count, bone_count):
+    armature = synthetic.make_armature(bone_count)
+    mesh = synthetic.make_grid(vertex_count, x_range=(-bone_count / 2.0, bone_count / 2.0))
+    synthetic.add_bone_groups(mesh, bone_count)
+    return armature, mesh
+
+
+def select_pose_bones(armature, names, active=None):
+    for bone in armature.data.bones:
+        bone.select = bone.name in names
+    armature.data.bones.active = armature.data.bones[active or names[0]]
+
+
+def group_members(mesh):
+    return {vg.name: int((synthetic.group_weights(mesh, vg.name) > 0).sum()) for vg in mesh.vertex_groups}
+
+
+def segment_distances(co, head, tail):
+    direction = tail - head
+    t = np.clip((co - head) @ direction / direction.dot(direction), 0.0, 1.0)
+    return np.linalg.norm(co - head - t[:, np.newaxis] * direction, axis=1)
+
+
+# Proportional editing falloffs, from t = distance / radius.
+FALLOFF_CURVES = {
+    'SMOOTH': lambda t: (1.0 - t) ** 2 * (1.0 + 2.0 * t),
+    'SPHERE': lambda t: np.sqrt(1.0 - t * t),
+    'ROOT': lambda t: np.sqrt(1.0 - t),
+    'SHARP': lambda t: (1.0 - t) ** 2,
+    'LINEAR': lambda t: 1.0 - t,
+    'CONSTANT': lambda t: (t < 1.0).astype(float),
+}
+
+
+def falloff_errors(armature, mesh, name, radius, curve, before):
+    """Compares the bone's group with the falloff from its segment:
+    within the radius it should follow the curve, beyond it vertices
+    should have left the group."""
+    bone = armature.data.bones[name]
+    head = np.array(armature.matrix_world @ bone.head_local)
+    tail = np.array(armature.matrix_world @ bone.tail_local)
+    matrix = np.array(mesh.matrix_world)
+    distances = segment_distances(synthetic.read_co(mesh) @ matrix[:3, :3].T + matrix[:3, 3], head, tail)
+    expected = FALLOFF_CURVES[curve](np.clip(distances / radius, 0.0, 1.0))
+    weights = synthetic.group_weights(mesh, name)
+    index = mesh.vertex_groups[name].index
+    members = np.array([any(elem.group == index for elem in vert.groups) for vert in mesh.data.vertices])
+    # Weights rounding to zero may go either way, leave them out.
+    inside = expected >= 1e-3
+    outside = distances > radius * (1.0 + 1e-5)
+    return {"inside": int(inside.sum()), "outside": int(outside.sum()),
+            "inside_error": float(np.abs(weights[inside] - expected[inside]).max()),
+            "outside_before": int((before[outside] > 0).sum()),
+            "outside_members": int(members[outside].sum())}
+
+
+@case("armature.adh_remove_vertex_groups_unselected_bones")
+def remove_unselected_groups(vertex_count=1000, bone_count=8):
+    armature, mesh = rigged_grid(vertex_count, bone_count)
+    mesh.vertex_groups.new(name="locked").lock_weight = True
+    mesh.vertex_groups.new(name="other")
+    select_pose_bones(armature, [synthetic.BONE_NAME % 0, synthetic.BONE_NAME % 1])
+    synthetic.select(armature, mesh, mode='POSE')
+    call("armature.adh_remove_vertex_groups_unselected_bones")
+    return {"groups": sorted(vg.name for vg in mesh.vertex_groups)}
+
+
+@case("armature.adh_bind_to_bone")
+def bind_active(vertex_count=1000, bone_count=8):
+    armature, mesh = rigged_grid(vertex_count, bone_count)
+    active = synthetic.BONE_NAME % 2
+    select_pose_bones(armature, [active])
+    synthetic.select(armature, mesh, mode='POSE')
+    call("armature.adh_bind_to_bone", mode='ACTIVE')
+    weights = synthetic.group_weights(mesh, active)
+    return {"members": group_members(mesh), "vertices": len(mesh.data.vertices),
+            "weights": sorted(set(weights.round(3).tolist())),
+            "modifiers": [(m.type, m.object.name) for m in mesh.modifiers if m.type == 'ARMATURE'],
+            "parent": mesh.parent.name if mesh.parent else None}
+
+
+@case("armature.adh_bind_to_bone")
+def bind_nearest(bone_count=8, parts_per_bone=4):
+    armature = synthetic.make_armature(bone_count)
+    # Loose cubes scattered around each bone, closest to it.
+    centers = [(synthetic.bone_x(index, bone_count) + 0.2 * (part % 2 - 0.5), 0.1 * part, 0.25 * part)
+               for index in range(bone_count) for part in range(parts_per_bone)]
+    mesh = synthetic.make_cubes(centers)
+    select_pose_bones(armature, [synthetic.BONE_NAME % 0])
+    synthetic.select(armature, mesh, mode='POSE')
+    call("armature.adh_bind_to_bone", "armature.adh_bind_to_bone:nearest", mode='NEAREST')
+    per_part = len(mesh.data.vertices) // len(centers)
+    wrong = 0
+    for index in range(bone_count):
+        weights = synthetic.group_weights(mesh, synthetic.BONE_NAME % index)
+        expected = np.zeros(len(weights), dtype=bool)
+        expected[index * parts_per_bone * per_part:(index + 1) * parts_per_bone * per_part] = True
+        wrong += int(((weights == 1.0) != expected).sum())
+    return {"members": group_members(mesh), "wrong": wrong}
+
+
+@case("armature.adh_bind_to_bone")
+def bind_falloff(vertex_count=1000, bone_count=4, radius=0.75, curve='LINEAR'):
+    armature, mesh = rigged_grid(vertex_count, bone_count)
+    armature.location = (0.25, 0.0, 0.0)
+    active = synthetic.BONE_NAME % 1
+    other = synthetic.BONE_NAME % 0
+    before = synthetic.group_weights(mesh, active)
+    before_other = synthetic.group_weights(mesh, other)
+    select_pose_bones(armature, [active])
+    synthetic.select(armature, mesh, mode='POSE')
+    call("armature.adh_bind_to_bone", "armature.adh_bind_to_bone:falloff", mode='FALLOFF',
+         falloff_radius=radius, falloff_curve=curve, falloff_blend='REPLACE', set_as_parent=False)
+    result = falloff_errors(armature, mesh, active, radius, curve, before)
+    result.update({"other_unchanged": bool((synthetic.group_weights(mesh, other) == before_other).all()),
+                   "parent": mesh.parent.name if mesh.parent else None})
+    return result
+
+
+@case("object.adh_mirror_weights")
+def mirror_weights(vertex_count=1000):
+    mesh = synthetic.make_grid(vertex_count)
+    co = synthetic.read_co(mesh)
+    x, z = co[:, 0], co[:, 2]
+    left = np.where(x > 0, (x / 2.0) * (1.0 - z / 2.0), 0.0)
+    synthetic.set_weights(mesh.vertex_groups.new(name="side.L"), left)
+    center = np.clip(0.5 + x / 4.0, 0.0, 1.0)
+    synthetic.set_weights(mesh.vertex_groups.new(name="center"), center)
+    synthetic.select(mesh)
+    call("object.adh_mirror_weights", direction='L_TO_R', symmetrize_center=True)
+
+    # The grid is symmetric: vertex (row, column) mirrors (row, nx - 1 - column).
+    nx, nz = mesh["grid_shape"]
+    mirror = np.arange(nx * nz).reshape(nz, nx)[:, ::-1].ravel()
+    right = synthetic.group_weights(mesh, "side.R")
+    centered = synthetic.group_weights(mesh, "center")
+    source_left = synthetic.group_weights(mesh, "side.L")
+    target = x <= 0
+    return {"groups": sorted(vg.name for vg in mesh.vertex_groups),
+            "side_error": float(np.abs(right - source_left[mirror]).max()),
+            "center_error": float(np.abs(centered[target] - centered[mirror][target]).max()),
+            "center_kept": bool((np.abs(centered[~target] - center[~target].round(3)) < 1e-3).all())}
@@ -0,0 +1,174 @@
+import os
+
+import bpy
+import numpy as np
+
+from . import call, case, require_version, synthetic
+
+
+def pose_armature(bone_count, selected=None, active=0):
+    """Armature in pose mode with the bones selected (default all)."""
+    armature = synthetic.make_armature(bone_count)
+    selected = range(bone_count) if selected is None else selected
+    names = {synthetic.BONE_NAME % index for index in selected}
+    for bone in armature.data.bones:
+        bone.select = bone.name in names
+    armature.data.bones.active = armature.data.bones[synthetic.BONE_NAME % active]
+    synthetic.select(armature, mode='POSE')
+    return armature
+
+
+def shape_names(armature):
+    return {bone.name: bone.custom_shape.name if bone.custom_shape else None
+            for bone in armature.pose.bones}
+
+
+@case("armature.adh_create_shape")
+def create_shape(bone_count=4, shape="ring"):
+    armature = pose_armature(bone_count)
+    call("armature.adh_create_shape", widget_shape=shape, widget_size=0.5)
+    widget = armature.pose.bones[synthetic.BONE_NAME % 0].custom_shape
+    bone = armature.data.bones[synthetic.BONE_NAME % 0]
+    head = armature.matrix_world @ bone.head_local
+    return {"shapes": shape_names(armature), "widget_vertices": len(widget.data.vertices),
+            "widget_location": list(widget.matrix_world.translation), "bone_head": list(head),
+            "widget_collections": [c.name for c in widget.users_collection]}
+
+
+@case("armature.adh_create_shape", "armature.adh_share_shapes")
+def shared_shapes(bone_count=6):
+    require_version((3, 0, 0), "Shared widgets")
+    armature = pose_armature(bone_count, selected=range(bone_count // 2))
+    call("armature.adh_create_shape", "armature.adh_create_shape:shared",
+         widget_shape="square", widget_size=0.5, widget_pos=0.25, shared=True)
+    shared = {bone.name: [list(bone.custom_shape_translation), list(bone.custom_shape_scale_xyz)]
+              for bone in armature.pose.bones if bone.custom_shape is not None}
+
+    # Per-bone widgets of one shape at different sizes, then shared.
+    for index in range(bone_count // 2, bone_count):
+        for bone in armature.data.bones:
+            bone.select = bone.name == synthetic.BONE_NAME % index
+        armature.data.bones.active = armature.data.bones[synthetic.BONE_NAME % index]
+        call("armature.adh_create_shape", widget_shape="ring", widget_size=0.2 + 0.1 * index,
+             widget_pos=0.5, shared=False)
+    before = shape_names(armature)
+    call("armature.adh_share_shapes", scope='ALL')
+    return {"shared": shared, "before": before, "after": shape_names(armature),
+            "widgets": sorted(obj.name for obj in bpy.data.objects if obj.name.startswith("WGT-"))}
+
+
+@case("armature.adh_select_shape", "object.adh_finish_edit_shape")
+def select_and_finish(bone_count=3):
+    armature = pose_armature(bone_count, selected=[1], active=1)
+    call("armature.adh_create_shape", widget_shape="sphere")
+    widget = armature.pose.bones[synthetic.BONE_NAME % 1].custom_shape
+
+    call("armature.adh_select_shape", isolate=False)
+    selecting = {"active": bpy.context.view_layer.objects.active.name, "mode": bpy.context.mode,
+                 "visible": widget.visible_get()}
+    call("object.adh_finish_edit_shape")
+    return {"selecting": selecting, "widget": widget.name,
+            "active": bpy.context.view_layer.objects.active.name, "mode": bpy.context.mode,
+            "visible": widget.visible_get(), "active_bone": armature.data.bones.active.name,
+            "in_scene_collection": widget.name in bpy.context.scene.collection.objects}
+
+
+@case("object.adh_select_shape_users", "armature.adh_replace_shape",
+      "armature.adh_use_same_shape", "object.adh_remove_unused_shapes")
+def shape_users(bone_count=4):
+    armature = pose_armature(bone_count, selected=[0], active=0)
+    call("armature.adh_create_shape", widget_shape="box")
+    first = armature.pose.bones[synthetic.BONE_NAME % 0].custom_shape
+
+    # Bone 1 uses the same widget, the others their own.
+    for bone in armature.data.bones:
+        bone.select = bone.name in (synthetic.BONE_NAME % 0, synthetic.BONE_NAME % 1)
+    call("armature.adh_use_same_shape")
+    for index in range(2, bone_count):
+        for bone in armature.data.bones:
+            bone.select = bone.name == synthetic.BONE_NAME % index
+        armature.data.bones.active = armature.data.bones[synthetic.BONE_NAME % index]
+        call("armature.adh_create_shape", widget_shape="triangle")
+
+    for bone in armature.data.bones:
+        bone.select = False
+    armature.data.bones.active = armature.data.bones[synthetic.BONE_NAME % 0]
+    call("object.adh_select_shape_users")
+    users = sorted(bone.name for bone in armature.data.bones if bone.select)
+
+    replacement = synthetic.make_grid(16, name="WGT-replacement")
+    synthetic.select(armature, replacement, mode='POSE')
+    call("armature.adh_replace_shape")
+    replaced = shape_names(armature)
+
+    bpy.ops.object.mode_set(mode='OBJECT')
+    call("object.adh_remove_unused_shapes")
+    return {"first": first.name if first else None, "users": users, "replaced": replaced,
+            "widgets": sorted(obj.name for obj in bpy.data.objects if obj.name.startswith("WGT-"))}
+
+
+@case("object.adh_select_shape_users", "object.adh_remove_unused_shapes")
+def deleted_armature_users(bone_count=3):
+    armature = pose_armature(bone_count, selected=[0], active=0)
+    call("armature.adh_create_shape", widget_shape="box")
+    widget = armature.pose.bones[synthetic.BONE_NAME % 0].custom_shape.name
+    for bone in armature.data.bones:
+        bone.select = bone.name in (synthetic.BONE_NAME % 0, synthetic.BONE_NAME % 1)
+    call("armature.adh_use_same_shape")
+    # Builds the index, then its entries go stale with the armature.
+    call("object.adh_select_shape_users")
+    bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.data.objects.remove(armature)
+
+    call("object.adh_remove_unused_shapes")
+    return {"widget": widget,
+            "widgets": sorted(obj.name for obj in bpy.data.objects if obj.name.startswith("WGT-"))}
+
+
+@case("object.adh_remove_unused_shapes")
+def remove_curve_widgets(bone_count=2):
+    armature = pose_armature(bone_count, selected=[0], active=0)
+    # Builds the index before the script assigns a shape.
+    call("armature.adh_create_shape", widget_shape="box")
+    call("object.adh_select_shape_users")
+    used = synthetic.link(bpy.data.objects.new("WGT-used", bpy.data.curves.new("WGT-used", 'CURVE')))
+    synthetic.link(bpy.data.objects.new("WGT-unused", bpy.data.curves.new("WGT-unused", 'CURVE')))
+    armature.pose.bones[synthetic.BONE_NAME % 1].custom_shape = used
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    call("object.adh_remove_unused_shapes")
+    return {"widgets": sorted(obj.name for obj in bpy.data.objects if obj.name.startswith("WGT-")),
+            "curves": sorted(curve.name for curve in bpy.data.curves)}
+
+
+@case("object.adh_sync_shape_position_to_bone")
+def sync_positions(bone_count=16):
+    armature = pose_armature(bone_count)
+    for index, bone in enumerate(armature.pose.bones):
+        widget = synthetic.link(bpy.data.objects.new("WGT-%d" % index, None))
+        widget.location = (index, 5.0, -3.0)
+        bone.custom_shape = widget
+    armature.location = (0.0, 1.0, 2.0)
+    bpy.context.view_layer.update()
+    call("object.adh_sync_shape_position_to_bone", scope='ALL')
+    errors = []
+    for bone in armature.pose.bones:
+        head = armature.matrix_world @ bone.bone.head_local
+        errors.append((bone.custom_shape.matrix_world.translation - head).length)
+    return {"max_error": max(errors)}
+
+
+@case("object.adh_save_widget_to_library", "armature.adh_create_shape")
+def widget_library():
+    source = synthetic.make_grid(9, name="WGT-custom", x_range=(-0.5, 0.5), z_range=(-0.5, 0.5))
+    synthetic.select(source)
+    call("object.adh_save_widget_to_library", shape_name="custom")
+    path = os.path.join(bpy.utils.user_resource('SCRIPTS'), "presets", "adh_widgets", "custom.npz")
+    with np.load(path) as data:
+        saved = {"verts": len(data["verts"]), "edges": len(data["edges"])}
+
+    armature = pose_armature(2, selected=[0])
+    call("armature.adh_create_shape", widget_shape="lib.custom")
+    widget = armature.pose.bones[synthetic.BONE_NAME % 0].custom_shape
+    return {"saved": saved, "source_edges": len(source.data.edges),
+            "widget_vertices": len(widget.data.vertices), "widget_edges": len(widget.data.edges)}
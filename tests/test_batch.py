@@ -0,0 +1,60 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+from conftest import REPO_DIR
+
+# Loaded from its path: importing it through the add-on package would need bpy.
+spec = importlib.util.spec_from_file_location("batch", os.path.join(REPO_DIR, "batch.py"))
+batch = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(batch)
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+
+
+@pytest.fixture
+def library(tmp_path):
+    for name in ("b.blend", "a.blend", "notes.txt", "sets/c.blend", "sets/c.blend1", "out/old.blend"):
+        touch(str(tmp_path / name))
+    rules = tmp_path / "rules.json"
+    rules.write_text(json.dumps({"rename": [{"pattern": "^L_(.*)$", "replacement": "\\1.L",
+                                             "targets": ["objects", "bones"]}]}))
+    return tmp_path
+
+
+def test_parse_driver_arguments(library):
+    args = batch.driver_parser().parse_args([str(library / "rules.json"), str(library), "--jobs", "3",
+                                             "--dry-run", "--blender", "/opt/blender/blender"])
+    assert args.jobs == 3 and args.dry_run and args.output is None
+    assert args.blender == "/opt/blender/blender"
+    assert args.timeout == 600 and args.report == "batch_report.json"
+
+
+def test_plan_jobs_in_place(library):
+    args = batch.driver_parser().parse_args([str(library / "rules.json"), str(library)])
+    jobs = batch.plan_jobs(args)
+    assert jobs == [{"file": str(library / name)}
+                    for name in ("a.blend", "b.blend", "out/old.blend", "sets/c.blend")]
+
+
+def test_plan_jobs_to_output_skips_it(library):
+    output = str(library / "out")
+    args = batch.driver_parser().parse_args([str(library / "rules.json"), str(library), "--output", output])
+    jobs = batch.plan_jobs(args)
+    assert [job["file"] for job in jobs] == [str(library / name) for name in ("a.blend", "b.blend", "sets/c.blend")]
+    assert jobs[2]["save_as"] == os.path.join(output, "sets", "c.blend")
+
+
+@pytest.mark.parametrize("rule", [{"pattern": "x", "targets": ["meshes"]}, {"pattern": "(", "targets": ["objects"]}])
+def test_bad_rules_fail_early(library, rule):
+    rules = library / "bad.json"
+    rules.write_text(json.dumps({"rename": [rule]}))
+    parser = batch.driver_parser()
+    with pytest.raises(SystemExit):
+        batch.check_rules(parser, str(rules))
+    assert batch.check_rules(parser, str(library / "rules.json"))["rename"][0]["targets"] == ["objects", "bones"]
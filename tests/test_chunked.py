@@ -0,0 +1,26 @@
+def test_invoke_runs_modally(run_windowed_case):
+    result = run_windowed_case("chunked.invoke_falloff", vertex_count=100000)
+    assert result["result"] == ["FINISHED"]
+    assert result["runs"] == 1
+    assert result["modifiers"] == [["ARMATURE", "Armature"]]
+    assert result["inside_error"] < 1.5e-3
+    assert result["outside_members"] == 0
+
+
+def test_cancel_restores_vertex_groups(run_windowed_case):
+    result = run_windowed_case("chunked.cancel_remove_groups")
+    assert result["result"] == ["CANCELLED"]
+    assert result["names_restored"]
+    assert result["weights_restored"]
+    assert result["locked"] == ["bone.003"]
+    assert result["active_group"] == 7
+
+
+def test_cancel_restores_binding(run_windowed_case):
+    result = run_windowed_case("chunked.cancel_bind")
+    assert result["result"] == ["CANCELLED"]
+    assert result["parent"] is None
+    assert result["modifiers"] == []
+    assert result["names_restored"]
+    assert result["weights_restored"]
+    assert result["mode"] == "POSE"
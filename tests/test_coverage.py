@@ -0,0 +1,4 @@
+def test_every_operator_has_a_case(run_case):
+    result = run_case("coverage")
+    assert result["operators"]
+    assert result["uncovered"] == []
@@ -0,0 +1,20 @@
+import pytest
+
+
+def test_map_shape_keys(run_case):
+    result = run_case("drivers.map_shape_keys", key_count=8, slider_distance=0.2)
+    driven = ["key.%03d" % index for index in range(0, 8, 2)]
+    assert result["drivers"] == {'key_blocks["%s"].value' % name: ["a * 5.0", "Armature", name, "LOC_X"]
+                                 for name in driven}
+    for name, value in result["values"].items():
+        assert value == pytest.approx(0.5 if name in driven else 0.0, abs=1e-4)
+
+
+def test_analyze_shape_keys(run_case):
+    result = run_case("drivers.analyze_shape_keys", key_count=4)
+    sparse = ["key.000", "key.001", "key.002", "key.003", "key.000.copy"]
+    assert result["keys"] == ["Basis"] + sparse
+    assert result["limited"] == {name: ["SK-" + name, True] for name in sparse}
+    report = result["report"]
+    assert report[report.index("Dead keys (1):") + 1] == "  dead"
+    assert report[report.index("Duplicate keys (1 groups):") + 1] == "  key.000, key.000.copy"
@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.mark.parametrize("mode", ["CONSTRAINT", "PARENT"])
+def test_bone_hooks(run_case, mode):
+    bone_count = 8
+    result = run_case("hooks.bone_hooks", bone_count=bone_count, bone_hook_mode=mode)
+    names = ["bone.%03d" % index for index in range(bone_count)]
+    assert result["hooks"] == ["hook-" + name for name in names]
+    assert result["rest_error"] < 1e-5
+    assert result["deform"] == [False]
+    assert result["pose_error"] < 1e-4
+    assert result["mode"] == "POSE"
+    if mode == 'CONSTRAINT':
+        assert result["constraints"] == ["COPY_TRANSFORMS"]
+        assert result["parents"] == [""]
+        converted = result["converted"]
+        assert converted["constraints"] == 0
+        assert converted["parents"] == result["hooks"]
+        assert converted["pose_error"] < 1e-4
+    else:
+        assert result["constraints"] == []
+        assert result["parents"] == result["hooks"]
+
+
+@pytest.mark.parametrize("mirror_link", ["CONSTRAINTS", "DRIVERS"])
+def test_symmetric_bone_hooks(run_case, mirror_link):
+    result = run_case("hooks.symmetric_bone_hooks", bone_count=4, mirror_link=mirror_link)
+    assert result["hooks"] == sorted("hook-bone.%03d.%s" % (index, side)
+                                     for index in range(4) for side in "LR")
+    assert result["mirror_error"] < 1e-4
+
+
+def test_lattice_hooks(run_case):
+    result = run_case("hooks.lattice_hooks", resolution=3)
+    assert result["points"] == 27
+    assert result["hooks"] == result["modifiers"] == 27
+    assert result["targets"] == ["Armature"]
+    assert result["head_error"] < 1e-5
+    assert result["mode"] == "EDIT_LATTICE"
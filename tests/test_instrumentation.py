@@ -0,0 +1,6 @@
+def test_invoke_calling_execute_is_measured_once(run_windowed_case):
+    result = run_windowed_case("instrumentation.invoke_measured_once")
+    assert result["result"] == ["FINISHED"]
+    assert result["runs"] == 1
+    assert result["history"] == 1
+    assert result["entries"] == [["mesh.adh_mask_selected_vertices", "invoke"]]
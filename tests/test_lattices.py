@@ -0,0 +1,48 @@
+import pytest
+
+
+def test_bind_to_lattice(run_case):
+    result = run_case("lattices.bind_to_lattice")
+    assert result["modifiers"] == [["Lattice", "LATTICE", "Lattice"]]
+    assert result["inside_weights"] == [1.0]
+    assert result["outside_weights"] == [0.0]
+
+
+@pytest.mark.parametrize("per_object", [False, True])
+@pytest.mark.parametrize("oriented", [False, True])
+def test_fitted_lattice(run_case, per_object, oriented):
+    result = run_case("lattices.fitted_lattice", per_object=per_object, oriented=oriented)
+    expected = ["LAT-Mesh", "LAT-Other"] if per_object else ["LAT-Mesh"]
+    assert result["lattices"] == expected
+    assert result["outside"] == 0
+    assert result["active"] in expected
+    for resolution in result["resolutions"]:
+        assert all(2 <= points <= 8 for points in resolution)
+
+
+def test_apply_lattices(run_case):
+    result = run_case("lattices.apply_lattices", key_count=2)
+    assert not result["shape_keys"]
+    assert result["modifiers"] == []
+    assert result["moved"] > 0
+    assert result["max_error"] < 1e-5
+
+
+@pytest.mark.parametrize("cache_format", ["PC2", "MDD"])
+def test_bake_cache(run_case, cache_format):
+    frames = 10
+    result = run_case("lattices.bake_cache", frames=frames, cache_format=cache_format)
+    count = result["npy_shape"][1]
+    assert result["npy_shape"] == [frames, count, 3]
+    header = 32 if cache_format == 'PC2' else 8 + 4 * frames
+    assert result["cache_size"] == header + frames * count * 12
+    assert result["modifiers"] == [["MESH_CACHE", True], ["LATTICE", False], ["SUBSURF", False]]
+    assert result["npy_error"] < 1e-5
+    assert result["cache_error"] < 1e-4
+
+
+def test_bake_empty_range_cancels(run_case):
+    result = run_case("lattices.bake_empty_range")
+    assert "Empty frame range, 10 to 9" in result["error"]
+    assert not result["written"]
+    assert result["modifiers"] == [["LATTICE", True]]
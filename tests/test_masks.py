@@ -0,0 +1,19 @@
+def test_mask_selected(run_case):
+    result = run_case("masks.mask_selected")
+    assert result["added"] == {"masked": result["expected_added"], "modifier": "MASK", "group": True}
+    assert result["removed"]["masked"] == result["expected_removed"]
+    assert result["exact"]
+    assert result["deleted"] == {"masked": 0, "modifier": None, "group": False}
+
+
+def test_grow_and_shrink_mask(run_case):
+    result = run_case("masks.grow_mask", steps=2)
+    assert result["grown"] == result["expected_grown"]
+    assert result["shrunk"] == 1
+    assert result["mode"] == "OBJECT"
+
+
+def test_mask_from_bones(run_case):
+    result = run_case("masks.mask_from_bones", bone_count=4, threshold=0.5)
+    assert result["masked"] == result["expected"] > 0
+    assert result["exact"]
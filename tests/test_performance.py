@@ -0,0 +1,83 @@
+"""Operators on large synthetic fixtures. Correctness is checked loosely
+here; run_case() fails any call over its budget in TIME_BUDGETS."""
+
+import pytest
+
+LARGE_MESH = 200000
+MANY_BONES = 64
+
+
+def test_bind_falloff_large_mesh(run_case):
+    result = run_case("weights.bind_falloff", vertex_count=LARGE_MESH, bone_count=8)
+    assert result["inside_error"] < 1.5e-3
+
+
+def test_bind_nearest_many_parts(run_case):
+    result = run_case("weights.bind_nearest", bone_count=MANY_BONES, parts_per_bone=64)
+    assert result["wrong"] == 0
+
+
+def test_remove_unselected_groups_many_bones(run_case):
+    result = run_case("weights.remove_unselected_groups", vertex_count=LARGE_MESH, bone_count=MANY_BONES)
+    assert result["groups"] == ["bone.000", "bone.001", "locked"]
+
+
+def test_mirror_weights_large_mesh(run_case):
+    result = run_case("weights.mirror_weights", vertex_count=LARGE_MESH)
+    assert result["side_error"] < 1e-3
+
+
+def test_masks_large_mesh(run_case):
+    result = run_case("masks.mask_selected", vertex_count=LARGE_MESH)
+    assert result["exact"]
+    result = run_case("masks.grow_mask", vertex_count=LARGE_MESH, steps=8)
+    assert result["grown"] == result["expected_grown"]
+    result = run_case("masks.mask_from_bones", vertex_count=LARGE_MESH, bone_count=MANY_BONES)
+    assert result["exact"]
+
+
+@pytest.mark.parametrize("oriented", [False, True])
+def test_fitted_lattice_large_mesh(run_case, oriented):
+    result = run_case("lattices.fitted_lattice", vertex_count=LARGE_MESH, per_object=True, oriented=oriented)
+    assert result["outside"] == 0
+
+
+def test_apply_lattices_large_mesh(run_case):
+    result = run_case("lattices.apply_lattices", vertex_count=LARGE_MESH, key_count=8)
+    assert result["max_error"] < 1e-4
+
+
+def test_bake_cache_large_mesh(run_case):
+    result = run_case("lattices.bake_cache", vertex_count=LARGE_MESH // 4, frames=24)
+    assert result["cache_error"] < 1e-4
+
+
+def test_hooks_many_bones(run_case):
+    result = run_case("hooks.bone_hooks", bone_count=MANY_BONES)
+    assert result["pose_error"] < 1e-4
+    result = run_case("hooks.lattice_hooks", resolution=6)
+    assert result["hooks"] == 216
+
+
+def test_spokes_many_vertices(run_case):
+    result = run_case("spokes.spokes", vertex_count=LARGE_MESH, spoke_count=MANY_BONES, tip=True)
+    assert result["tail_error"] < 1e-4
+
+
+def test_shape_keys_many_keys(run_case):
+    result = run_case("drivers.map_shape_keys", key_count=MANY_BONES)
+    assert len(result["drivers"]) == MANY_BONES // 2
+    result = run_case("drivers.analyze_shape_keys", vertex_count=LARGE_MESH // 4, key_count=32)
+    assert len(result["limited"]) == 33
+
+
+def test_widgets_many_bones(run_case):
+    result = run_case("widgets.sync_positions", bone_count=MANY_BONES * 4)
+    assert result["max_error"] < 1e-5
+    result = run_case("widgets.shared_shapes", bone_count=MANY_BONES)
+    assert len(result["widgets"]) == 2
+
+
+def test_rename_many_bones(run_case):
+    result = run_case("rename.bones", bone_count=MANY_BONES * 4)
+    assert sum(name.startswith("edit.") for name in result["edit_names"]) == MANY_BONES * 2
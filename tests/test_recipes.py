@@ -0,0 +1,28 @@
+def test_record_and_replay(run_case):
+    result = run_case("recipes.record_and_replay")
+    assert [operator for operator, _ in result["steps"]] == ["object.adh_create_fitted_lattice"]
+    assert "LAT-Mesh" in result["steps"][0][1]["objects"]
+    assert result["unchanged"] == [["LAT-Mesh", True]]
+    (name, kept, dimensions), = result["changed"]
+    assert name == "LAT-Mesh" and not kept
+    assert dimensions[0] > 8.0
+    assert result["modifiers"] == [["LATTICE", "LAT-Mesh"]]
+
+
+def test_failed_step_keeps_old_outputs(run_case):
+    result = run_case("recipes.failed_replay")
+    assert "Step 1 (object.adh_create_fitted_lattice) failed" in result["error"]
+    assert result["lattices"] == [["LAT-Mesh", True, 1]]
+    assert result["modifiers"] == [["LATTICE", "LAT-Mesh"]]
+
+
+def test_replay_weight_paint_step(run_case):
+    result = run_case("recipes.replay_weight_paint")
+    assert result["steps"] == [["object.adh_mirror_weights", "PAINT_WEIGHT"]]
+    assert result["replayed"]
+    assert result["mode"] == "OBJECT"
+
+
+def test_invoked_operator_records_one_step(run_windowed_case):
+    result = run_windowed_case("recipes.record_invoked")
+    assert result["steps"] == ["mesh.adh_mask_selected_vertices"]
@@ -0,0 +1,11 @@
+def test_rename_objects(run_case):
+    result = run_case("rename.objects")
+    assert result["names"] == ["arm.L", "arm.R", "leg.L", "other"]
+
+
+def test_rename_bones(run_case):
+    result = run_case("rename.bones", bone_count=8)
+    assert result["pose_names"] == ["bone.001", "bone.003", "bone.005", "bone.007",
+                                    "pose.000", "pose.002", "pose.004", "pose.006"]
+    assert result["edit_names"] == ["edit.001", "edit.003", "edit.005", "edit.007",
+                                    "pose.000", "pose.002", "pose.004", "pose.006"]
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.mark.parametrize("tip", [False, True])
+def test_spokes(run_case, tip):
+    result = run_case("spokes.spokes", spoke_count=16, tip=tip)
+    names = ["spoke.%d" % index for index in range(16)]
+    expected = ["bone.000"] + names + (["tip-" + name for name in names] if tip else [])
+    assert result["bones"] == sorted(expected)
+    assert result["tail_error"] < 1e-4
+    assert result["head_error"] < 1e-4
+    if tip:
+        assert result["constraints"] == sorted(["DAMPED_TRACK", "tip-" + name] for name in names)
+    else:
+        assert result["constraints"] == []
+    assert result["active"] == "Armature"
+
+
+def test_spoke_tips(run_case):
+    result = run_case("spokes.spoke_tips", bone_count=8)
+    names = ["bone.%03d" % index for index in range(8)]
+    assert result["tips"] == ["tip-" + name for name in names]
+    assert result["tip_error"] < 1e-5
+    assert result["constraints"] == [["DAMPED_TRACK", "tip-" + name] for name in names]
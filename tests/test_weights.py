@@ -0,0 +1,42 @@
+import pytest
+
+
+def test_remove_unselected_groups(run_case):
+    result = run_case("weights.remove_unselected_groups", bone_count=8)
+    assert result["groups"] == ["bone.000", "bone.001", "locked"]
+
+
+def test_bind_active(run_case):
+    result = run_case("weights.bind_active", bone_count=8)
+    members = result.pop("members")
+    assert members.pop("bone.002") == result["vertices"]
+    assert set(members.values()) == {0}
+    assert result["weights"] == [1.0]
+    assert result["modifiers"] == [["ARMATURE", "Armature"]]
+    assert result["parent"] == "Armature"
+
+
+def test_bind_nearest(run_case):
+    result = run_case("weights.bind_nearest", bone_count=8, parts_per_bone=4)
+    assert result["wrong"] == 0
+    assert set(result["members"].values()) == {4 * 8}
+
+
+@pytest.mark.parametrize("curve", ["SMOOTH", "SPHERE", "ROOT", "SHARP", "LINEAR", "CONSTANT"])
+def test_bind_falloff(run_case, curve):
+    result = run_case("weights.bind_falloff", bone_count=4, radius=0.75, curve=curve)
+    assert result["inside"] > 0 and result["outside"] > 0
+    assert result["inside_error"] < 1.5e-3
+    # Replace takes the vertices beyond the radius out of the bone's group.
+    assert result["outside_before"] > 0
+    assert result["outside_members"] == 0
+    assert result["other_unchanged"]
+    assert result["parent"] is None
+
+
+def test_mirror_weights(run_case):
+    result = run_case("weights.mirror_weights")
+    assert result["groups"] == ["center", "side.L", "side.R"]
+    assert result["side_error"] < 1e-3
+    assert result["center_error"] < 1e-3
+    assert result["center_kept"]
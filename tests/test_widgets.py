@@ -0,0 +1,64 @@
+import pytest
+
+
+@pytest.mark.parametrize("shape", ["ring", "sphere", "box", "fourways"])
+def test_create_shape(run_case, shape):
+    result = run_case("widgets.create_shape", bone_count=4, shape=shape)
+    assert set(result["shapes"].values()) == {"WGT-Armature_bone.000"}
+    assert result["widget_vertices"] > 0
+    assert result["widget_collections"] == ["Widgets"]
+    assert result["widget_location"] == pytest.approx(result["bone_head"], abs=1e-5)
+
+
+def test_shared_shapes(run_case):
+    result = run_case("widgets.shared_shapes", bone_count=6)
+    assert sorted(result["shared"]) == ["bone.000", "bone.001", "bone.002"]
+    for translation, scale in result["shared"].values():
+        assert translation == pytest.approx([0.0, 0.25, 0.0], abs=1e-5)
+        assert min(scale) == pytest.approx(0.5)
+    assert len({result["before"][name] for name in ("bone.003", "bone.004", "bone.005")}) == 3
+    assert {result["after"][name] for name in ("bone.003", "bone.004", "bone.005")} == {"WGT-Armature_bone.003"}
+    assert result["widgets"] == ["WGT-Armature_bone.003", "WGT-shape-square"]
+
+
+def test_select_and_finish_edit(run_case):
+    result = run_case("widgets.select_and_finish")
+    assert result["selecting"] == {"active": result["widget"], "mode": "OBJECT", "visible": True}
+    assert result["active"] == "Armature"
+    assert result["mode"] == "POSE"
+    assert result["active_bone"] == "bone.001"
+    assert not result["visible"]
+    assert not result["in_scene_collection"]
+
+
+def test_shape_users_replace_and_cleanup(run_case):
+    result = run_case("widgets.shape_users", bone_count=4)
+    assert result["users"] == ["bone.000", "bone.001"]
+    assert result["replaced"] == {"bone.000": "WGT-replacement", "bone.001": "WGT-replacement",
+                                  "bone.002": "WGT-Armature_bone.002", "bone.003": "WGT-Armature_bone.003"}
+    assert result["first"] not in result["widgets"]
+    assert result["widgets"] == ["WGT-Armature_bone.002", "WGT-Armature_bone.003", "WGT-replacement"]
+
+
+def test_deleted_armature_leaves_widgets_unused(run_case):
+    result = run_case("widgets.deleted_armature_users")
+    assert result["widget"] == "WGT-Armature_bone.000"
+    assert result["widgets"] == []
+
+
+def test_remove_unused_curve_widgets(run_case):
+    result = run_case("widgets.remove_curve_widgets")
+    assert result["widgets"] == ["WGT-Armature_bone.000", "WGT-used"]
+    assert result["curves"] == ["WGT-used"]
+
+
+def test_sync_positions(run_case):
+    result = run_case("widgets.sync_positions", bone_count=16)
+    assert result["max_error"] < 1e-5
+
+
+def test_widget_library(run_case):
+    result = run_case("widgets.widget_library")
+    assert result["saved"] == {"verts": 9, "edges": result["source_edges"]}
+    assert result["widget_vertices"] == 9
+    assert result["widget_edges"] == result["source_edges"]
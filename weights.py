@@ -0,0 +1,320 @@
+import bpy
+
+from .chunked import ADH_AbstractChunkedOperator, scaled
+from .snapshot import ObjectSnapshot
+
+
+class ADH_RemoveVertexGroupsUnselectedBones(bpy.types.Operator, ADH_AbstractChunkedOperator):
+    """Removes all vertex groups other than selected bones.
+
+    Used right after automatic weight assignment, to remove unwanted bone influence."""
+    bl_idname = 'armature.adh_remove_vertex_groups_unselected_bones'
+    bl_label = 'Remove Vertex Groups of Unselected Bones'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(self, context):
+        return context.active_object is not None \
+               and context.selected_pose_bones is not None
+
+    def run(self, context):
+        bone_names = {b.name for b in context.selected_pose_bones}
+        affected_objects = [o for o in context.selected_objects
+                            if o.type == 'MESH']
+
+        for index, obj in enumerate(affected_objects):
+            unwanted = [vg for vg in obj.vertex_groups
+                        if not (vg.name in bone_names or vg.lock_weight)]
+            if unwanted:
+                self.snapshot(ObjectSnapshot, obj, vertex_groups=True)
+            for vg_index, vg in enumerate(unwanted):
+                obj.vertex_groups.remove(vg)
+                yield (index + (vg_index + 1) / len(unwanted)) / len(affected_objects)
+
+
+class ADH_BindToBone(bpy.types.Operator, ADH_AbstractChunkedOperator):
+    """Binds all selected objects to selected bone, adding armature and vertex group if none exist yet."""
+    bl_idname = 'armature.adh_bind_to_bone'
+    bl_label = 'Bind Object to Bone'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=[('ACTIVE', "Active Bone", "Bind everything to the active bone"),
+               ('NEAREST', "Nearest Bone", "Bind each loose part to its nearest bone: one of"
+                                           " the selected bones, or of all deforming bones if"
+                                           " only one is selected"),
+               ('FALLOFF', "Distance Falloff", "Weight vertices to the active bone by their distance"
+                                               " to it, keeping other vertex groups")],
+        default='ACTIVE',
+    )
+
+    falloff_radius: bpy.props.FloatProperty(
+        name="Radius",
+        description="Distance from the bone at which weights reach zero.",
+        default=0.25,
+        min=0.0,
+        subtype='DISTANCE',
+        unit='LENGTH',
+    )
+
+    falloff_curve: bpy.props.EnumProperty(
+        name="Falloff",
+        items=[('SMOOTH', "Smooth", "Smooth falloff", 'SMOOTHCURVE', 0),
+               ('SPHERE', "Sphere", "Spherical falloff", 'SPHERECURVE', 1),
+               ('ROOT', "Root", "Root falloff", 'ROOTCURVE', 2),
+               ('SHARP', "Sharp", "Sharp falloff", 'SHARPCURVE', 3),
+               ('LINEAR', "Linear", "Linear falloff", 'LINCURVE', 4),
+               ('CONSTANT', "Constant", "Constant falloff", 'NOCURVE', 5)],
+        default='SMOOTH',
+    )
+
+    falloff_blend: bpy.props.EnumProperty(
+        name="Blend",
+        items=[('REPLACE', "Replace", "Replace the bone's existing weights, removing vertices"
+                                      " beyond the radius from its group"),
+               ('ADD', "Add", "Add to the bone's existing weights")],
+        default='REPLACE',
+    )
+
+    only_selected: bpy.props.BoolProperty(
+        name="Only Selected",
+        description="Bind only selected vertices.",
+        default=False,
+        options={'SKIP_SAVE'})
+
+    set_as_parent: bpy.props.BoolProperty(
+        name="Set as Parent",
+        description="Also parent object to armature.",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) >= 2 and \
+               context.active_pose_bone is not None
+
+    def draw(self, context):
+        layout = self.layout
+
+        layout.prop(self, "mode")
+        if self.mode == 'FALLOFF':
+            col = layout.column(align=True)
+            col.prop(self, "falloff_radius")
+            col.prop(self, "falloff_curve")
+            col.prop(self, "falloff_blend")
+        layout.prop(self, "only_selected")
+        layout.prop(self, "set_as_parent")
+
+    def get_vertex_indices(self, mesh):
+        import numpy as np
+        from . import geometry
+
+        if self.only_selected:
+            return np.flatnonzero(geometry.read_flags(mesh.data.vertices, "select"))
+        return np.arange(len(mesh.data.vertices))
+
+    def get_candidate_bones(self, context, armature):
+        bones = [b.bone for b in context.selected_pose_bones or []]
+        if len(bones) < 2:
+            bones = [b for b in armature.data.bones if b.use_deform]
+        return bones
+
+    def bind_vertices(self, mesh, assignments):
+        """Gives each vertex full weight in its assigned group, removing it
+        from every other group. assignments maps group names to arrays of
+        vertex indices. Yields progress after each group."""
+        from . import geometry
+
+        step_count = len(mesh.vertex_groups) + len(assignments)
+        for index, vg in enumerate(mesh.vertex_groups):
+            for name, indices in assignments.items():
+                if name != vg.name:
+                    geometry.remove_from_group(vg, indices)
+            yield (index + 1) / step_count
+        for index, (name, indices) in enumerate(assignments.items()):
+            vg = mesh.vertex_groups.get(name, None)
+            if not vg:
+                vg = mesh.vertex_groups.new(name=name)
+            geometry.add_to_group(vg, indices, 1.0, 'REPLACE')
+            yield (step_count - len(assignments) + index + 1) / step_count
+
+    def nearest_bone_assignments(self, mesh, armature, bones, vertex_indices):
+        """Generator computing the assignments on the worker threads;
+        returns them once done."""
+        import numpy as np
+        from . import executor, geometry
+
+        data = mesh.data
+        co = geometry.transform_points(geometry.read_coordinates(data.vertices), mesh.matrix_world)
+        edges = geometry.read_edges(data.edges)
+
+        all_bones = armature.data.bones
+        bone_index = {name: index for index, name in enumerate(all_bones.keys())}
+        candidates = [bone_index[b.name] for b in bones]
+        heads = geometry.transform_points(geometry.read_vectors(all_bones, "head_local"), armature.matrix_world)
+        tails = geometry.transform_points(geometry.read_vectors(all_bones, "tail_local"), armature.matrix_world)
+        nearest = yield executor.submit(geometry.component_nearest_segments,
+                                        co, edges, heads[candidates], tails[candidates])
+
+        vertex_bones = nearest[vertex_indices]
+        return {bones[b].name: vertex_indices[vertex_bones == b]
+                for b in np.unique(vertex_bones)}
+
+    def bind_falloff(self, mesh, armature, bone, vertex_indices):
+        """Weights vertices to the bone by distance to its segment, without
+        touching other vertex groups. Replacing, vertices beyond the radius
+        leave the bone's group. The distances and weights are computed in
+        parallel on the worker threads."""
+        import numpy as np
+        from . import executor, geometry
+
+        def chunk_weights(co, matrix, head, tail, radius, curve):
+            co = geometry.transform_points(co, matrix)
+            distances = geometry.segment_distances(co, [head], [tail])[:, 0]
+            return geometry.falloff_weights(distances, radius, curve)
+
+        co = geometry.read_coordinates(mesh.data.vertices)[vertex_indices]
+        head = armature.matrix_world @ bone.bone.head_local
+        tail = armature.matrix_world @ bone.bone.tail_local
+        # Every worker holds a chunk's transformed points and segment offsets at once
+        chunk_size = geometry.chunk_rows(co.itemsize * 3 * 4 * executor.worker_count())
+        chunks = yield executor.map_chunks(chunk_weights, co, np.array(mesh.matrix_world),
+                                           tuple(head), tuple(tail),
+                                           self.falloff_radius, self.falloff_curve,
+                                           chunk_size=chunk_size)
+        weights = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+        vg = mesh.vertex_groups.get(bone.name, None)
+        if not vg:
+            vg = mesh.vertex_groups.new(name=bone.name)
+        geometry.write_weights(vg, weights, vertex_indices, mode=self.falloff_blend,
+                               remove_zero=self.falloff_blend == 'REPLACE')
+
+    def execute(self, context):
+        if self.mode == 'NEAREST' and not self.get_candidate_bones(context, context.active_object):
+            return {'CANCELLED'}
+        return ADH_AbstractChunkedOperator.execute(self, context)
+
+    def run(self, context):
+        meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        armature = context.active_object
+        bone = context.active_pose_bone
+        bones = self.get_candidate_bones(context, armature) if self.mode == 'NEAREST' else None
+        if not meshes:
+            self.report({'ERROR'}, "No selected mesh to bind")
+            return {'CANCELLED'}
+
+        for mesh_index, mesh in enumerate(meshes):
+            self.snapshot(ObjectSnapshot, mesh, vertex_groups=True)
+            armature_mods = [m for m in mesh.modifiers
+                             if m.type == 'ARMATURE' and m.object == armature]
+            if not armature_mods:
+                am = mesh.modifiers.new('Armature', 'ARMATURE')
+                am.object = armature
+
+            if self.set_as_parent:
+                mesh.parent = armature
+
+            vertex_indices = self.get_vertex_indices(mesh)
+            if self.mode == 'FALLOFF':
+                yield from self.bind_falloff(mesh, armature, bone, vertex_indices)
+                yield (mesh_index + 1) / len(meshes)
+                continue
+            if self.mode == 'NEAREST':
+                assignments = yield from self.nearest_bone_assignments(mesh, armature, bones, vertex_indices)
+            else:
+                assignments = {bone.name: vertex_indices}
+            yield from scaled(self.bind_vertices(mesh, assignments),
+                              mesh_index / len(meshes), (mesh_index + 1) / len(meshes))
+
+    def invoke(self, context, event):
+        self.only_selected = event.shift
+        if self.mode == 'NEAREST' and not self.get_candidate_bones(context, context.active_object):
+            return {'CANCELLED'}
+        return ADH_AbstractChunkedOperator.invoke(self, context, event)
+
+
+class ADH_MirrorWeights(bpy.types.Operator):
+    """Mirrors vertex group weights across the mesh's local X axis, from one side's groups to the other's (.L to .R, or back)."""
+    bl_idname = 'object.adh_mirror_weights'
+    bl_label = 'Mirror Weights'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    direction: bpy.props.EnumProperty(
+        name="Direction",
+        items=[('L_TO_R', "Left to Right", "Copy left side (+X) weights to the right side"),
+               ('R_TO_L', "Right to Left", "Copy right side (-X) weights to the left side")],
+        default='L_TO_R',
+    )
+
+    only_active: bpy.props.BoolProperty(
+        name="Only Active",
+        description="Mirror only the active vertex group.",
+        default=False,
+    )
+
+    symmetrize_center: bpy.props.BoolProperty(
+        name="Symmetrize Center Groups",
+        description="Also make groups without side in their name symmetric.",
+        default=True,
+    )
+
+    tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Maximum distance between a vertex and the mirror of its counterpart.",
+        default=0.001,
+        min=0.0,
+        precision=4,
+        subtype='DISTANCE',
+        unit='LENGTH',
+    )
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH' \
+               and context.mode != 'EDIT_MESH' and len(obj.vertex_groups) > 0
+
+    def get_group_pairs(self, obj):
+        """(source, target) vertex group pairs, creating missing targets."""
+        from . import symmetry
+
+        source_side = 'L' if self.direction == 'L_TO_R' else 'R'
+        active = obj.vertex_groups.active
+        groups = ([active] if active else []) if self.only_active else list(obj.vertex_groups)
+        pairs = []
+        for vg in groups:
+            side = symmetry.name_side(vg.name)
+            if side == source_side:
+                target_name = symmetry.mirror_name(vg.name)
+                target = obj.vertex_groups.get(target_name) or obj.vertex_groups.new(name=target_name)
+                pairs.append((vg, target))
+            elif not side and self.symmetrize_center:
+                pairs.append((vg, vg))
+        return pairs
+
+    def execute(self, context):
+        import numpy as np
+        from . import geometry, symmetry
+
+        obj = context.active_object
+        mesh = obj.data
+        pairs = self.get_group_pairs(obj)
+        if not pairs:
+            return {'CANCELLED'}
+
+        mirror_map = symmetry.mesh_mirror_map(mesh, self.tolerance)
+        mapped = np.flatnonzero(mirror_map >= 0)
+        x = geometry.read_coordinates(mesh.vertices)[:, 0]
+        target_half = mapped[x[mapped] <= 0] if self.direction == 'L_TO_R' else mapped[x[mapped] >= 0]
+
+        weights = geometry.read_group_weights(mesh, [source.index for source, _ in pairs])
+        for column, (source, target) in enumerate(pairs):
+            # Side groups are rewritten whole, center groups only on the
+            # side receiving the mirror.
+            indices = target_half if source == target else mapped
+            mirrored = weights[mirror_map[indices], column]
+            geometry.write_weights(target, mirrored, indices)
+
+        return {'FINISHED'}
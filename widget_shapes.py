@@ -0,0 +1,147 @@
+"""Widget shape data, loaded on first use.
+
+Built-in shapes are stored in resources/widget_shapes.npz as three
+arrays per shape: `<shape>_verts` (float32, N x 3), `<shape>_edges`
+(int32, M x 2) and `<shape>_scale`, a per-axis mask telling which axes
+follow the widget size (the rest keep their unit length, e.g. a box's Y
+axis always spans the bone).
+
+Library shapes are one uncompressed `<name>.npz` file per shape with
+`verts`, `edges` and `scale` arrays, looked up in the directories
+listed in $ADH_RIGGING_TOOLS_WIDGETS (e.g. a studio-wide share) and in
+the user's presets directory, where new shapes are saved."""
+
+import math
+import os
+
+import bpy
+import numpy as np
+from mathutils import Matrix, Vector
+
+from . import geometry
+
+SHAPES_PATH = os.path.join(os.path.dirname(__file__), "resources", "widget_shapes.npz")
+LIBRARY_ENV = "ADH_RIGGING_TOOLS_WIDGETS"
+LIBRARY_PREFIX = "lib."
+
+_shapes = None
+_library = None  # (directory mtimes, {name: path})
+_library_shapes = {}  # path: (mtime, shape data)
+
+
+def get_shapes():
+    """Returns {shape: (verts, edges, scale_mask)}, reading the shape
+    file on the first call."""
+    global _shapes
+    if _shapes is None:
+        shapes = {}
+        with np.load(SHAPES_PATH) as data:
+            for key in data.files:
+                if key.endswith("_verts"):
+                    shape = key[:-len("_verts")]
+                    shapes[shape] = (data[shape + "_verts"],
+                                     data[shape + "_edges"],
+                                     data[shape + "_scale"])
+        _shapes = shapes
+    return _shapes
+
+
+def user_library_dir(create=False):
+    return bpy.utils.user_resource('SCRIPTS', path=os.path.join("presets", "adh_widgets"), create=create)
+
+
+def library_dirs():
+    dirs = [d for d in os.environ.get(LIBRARY_ENV, "").split(os.pathsep) if d]
+    dirs.append(user_library_dir())
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def get_library():
+    """Returns {name: path} of library shapes. Directories are only
+    listed again when their modification time changes. Earlier
+    directories take precedence over later ones."""
+    global _library
+    dirs = library_dirs()
+    mtimes = [(d, os.stat(d).st_mtime_ns) for d in dirs]
+    if _library is None or _library[0] != mtimes:
+        shapes = {}
+        for lib_dir in reversed(dirs):
+            for filename in os.listdir(lib_dir):
+                name, ext = os.path.splitext(filename)
+                if ext == ".npz":
+                    shapes[name] = os.path.join(lib_dir, filename)
+        _library = (mtimes, shapes)
+    return _library[1]
+
+
+def library_enum_items():
+    """Enum items for library shapes, identified as LIBRARY_PREFIX +
+    name."""
+    return [(LIBRARY_PREFIX + name, bpy.path.display_name(name), "Widget library: " + path)
+            for name, path in sorted(get_library().items())]
+
+
+def load_library_shape(path):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _library_shapes.get(path)
+    if cached is None or cached[0] != mtime:
+        with np.load(path) as data:
+            shape_data = (data["verts"], data["edges"], data["scale"])
+        cached = _library_shapes[path] = (mtime, shape_data)
+    return cached[1]
+
+
+def get_shape(shape):
+    """Returns (verts, edges, scale_mask) of a built-in or library
+    shape, or None if there's no such shape."""
+    if shape.startswith(LIBRARY_PREFIX):
+        path = get_library().get(shape[len(LIBRARY_PREFIX):])
+        return load_library_shape(path) if path else None
+    return get_shapes().get(shape)
+
+
+def save_shape(name, verts, edges):
+    """Saves a shape into the user's widget library, replacing any
+    shape of the same name there. Returns the file path."""
+    lib_dir = user_library_dir(create=True)
+    path = os.path.join(lib_dir, bpy.path.clean_name(name) + ".npz")
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as shape_file:
+        np.savez(shape_file,
+                 verts=np.asarray(verts, dtype=np.float32).reshape(-1, 3),
+                 edges=np.asarray(edges, dtype=np.int32).reshape(-1, 2),
+                 scale=np.ones(3, dtype=np.float32))
+    os.replace(temp_path, path)
+    return path
+
+
+def shape_matrix(pos=1.0, rot=0.0):
+    """Widget placement along the bone: rotation around the X axis,
+    then translation along the bone's length."""
+    rot_mat = Matrix.Rotation(math.radians(rot), 4, 'X')
+    trans_mat = Matrix.Translation(Vector((0.0, pos, 0.0)))
+    return trans_mat @ rot_mat
+
+
+def fill_mesh(mesh, verts, edges):
+    """Fills an empty mesh with the given vertex and edge arrays."""
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(verts, dtype=np.float32).ravel())
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set("vertices", np.ascontiguousarray(edges, dtype=np.int32).ravel())
+    mesh.update()
+
+
+def build_shape(mesh, shape, size=1.0, pos=1.0, rot=0.0):
+    """Fills an empty mesh with a built-in or library shape, scaled by
+    size and placed by pos and rot. Returns False for an unknown
+    shape."""
+    shape_data = get_shape(shape)
+    if shape_data is None:
+        return False
+    verts, edges, scale_mask = shape_data
+
+    scale = np.where(scale_mask > 0, size, 1.0).astype(np.float32)
+    co = geometry.transform_points(verts * scale, shape_matrix(pos, rot))
+    fill_mesh(mesh, co, edges)
+    return True
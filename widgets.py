@@ -0,0 +1,696 @@
+import math
+
+import bpy
+from mathutils import Matrix
+
+from .common import PRF_WIDGET, WIDGETS_COLLECTION
+
+REVEAL_STATE_PROP = "adh_reveal_state"
+SHARED_WIDGET_INFIX = "shape-"
+# Collections of the data widget objects may have, by object type.
+WIDGET_DATA = {'MESH': "meshes", 'CURVE': "curves", 'SURFACE': "curves", 'FONT': "curves"}
+
+
+# Built-in replacements for the few Rigify utilities used by the
+# widget operators, so enabling this add-on doesn't drag the whole
+# Rigify package into every session. Shape data lives in
+# widget_shapes, imported only when a widget is actually built.
+
+def ensure_widget_collection(context):
+    """Returns the collection holding widget objects, creating and
+    linking it to the scene if needed."""
+    collection = bpy.data.collections.get(WIDGETS_COLLECTION)
+    if collection is None:
+        collection = bpy.data.collections.new(WIDGETS_COLLECTION)
+        collection.hide_viewport = True
+        collection.hide_render = True
+    scene_collection = context.scene.collection
+    if collection.name not in scene_collection.children:
+        scene_collection.children.link(collection)
+    return collection
+
+
+def remove_widget(obj):
+    """Deletes a widget object, and its data once nothing else uses it."""
+    data = obj.data
+    collection = WIDGET_DATA.get(obj.type)
+    bpy.data.objects.remove(obj)
+    if collection is not None and data.users == 0:
+        getattr(bpy.data, collection).remove(data)
+
+
+def obj_to_bone(obj, rig, bone_name):
+    """Places an object at the location/rotation/scale of the given
+    bone's rest position, scaled by the bone's length."""
+    bone = rig.data.bones[bone_name]
+
+    mat = rig.matrix_world @ bone.matrix_local
+    scl = mat.to_scale()
+    scl_avg = bone.length * (scl[0] + scl[1] + scl[2]) / 3
+
+    obj.location = mat.to_translation()
+    obj.rotation_mode = 'XYZ'
+    obj.rotation_euler = mat.to_euler()
+    obj.scale = (scl_avg, scl_avg, scl_avg)
+
+
+def sync_widgets_to_bones(context, rig, pose_bones):
+    """Batched obj_to_bone() for every custom shape used by the given
+    pose bones. All matrices are computed in one pass, and the scene
+    is updated once at the end. Returns the number of synced widgets."""
+    from . import geometry
+
+    bone_index = {name: index for index, name in enumerate(rig.data.bones.keys())}
+    pairs = [(bone.custom_shape, bone_index[bone.name]) for bone in pose_bones
+             if bone.custom_shape is not None]
+    if not pairs:
+        return 0
+
+    bone_matrices = geometry.read_matrices(rig.data.bones, "matrix_local")
+    bone_lengths = geometry.read_floats(rig.data.bones, "length")
+    indices = [index for _, index in pairs]
+    matrices = geometry.widget_matrices(rig.matrix_world, bone_matrices[indices], bone_lengths[indices])
+
+    for (obj, _), matrix in zip(pairs, matrices):
+        obj.matrix_world = Matrix(matrix.tolist())
+    context.view_layer.update()
+
+    return len(pairs)
+
+
+def create_widget(rig, bone_name, bone_transform_name=None):
+    """Creates an empty widget object for a bone, and returns the
+    object. An existing widget of the same name is emptied and
+    reused."""
+    context = bpy.context
+    obj_name = PRF_WIDGET + rig.name + '_' + bone_name
+    if bone_transform_name is None:
+        bone_transform_name = bone_name
+
+    mesh = bpy.data.meshes.new(obj_name)
+    obj = bpy.data.objects.get(obj_name)
+    if obj is not None and obj.type == 'MESH':
+        old_mesh = obj.data
+        obj.data = mesh
+        if old_mesh.users == 0:
+            bpy.data.meshes.remove(old_mesh)
+    else:
+        obj = bpy.data.objects.new(obj_name, mesh)
+    if not obj.users_collection:
+        ensure_widget_collection(context).objects.link(obj)
+
+    obj_to_bone(obj, rig, bone_transform_name)
+
+    return obj
+
+
+BUILTIN_SHAPE_ITEMS = [
+    ('sphere', 'Sphere', '8x4 edges'),
+    ('ring', 'Ring', '24 vertices'),
+    ('square', 'Square', ''),
+    ('triangle', 'Triangle', ''),
+    ('bidirection', 'Bidirection', ''),
+    ('box', 'Box', ''),
+    ('fourways', 'Four-Ways', 'Circle with arrows to four directions - 40 vertices'),
+    ('fourgaps', 'Four-Gaps', 'Broken circle that complements Four-Ways - 20 vertices'),
+    ('selected', 'Selected', 'Shape of selected object'),
+]
+
+_shape_items = []  # Enum items must outlive the callback returning them.
+
+
+def widget_shape_items(self, context):
+    from . import widget_shapes
+
+    _shape_items[:] = BUILTIN_SHAPE_ITEMS + widget_shapes.library_enum_items()
+    return _shape_items
+
+
+def get_context_widget(context):
+    """Active pose bone's custom shape in pose mode, otherwise the active
+    mesh object."""
+    if context.mode == 'POSE':
+        bone = context.active_pose_bone
+        return bone.custom_shape if bone is not None else None
+    obj = context.active_object
+    return obj if obj is not None and obj.type == 'MESH' else None
+
+
+class ADH_UseSameCustomShape(bpy.types.Operator):
+    """Copies active pose bone's custom shape to each selected pose bone."""
+    bl_idname = 'armature.adh_use_same_shape'
+    bl_label = 'Use Same Custom Shape'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_pose_bone is not None
+
+    def execute(self, context):
+        if context.active_pose_bone is None:
+            return {'CANCELLED'}
+
+        custom_shape = context.active_pose_bone.custom_shape
+        for obj in context.selected_objects:
+            if obj.type == 'MESH':
+                custom_shape = obj
+                break
+
+        for bone in context.selected_pose_bones:
+            bone.custom_shape = custom_shape
+
+        return {'FINISHED'}
+
+
+class ADH_SelectCustomShape(bpy.types.Operator):
+    """Selects custom shape object of active bone."""
+    bl_idname = 'armature.adh_select_shape'
+    bl_label = 'Select Custom Shape'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    isolate: bpy.props.BoolProperty(
+        name="Isolate",
+        description="Show only the custom shape, in local view.",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_pose_bone is not None and \
+               context.active_pose_bone.custom_shape is not None
+
+    def execute(self, context):
+        rig = context.active_object
+        bone = context.active_pose_bone
+        bone_shape = bone.custom_shape
+        # shape_layers = [l for l in bone_shape.layers]  # can't index on bpy_prop_array
+        if bone_shape:
+            bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
+            rig.select_set(False)
+
+            # Reveal only the custom shape itself. If its collections are
+            # hidden or excluded, link it to the scene's own collection for
+            # the time being instead of showing those collections and
+            # everything else in them. Changes are remembered on the object
+            # and undone by ADH_FinishEditCustomShape.
+            state = {"armature": rig.name, "bone": bone.name,
+                     "hidden": bone_shape.hide_get(),
+                     "disabled": bone_shape.hide_viewport,
+                     "linked": False, "local_view": False}
+            bone_shape.hide_viewport = False
+            bone_shape.hide_set(False)
+            scene_collection = context.scene.collection
+            if not bone_shape.visible_get() and bone_shape.name not in scene_collection.objects:
+                scene_collection.objects.link(bone_shape)
+                state["linked"] = True
+
+            bone_shape.select_set(True)
+            context.view_layer.objects.active = bone_shape
+
+            space = context.space_data
+            if self.isolate and space is not None and space.type == 'VIEW_3D' \
+                    and space.local_view is None:
+                bpy.ops.view3d.localview()
+                state["local_view"] = True
+            bone_shape[REVEAL_STATE_PROP] = state
+        else:
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+
+class ADH_FinishEditCustomShape(bpy.types.Operator):
+    """Hides custom shape revealed by Select Custom Shape again, and returns to its bone."""
+    bl_idname = 'object.adh_finish_edit_shape'
+    bl_label = 'Return to Armature'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and REVEAL_STATE_PROP in obj
+
+    def execute(self, context):
+        bone_shape = context.active_object
+        state = bone_shape[REVEAL_STATE_PROP].to_dict()
+        del bone_shape[REVEAL_STATE_PROP]
+
+        bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
+        space = context.space_data
+        if state["local_view"] and space is not None and space.type == 'VIEW_3D' \
+                and space.local_view is not None:
+            bpy.ops.view3d.localview()
+
+        bone_shape.select_set(False)
+        if state["linked"]:
+            context.scene.collection.objects.unlink(bone_shape)
+        bone_shape.hide_set(bool(state["hidden"]))
+        bone_shape.hide_viewport = bool(state["disabled"])
+
+        rig = bpy.data.objects.get(state["armature"])
+        if rig is None or rig.name not in context.view_layer.objects:
+            return {'FINISHED'}
+        rig.select_set(True)
+        context.view_layer.objects.active = rig
+        bpy.ops.object.mode_set(mode="POSE", toggle=False)
+        bone = rig.data.bones.get(state["bone"])
+        if bone is not None:
+            rig.data.bones.active = bone
+
+        return {'FINISHED'}
+
+
+class ADH_SelectCustomShapeUsers(bpy.types.Operator):
+    """Selects all bones, in every armature, using active bone's custom shape or the active mesh object as custom shape."""
+    bl_idname = 'object.adh_select_shape_users'
+    bl_label = 'Select Custom Shape Users'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return get_context_widget(context) is not None
+
+    def execute(self, context):
+        from . import shape_index
+
+        widget = get_context_widget(context)
+        users = shape_index.get_index().bones_using(widget)
+        for armature, bone in users:
+            bone.bone.select = True
+
+        self.report({'INFO'}, "%d bones use %s" % (len(users), widget.name))
+
+        return {'FINISHED'}
+
+
+class ADH_ReplaceCustomShape(bpy.types.Operator):
+    """Replaces active bone's custom shape with selected mesh object, on every bone using it in every armature."""
+    bl_idname = 'armature.adh_replace_shape'
+    bl_label = 'Replace Custom Shape Everywhere'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_pose_bone is not None \
+               and context.active_pose_bone.custom_shape is not None
+
+    def execute(self, context):
+        from . import shape_index
+
+        old_shape = context.active_pose_bone.custom_shape
+        new_shapes = [obj for obj in context.selected_objects
+                      if obj.type == 'MESH' and obj != old_shape]
+        if not new_shapes:
+            return {'CANCELLED'}
+
+        users = shape_index.get_index().bones_using(old_shape)
+        for armature, bone in users:
+            bone.custom_shape = new_shapes[0]
+
+        self.report({'INFO'}, "Replaced custom shape of %d bones" % len(users))
+
+        return {'FINISHED'}
+
+
+class ADH_RemoveUnusedCustomShapes(bpy.types.Operator):
+    """Deletes widget objects, recognized by name prefix, not used as custom shape by any bone."""
+    bl_idname = 'object.adh_remove_unused_shapes'
+    bl_label = 'Remove Unused Custom Shapes'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    widget_prefix: bpy.props.StringProperty(
+        name='Prefix',
+        description="Name prefix of widget objects",
+        default=PRF_WIDGET)
+
+    def execute(self, context):
+        from . import shape_index
+
+        if not self.widget_prefix:
+            return {'CANCELLED'}
+
+        # The index follows depsgraph updates, which custom shapes set
+        # by a script in the same step haven't gone through yet.
+        index = shape_index.get_index()
+        for obj in bpy.data.objects:
+            if obj.type == 'ARMATURE':
+                index.scan(obj)
+        orphans = [obj for obj in bpy.data.objects
+                   if obj.name.startswith(self.widget_prefix) and not index.is_used(obj)]
+        for obj in orphans:
+            remove_widget(obj)
+
+        self.report({'INFO'}, "Removed %d unused custom shapes" % len(orphans))
+
+        return {'FINISHED'}
+
+
+class ADH_CreateCustomShape(bpy.types.Operator):
+    """Creates mesh for custom shape for selected bones, at active bone's position, using its name as suffix."""
+    bl_idname = 'armature.adh_create_shape'
+    bl_label = 'Create Custom Shape'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    widget_shape: bpy.props.EnumProperty(
+        name='Shape',
+        items=widget_shape_items)
+
+    widget_size: bpy.props.FloatProperty(
+        name='Size',
+        default=1.0,
+        min=0,
+        max=2,
+        step=10,
+        description="Widget's scale as relative to bone.")
+
+    widget_pos: bpy.props.FloatProperty(
+        name='Position',
+        default=0.5,
+        min=-.5,
+        max=1.5,
+        step=5,
+        precision=1,
+        description="Widget's position along bone's length. 0.0 = base, 1.0 = tip.")
+
+    widget_rot: bpy.props.FloatProperty(
+        name='Rotation',
+        default=0,
+        min=-90,
+        max=90,
+        step=10,
+        precision=1,
+        description="Widget's rotation along bone's X axis.")
+
+    widget_prefix: bpy.props.StringProperty(
+        name='Prefix',
+        description="Prefix for the new widget's name",
+        default='WGT-')
+
+    shared: bpy.props.BoolProperty(
+        name='Shared Mesh',
+        description="Use one widget per shape for all bones, sized and placed with each bone's"
+                    " custom shape transform (Blender 3.0 and later)",
+        default=False)
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'POSE' \
+               and context.active_pose_bone is not None
+
+    def draw(self, context):
+        layout = self.layout
+
+        col = layout.column()
+        col.prop(self, 'widget_shape', expand=False, text='')
+        row = col.row()
+        row.active = self.widget_shape != 'selected'
+        row.prop(self, 'shared')
+
+        col = layout.column(align=1)
+        col.prop(self, 'widget_size', slider=True)
+        col.prop(self, 'widget_pos', slider=True)
+        col.prop(self, 'widget_rot', slider=True)
+
+        col = layout.column(align=1)
+        col.label(text='Prefix:')
+        col.prop(self, 'widget_prefix', text='')
+
+    def create_widget_from_object(self, context, rig, bone, widget_src):
+        """Creates widget from the evaluated shape of widget_src, keeping
+        its current look relative to the bone."""
+        from . import geometry
+
+        obj_name = self.widget_prefix + bone.name
+
+        # Evaluate the source once, then move all its vertices into the
+        # bone's custom shape space with a single matrix product.
+        depsgraph = context.evaluated_depsgraph_get()
+        src_eval = widget_src.evaluated_get(depsgraph)
+        widget_data = bpy.data.meshes.new_from_object(src_eval)
+        widget_data.name = obj_name
+
+        matrix_bone = rig.matrix_world @ bone.matrix @ Matrix.Scale(bone.length, 4)
+        matrix_wgt = matrix_bone.inverted() @ src_eval.matrix_world
+        co = geometry.transform_points(geometry.read_coordinates(widget_data.vertices), matrix_wgt)
+        widget_data.vertices.foreach_set("co", co.ravel())
+        widget_data.update()
+
+        obj = bpy.data.objects.get(obj_name)
+        if obj is not None and obj.type == 'MESH':
+            old_data = obj.data
+            obj.data = widget_data
+            if old_data.users == 0:
+                bpy.data.meshes.remove(old_data)
+        else:
+            obj = bpy.data.objects.new(obj_name, widget_data)
+        obj.display_type = 'WIRE'
+        if not obj.users_collection:
+            ensure_widget_collection(context).objects.link(obj)
+
+        bone.custom_shape = obj
+        obj_to_bone(obj, rig, bone.name)
+
+        return obj
+
+    @staticmethod
+    def create_shape_widget(rig, bone_name, shape, size=1.0, pos=1.0, rot=0.0, bone_transform_name=None):
+        from . import widget_shapes
+
+        if widget_shapes.get_shape(shape) is None:
+            return None
+        obj = create_widget(rig, bone_name, bone_transform_name)
+        widget_shapes.build_shape(obj.data, shape, size, pos, rot)
+        return obj
+
+    def create_shared_widget(self, context, shape):
+        """Returns the widget shared by all bones using the shape, creating
+        it at unit size if needed."""
+        from . import widget_shapes
+
+        obj_name = self.widget_prefix + SHARED_WIDGET_INFIX + shape
+        obj = bpy.data.objects.get(obj_name)
+        if obj is not None and obj.type == 'MESH':
+            return obj
+        mesh = bpy.data.meshes.new(obj_name)
+        if not widget_shapes.build_shape(mesh, shape, 1.0, 0.0, 0.0):
+            bpy.data.meshes.remove(mesh)
+            return None
+        obj = bpy.data.objects.new(obj_name, mesh)
+        ensure_widget_collection(context).objects.link(obj)
+        return obj
+
+    def execute_shared(self, context):
+        from . import widget_shapes
+
+        bone = context.active_pose_bone
+        if not hasattr(bone, "custom_shape_scale_xyz"):
+            self.report({'ERROR'}, "Shared widgets need Blender 3.0 or later")
+            return {'CANCELLED'}
+        widget = self.create_shared_widget(context, self.widget_shape)
+        if widget is None:
+            self.report({'ERROR'}, "Unknown widget shape: %s" % self.widget_shape)
+            return {'CANCELLED'}
+
+        scale_mask = widget_shapes.get_shape(self.widget_shape)[2]
+        scale = [self.widget_size if axis_mask > 0 else 1.0 for axis_mask in scale_mask]
+        for bone in context.selected_pose_bones:
+            length = bone.length if bone.use_custom_shape_bone_size else 1.0
+            bone.custom_shape = widget
+            bone.custom_shape_translation = (0.0, self.widget_pos * length, 0.0)
+            bone.custom_shape_rotation_euler = (math.radians(self.widget_rot), 0.0, 0.0)
+            bone.custom_shape_scale_xyz = scale
+
+        return {'FINISHED'}
+
+    def execute(self, context):
+        rig = context.active_object
+        bone = context.active_pose_bone
+
+        widget_sources = [obj for obj in context.selected_objects
+                          if obj.type == 'MESH']
+
+        if self.shared and self.widget_shape != 'selected':
+            return self.execute_shared(context)
+        if self.widget_shape == 'selected':
+            if len(widget_sources) != 1:
+                return {'CANCELLED'}
+            widget = self.create_widget_from_object(context, rig, bone, widget_sources[0])
+        else:
+            widget = self.create_shape_widget(rig, bone.name, self.widget_shape,
+                                              self.widget_size, self.widget_pos, self.widget_rot)
+            if widget is None:
+                self.report({'ERROR'}, "Unknown widget shape: %s" % self.widget_shape)
+                return {'CANCELLED'}
+
+        for bone in context.selected_pose_bones:
+            bone.custom_shape = widget
+
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return self.execute(context)
+
+
+class ADH_SaveWidgetToLibrary(bpy.types.Operator):
+    """Saves active mesh object's shape to the widget library, making it available in Create Custom Shape."""
+    bl_idname = 'object.adh_save_widget_to_library'
+    bl_label = 'Save Widget to Library'
+    bl_options = {'REGISTER'}
+
+    shape_name: bpy.props.StringProperty(
+        name="Name",
+        description="Name of the shape in the widget library. An existing shape of the same name is replaced",
+        default="",
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None \
+               and context.active_object.type == 'MESH'
+
+    def execute(self, context):
+        from . import geometry, widget_shapes
+
+        obj = context.active_object
+        if not self.shape_name:
+            return {'CANCELLED'}
+
+        obj.update_from_editmode()
+        mesh = obj.data
+        verts = geometry.read_coordinates(mesh.vertices)
+        edges = geometry.read_edges(mesh.edges)
+        path = widget_shapes.save_shape(self.shape_name, verts, edges)
+        self.report({'INFO'}, "Saved widget shape to %s" % path)
+
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        obj_name = context.active_object.name
+        if obj_name.startswith(PRF_WIDGET):
+            obj_name = obj_name[len(PRF_WIDGET):]
+        self.shape_name = obj_name
+        return context.window_manager.invoke_props_dialog(self)
+
+
+class ADH_ShareCustomShapes(bpy.types.Operator):
+    """Replaces per-bone custom shapes having the same geometry up to size, position and rotation with one shared widget, moving the difference into each bone's custom shape transform. Needs Blender 3.0 or later."""
+    bl_idname = 'armature.adh_share_shapes'
+    bl_label = 'Share Custom Shapes'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    scope: bpy.props.EnumProperty(
+        name="Scope",
+        items=[('SELECTED', "Selected Bones", "Convert custom shapes of selected bones"),
+               ('ALL', "Whole Armature", "Convert custom shapes of every bone in the armature")],
+        default='SELECTED',
+    )
+
+    tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Largest allowed fitting error, relative to the shared widget's size.",
+        default=0.001,
+        min=0.0,
+        precision=4,
+    )
+
+    remove_unused: bpy.props.BoolProperty(
+        name="Remove Unused",
+        description="Delete widgets no longer used by any bone.",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None \
+               and context.active_object.type == 'ARMATURE' \
+               and context.mode == 'POSE'
+
+    @staticmethod
+    def has_identity_transform(bone):
+        return tuple(bone.custom_shape_translation) == (0.0, 0.0, 0.0) \
+               and tuple(bone.custom_shape_rotation_euler) == (0.0, 0.0, 0.0) \
+               and tuple(bone.custom_shape_scale_xyz) == (1.0, 1.0, 1.0) \
+               and bone.custom_shape_transform is None
+
+    def execute(self, context):
+        from . import geometry, shape_index
+
+        rig = context.active_object
+        pose_bones = rig.pose.bones if self.scope == 'ALL' else context.selected_pose_bones
+        if not pose_bones or not hasattr(pose_bones[0], "custom_shape_scale_xyz"):
+            self.report({'ERROR'}, "Shared widgets need Blender 3.0 or later")
+            return {'CANCELLED'}
+
+        # Group widgets by topology, the first of each group being shared.
+        widget_bones = {}
+        for bone in pose_bones:
+            widget = bone.custom_shape
+            if widget is not None and widget.type == 'MESH' and self.has_identity_transform(bone):
+                widget_bones.setdefault(widget, []).append(bone)
+        groups = {}
+        for widget in widget_bones:
+            mesh = widget.data
+            co = geometry.read_coordinates(mesh.vertices)
+            topology = (len(co), geometry.array_hash(geometry.read_edges(mesh.edges)))
+            groups.setdefault(topology, []).append((widget, co))
+
+        replaced = set()
+        converted = 0
+        for members in groups.values():
+            shared, shared_co = members[0]
+            shared_size = max(float(shared_co.ptp(axis=0).max()), 1e-6)
+            for widget, co in members[1:]:
+                fit = geometry.similarity_transform(shared_co, co)
+                if fit is None or fit[3] > self.tolerance * shared_size * fit[0]:
+                    continue
+                scale, rotation, translation, _ = fit
+                euler = Matrix(rotation.tolist()).to_euler()
+                for bone in widget_bones[widget]:
+                    length = bone.length if bone.use_custom_shape_bone_size else 1.0
+                    bone.custom_shape = shared
+                    bone.custom_shape_translation = (translation * length).tolist()
+                    bone.custom_shape_rotation_euler = euler
+                    bone.custom_shape_scale_xyz = (scale, scale, scale)
+                    converted += 1
+                replaced.add(widget)
+
+        removed = 0
+        if self.remove_unused:
+            index = shape_index.get_index()
+            index.scan(rig)
+            for widget in replaced:
+                if not index.is_used(widget):
+                    remove_widget(widget)
+                    removed += 1
+
+        self.report({'INFO'}, "Converted %d bones, removed %d widgets" % (converted, removed))
+
+        return {'FINISHED'}
+
+
+class ADH_SyncCustomShapePositionToBone(bpy.types.Operator):
+    """Sync a mesh object's position to each selected bone using it as a custom shape."""
+    bl_idname = 'object.adh_sync_shape_position_to_bone'
+    bl_label = 'Sync Custom Shape Position to Bone'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    scope: bpy.props.EnumProperty(
+        name="Scope",
+        items=[('SELECTED', "Selected Bones", "Sync custom shapes of selected bones"),
+               ('ALL', "Whole Armature", "Sync custom shapes of every bone in the armature")],
+        default='SELECTED',
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None \
+               and context.active_object.type == 'ARMATURE' \
+               and context.mode == 'POSE'
+
+    def execute(self, context):
+        rig = context.active_object
+        pose_bones = rig.pose.bones if self.scope == 'ALL' \
+            else context.selected_pose_bones
+        sync_widgets_to_bones(context, rig, pose_bones)
+
+        return {'FINISHED'}